@@ -32,6 +32,11 @@ class UserProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='profile_created_keyset_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username}'s Profile"
 
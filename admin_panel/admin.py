@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import AdminActivityLog, AdminNotification, AdminSettings
+from .models import AdminActivityLog, AdminNotification, AdminSettings, BulkOrderJob
 
 @admin.register(AdminActivityLog)
 class AdminActivityLogAdmin(admin.ModelAdmin):
@@ -7,6 +7,7 @@ class AdminActivityLogAdmin(admin.ModelAdmin):
     list_filter = ('action', 'model_name', 'timestamp')
     search_fields = ('user__username', 'description')
     readonly_fields = ('timestamp',)
+    list_select_related = ('user',)
 
 @admin.register(AdminNotification)
 class AdminNotificationAdmin(admin.ModelAdmin):
@@ -20,3 +21,9 @@ class AdminSettingsAdmin(admin.ModelAdmin):
     list_display = ('key', 'value', 'updated_at')
     search_fields = ('key', 'value')
     readonly_fields = ('updated_at',)
+
+@admin.register(BulkOrderJob)
+class BulkOrderJobAdmin(admin.ModelAdmin):
+    list_display = ('action', 'status', 'processed', 'total', 'created_by', 'created_at')
+    list_filter = ('action', 'status', 'created_at')
+    readonly_fields = ('order_ids', 'created_at', 'updated_at', 'started_at', 'finished_at')
@@ -0,0 +1,152 @@
+"""
+Buffered admin activity log.
+
+``log`` appends an unsaved ``AdminActivityLog`` to a per-process buffer
+instead of INSERTing it inside the admin request. A request that logged
+anything writes the buffer with one ``bulk_create`` when it finishes, after
+the response has been handed to the server, so its entries are in the
+database, and visible to every worker, as soon as the request is over.
+Entries logged outside a request (background jobs, management commands) are
+batched: they are written when the buffer reaches ``AUDIT_LOG_BUFFER_SIZE``
+entries or its oldest entry is ``AUDIT_LOG_FLUSH_INTERVAL`` seconds old,
+checked on every ``log`` call and at the end of every request, and whatever
+is left is written at interpreter exit. Each entry keeps the time it was
+logged, not the time it was flushed.
+
+The trade-off is durability: a worker killed outright loses the entries of
+its requests in flight and at most one batch of the others.
+
+``prune`` (``manage.py prune_activity_logs``) deletes entries older than the
+retention period in id-ordered batches, optionally appending them to a
+gzipped JSON-lines archive first.
+"""
+
+import atexit
+import contextvars
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_buffer = {'pid': None, 'entries': [], 'oldest': 0.0}
+# Whether the request being served has logged anything.
+_request_logged = contextvars.ContextVar('audit_request_logged', default=False)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def log(user, action, model_name, object_id='', description='', ip_address=None):
+    """Queue an activity log entry."""
+    from .models import AdminActivityLog
+
+    entry = AdminActivityLog(
+        user=user,
+        action=action,
+        model_name=model_name,
+        object_id=str(object_id) if object_id else '',
+        description=description or f'{action} {model_name}',
+        ip_address=ip_address,
+        timestamp=timezone.now(),
+    )
+    with _lock:
+        if _buffer['pid'] != os.getpid():
+            # Entries queued before a fork belong to the parent.
+            _buffer.update(pid=os.getpid(), entries=[])
+        if not _buffer['entries']:
+            _buffer['oldest'] = time.monotonic()
+        _buffer['entries'].append(entry)
+    _request_logged.set(True)
+    flush_if_due()
+
+
+def pending():
+    """Number of entries waiting in this process."""
+    with _lock:
+        return len(_buffer['entries']) if _buffer['pid'] == os.getpid() else 0
+
+
+def flush_if_due():
+    with _lock:
+        entries = _buffer['entries']
+        due = entries and _buffer['pid'] == os.getpid() and (
+            len(entries) >= _setting('AUDIT_LOG_BUFFER_SIZE', 50)
+            or time.monotonic() - _buffer['oldest'] >= _setting('AUDIT_LOG_FLUSH_INTERVAL', 5)
+        )
+    if due:
+        flush()
+
+
+def request_started():
+    _request_logged.set(False)
+
+
+def request_finished():
+    """Write the buffer if the finishing request logged anything, else when due."""
+    if _request_logged.get():
+        _request_logged.set(False)
+        flush()
+    else:
+        flush_if_due()
+
+
+def flush():
+    """Write every queued entry with one ``bulk_create``; return how many."""
+    from .models import AdminActivityLog
+
+    with _lock:
+        if _buffer['pid'] != os.getpid():
+            return 0
+        entries, _buffer['entries'] = _buffer['entries'], []
+    if not entries:
+        return 0
+    try:
+        AdminActivityLog.objects.bulk_create(entries, batch_size=500)
+    except Exception as e:
+        logger.error(f"Could not write {len(entries)} activity log entries: {e}")
+        return 0
+    return len(entries)
+
+
+def prune(cutoff, batch_size=5000, archive=None):
+    """Delete entries logged before ``cutoff``; return how many.
+
+    With ``archive`` (a path), each batch is appended to that gzip file as
+    JSON lines before it is deleted.
+    """
+    from .models import AdminActivityLog
+
+    fields = ('id', 'user_id', 'action', 'model_name', 'object_id', 'description', 'ip_address', 'timestamp')
+    stream = gzip.open(archive, 'at', encoding='utf-8') if archive else None
+    total = 0
+    try:
+        while True:
+            rows = list(
+                AdminActivityLog.objects.filter(timestamp__lt=cutoff)
+                .order_by('id')
+                .values(*fields)[:batch_size]
+            )
+            if not rows:
+                break
+            if stream is not None:
+                for row in rows:
+                    row['timestamp'] = row['timestamp'].isoformat()
+                    stream.write(json.dumps(row) + '\n')
+                stream.flush()
+            total += AdminActivityLog.objects.filter(id__in=[row['id'] for row in rows]).delete()[0]
+    finally:
+        if stream is not None:
+            stream.close()
+    return total
+
+
+atexit.register(flush)
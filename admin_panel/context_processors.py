@@ -0,0 +1,15 @@
+import functools
+
+from . import notifications
+
+
+def admin_header(request):
+    """Unread notification count for the admin header.
+
+    Passed as a callable so that only templates that show it (the admin
+    base template) look it up, and then from the per-user cache.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not (user.is_authenticated and (user.is_staff or user.is_superuser)):
+        return {}
+    return {'unread_notifications_count': functools.partial(notifications.unread_count, user)}
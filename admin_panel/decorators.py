@@ -32,18 +32,20 @@ def ajax_required(function):
 def log_admin_action(action, model_name, object_id=None, description=None):
     """
     Decorator to log admin actions
+
+    Entries are buffered and written when the request finishes, see ``admin_panel.audit``.
     """
     def decorator(function):
         @wraps(function)
         def wrapped_view(request, *args, **kwargs):
-            from .models import AdminActivityLog
-            
+            from . import audit
+
             # Execute the view
             response = function(request, *args, **kwargs)
             
             # Log the action if successful
             if hasattr(response, 'status_code') and response.status_code < 400:
-                AdminActivityLog.objects.create(
+                audit.log(
                     user=request.user,
                     action=action,
                     model_name=model_name,
@@ -0,0 +1,140 @@
+"""
+Background jobs for long-running admin operations.
+
+Jobs are stored as rows so the admin panel can poll their progress and ask
+for cancellation. ``start_job`` runs them on a daemon thread once the
+creating transaction has committed. A job interrupted by a worker restart
+keeps its committed progress and is picked up again by
+``manage.py run_admin_jobs``.
+"""
+
+import logging
+import threading
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from cart.models import Order
+from shop import inventory
+from .models import BulkOrderJob
+
+logger = logging.getLogger(__name__)
+
+
+def start_job(func, *args):
+    """Run ``func(*args)`` in the background after the current transaction commits.
+
+    With ``BACKGROUND_JOBS_ASYNC = False`` the job runs inline instead,
+    which is what the tests and single-process setups use.
+    """
+    def run():
+        try:
+            func(*args)
+        finally:
+            connection.close()
+
+    def launch():
+        if getattr(settings, 'BACKGROUND_JOBS_ASYNC', True):
+            threading.Thread(target=run, name=f'admin-job-{func.__name__}', daemon=True).start()
+        else:
+            func(*args)
+
+    transaction.on_commit(launch)
+
+
+def _apply_chunk(job, order_ids):
+    """Apply the job's action to one chunk; return (affected, orders_to_notify)."""
+    orders = Order.objects.filter(id__in=order_ids)
+
+    if job.action == 'delete':
+        for order in orders.only('id', 'order_number'):
+            inventory.release_order(order)
+        _, per_model = orders.delete()
+        return per_model.get(Order._meta.label, 0), []
+
+    if job.action == 'update_status':
+        new_status = job.params['new_status']
+        changed = list(orders.exclude(status=new_status).only(
+            'id', 'order_number', 'email', 'billing_first_name', 'status', 'payment_status'
+        ))
+        Order.objects.filter(id__in=[order.id for order in changed]).update(status=new_status)
+        for order in changed:
+            order.status = new_status
+            inventory.sync_order(order)
+        notify = changed if job.params.get('notify_customers') else []
+        return len(changed), notify
+
+    if job.action == 'update_payment':
+        new_payment_status = job.params['new_payment_status']
+        affected = orders.update(payment_status=new_payment_status)
+        for order in orders.only('id', 'order_number', 'status', 'payment_status'):
+            inventory.sync_order(order)
+        return affected, []
+
+    raise ValueError(f'Unknown bulk action: {job.action}')
+
+
+def _notify_customers(orders):
+    """Send status emails for one chunk over a single SMTP connection."""
+    if not orders:
+        return 0
+
+    email_messages = []
+    for order in orders:
+        email_messages.append(EmailMessage(
+            subject=f"Order #{order.order_number} update - CareCove Sea Moss",
+            body=(
+                f"Dear {order.billing_first_name},\n\n"
+                f"Your order #{order.order_number} is now {order.get_status_display()}.\n\n"
+                f"Thank you for shopping with CareCove!"
+            ),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[order.email],
+        ))
+
+    try:
+        mail_connection = get_connection(fail_silently=True)
+        return mail_connection.send_messages(email_messages) or 0
+    except Exception as e:
+        logger.error(f"Error sending bulk order notifications: {str(e)}")
+        return 0
+
+
+def run_bulk_order_job(job_id):
+    """Process a ``BulkOrderJob`` chunk by chunk, one transaction per chunk."""
+    job = BulkOrderJob.objects.get(pk=job_id)
+    if job.is_finished:
+        return
+
+    jobs = BulkOrderJob.objects.filter(pk=job_id)
+    jobs.update(status='running', started_at=job.started_at or timezone.now(), updated_at=timezone.now())
+    chunk_size = max(1, getattr(settings, 'ADMIN_BULK_CHUNK_SIZE', 200))
+
+    try:
+        for start in range(job.processed, job.total, chunk_size):
+            if jobs.filter(cancel_requested=True).exists():
+                jobs.update(status='cancelled', finished_at=timezone.now())
+                logger.info(f"Bulk order job {job_id} cancelled at {start}/{job.total}")
+                return
+
+            chunk_ids = job.order_ids[start:start + chunk_size]
+            with transaction.atomic():
+                affected, notify = _apply_chunk(job, chunk_ids)
+                jobs.update(
+                    processed=F('processed') + len(chunk_ids),
+                    affected=F('affected') + affected,
+                    updated_at=timezone.now(),
+                )
+
+            sent = _notify_customers(notify)
+            if sent:
+                jobs.update(emails_sent=F('emails_sent') + sent)
+
+        jobs.update(status='completed', finished_at=timezone.now())
+        logger.info(f"Bulk order job {job_id} completed")
+    except Exception as e:
+        logger.error(f"Bulk order job {job_id} failed: {str(e)}")
+        jobs.update(status='failed', error=str(e), finished_at=timezone.now())
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from carecove.templating import precompile
+
+
+class Command(BaseCommand):
+    help = 'Compile every project template, failing on the first deploy that ships a syntax error'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--include-packages', action='store_true',
+            help='Also compile templates shipped by installed packages such as django.contrib.admin',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        compiled, errors = precompile(include_packages=options['include_packages'])
+        elapsed = (time.perf_counter() - started) * 1000
+
+        for name, error in sorted(errors.items()):
+            self.stderr.write(f'{name}: {error}')
+        if errors:
+            raise CommandError(f'{len(errors)} template(s) failed to compile ({compiled} compiled).')
+        self.stdout.write(self.style.SUCCESS(f'Compiled {compiled} template(s) in {elapsed:.0f}ms.'))
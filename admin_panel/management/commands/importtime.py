@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def parse_importtime(output):
+    """``[(module, self_us, cumulative_us)]`` from ``python -X importtime`` stderr."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            # The header line: "self [us] | cumulative | imported package"
+            continue
+        rows.append((fields[2].strip(), self_us, cumulative_us))
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Report what importing the project costs per module, from a fresh interpreter run with -X importtime'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'module', nargs='?', default='carecove.urls',
+            help='Module to import after django.setup() (default: carecove.urls, which loads every view)',
+        )
+        parser.add_argument('--limit', type=int, default=25, help='Rows per table')
+
+    def handle(self, *args, **options):
+        code = f"import django; django.setup(); import {options['module']}"
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'carecove.settings'))
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"Importing {options['module']} failed:\n{result.stderr[-2000:]}")
+
+        rows = parse_importtime(result.stderr)
+        limit = options['limit']
+        packages = defaultdict(int)
+        for module, self_us, _ in rows:
+            packages[module.split('.')[0]] += self_us
+
+        self.stdout.write(f"{len(rows)} modules, {sum(row[1] for row in rows) / 1000:.0f}ms in total\n")
+        self.stdout.write('Slowest by cumulative time:')
+        for module, self_us, cumulative_us in sorted(rows, key=lambda row: -row[2])[:limit]:
+            self.stdout.write(f'  {cumulative_us / 1000:8.1f}ms  {self_us / 1000:8.1f}ms self  {module}')
+        self.stdout.write('\nSlowest by own time:')
+        for module, self_us, _ in sorted(rows, key=lambda row: -row[1])[:limit]:
+            self.stdout.write(f'  {self_us / 1000:8.1f}ms  {module}')
+        self.stdout.write('\nBy top-level package:')
+        for package, total in sorted(packages.items(), key=lambda item: -item[1])[:limit]:
+            self.stdout.write(f'  {total / 1000:8.1f}ms  {package}')
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from admin_panel.audit import prune
+from admin_panel.models import AdminActivityLog
+
+
+class Command(BaseCommand):
+    help = 'Delete (and optionally archive) admin activity log entries past the retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.AUDIT_LOG_RETENTION_DAYS,
+            help='Keep entries from this many days',
+        )
+        parser.add_argument('--archive', help='Append pruned entries to this .jsonl.gz file first')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Entries deleted per statement')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many entries would be pruned')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+
+        if options['dry_run']:
+            count = AdminActivityLog.objects.filter(timestamp__lt=cutoff).count()
+            self.stdout.write(f'{count} entr(ies) logged before {cutoff:%Y-%m-%d} would be pruned.')
+            return
+
+        count = prune(cutoff, batch_size=max(1, options['batch_size']), archive=options['archive'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Pruned {count} activity log entr(ies)' + (f' into {options["archive"]}.' if options['archive'] else '.')
+        ))
@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from admin_panel.jobs import run_bulk_order_job
+from admin_panel.models import BulkOrderJob
+from newsletter.delivery import deliver_campaign
+from newsletter.models import EmailCampaign
+
+
+class Command(BaseCommand):
+    help = 'Run pending admin background jobs and resume ones (including campaign sends) interrupted by a worker restart'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-after', type=int, default=10,
+            help='Minutes without progress before a running job is considered interrupted',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        stale = now - timedelta(minutes=options['stale_after'])
+        jobs = BulkOrderJob.objects.filter(
+            Q(status='pending', created_at__lt=now - timedelta(minutes=1)) |
+            Q(status='running', updated_at__lt=stale)
+        ).order_by('created_at')
+
+        count = 0
+        for job_id in jobs.values_list('id', flat=True):
+            self.stdout.write(f'Running bulk order job {job_id}...')
+            run_bulk_order_job(job_id)
+            count += 1
+
+        campaigns = EmailCampaign.objects.filter(status='sending', updated_at__lt=stale).order_by('updated_at')
+        campaign_count = 0
+        for campaign_id in campaigns.values_list('id', flat=True):
+            self.stdout.write(f'Resuming campaign delivery {campaign_id}...')
+            deliver_campaign(campaign_id)
+            campaign_count += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {count} bulk order job(s) and {campaign_count} campaign(s).'
+        ))
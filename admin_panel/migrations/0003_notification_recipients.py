@@ -0,0 +1,54 @@
+# Generated by Django 5.2.4 on 2026-10-19 19:06
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0002_bulkorderjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='adminnotification',
+            options={'ordering': ['-last_event_at', '-id']},
+        ),
+        migrations.AddField(
+            model_name='adminnotification',
+            name='key',
+            field=models.CharField(blank=True, help_text='Events with the same key are coalesced', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='adminnotification',
+            name='last_event_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='adminnotification',
+            name='link',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='adminnotification',
+            name='occurrences',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='adminnotification',
+            name='recipient',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='admin_notifications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='adminnotification',
+            index=models.Index(fields=['recipient', 'is_read'], name='notification_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='adminnotification',
+            index=models.Index(fields=['key', 'created_at'], name='notification_key_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-19 19:09
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0003_notification_recipients'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='adminactivitylog',
+            options={'ordering': ['-timestamp', '-id']},
+        ),
+        migrations.AlterField(
+            model_name='adminactivitylog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='adminactivitylog',
+            index=models.Index(fields=['timestamp', 'id'], name='activity_log_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='adminactivitylog',
+            index=models.Index(fields=['user', 'timestamp'], name='activity_log_user_idx'),
+        ),
+    ]
@@ -1,5 +1,8 @@
 
-from django.db import models
+from django.db import models, transaction
+from django.core.signals import request_finished, request_started
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.utils import timezone
 
@@ -20,17 +23,28 @@ class AdminActivityLog(models.Model):
     model_name = models.CharField(max_length=50)
     object_id = models.CharField(max_length=50, blank=True)
     description = models.TextField(blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the entry is logged; entries are written later in batches
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     
     class Meta:
-        ordering = ['-timestamp']
+        ordering = ['-timestamp', '-id']
+        indexes = [
+            models.Index(fields=['timestamp', 'id'], name='activity_log_keyset_idx'),
+            models.Index(fields=['user', 'timestamp'], name='activity_log_user_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} {self.action} {self.model_name} at {self.timestamp}"
 
 class AdminNotification(models.Model):
-    """System notifications for admin users"""
+    """System notifications for admin users.
+
+    Each staff user gets their own row, so read state and unread counts are
+    per user. Repeats of the same event (same ``key``) within the coalescing
+    window bump ``occurrences`` on the unread rows instead of adding new ones;
+    see ``admin_panel.notifications``.
+    """
     NOTIFICATION_TYPES = [
         ('order', 'New Order'),
         ('review', 'New Review'),
@@ -46,15 +60,26 @@ class AdminNotification(models.Model):
         ('urgent', 'Urgent'),
     ]
     
+    recipient = models.ForeignKey(
+        User, on_delete=models.CASCADE, null=True, blank=True, related_name='admin_notifications',
+    )
     title = models.CharField(max_length=200)
     message = models.TextField()
     notification_type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES)
     priority = models.CharField(max_length=10, choices=PRIORITY_LEVELS, default='medium')
+    link = models.CharField(max_length=200, blank=True)
+    key = models.CharField(max_length=100, blank=True, help_text="Events with the same key are coalesced")
+    occurrences = models.PositiveIntegerField(default=1)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    last_event_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-last_event_at', '-id']
+        indexes = [
+            models.Index(fields=['recipient', 'is_read'], name='notification_unread_idx'),
+            models.Index(fields=['key', 'created_at'], name='notification_key_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -72,3 +97,120 @@ class AdminSettings(models.Model):
     
     def __str__(self):
         return f"{self.key}: {self.value[:50]}"
+
+
+@receiver(request_started)
+def start_activity_log(sender, **kwargs):
+    from . import audit
+    audit.request_started()
+
+
+@receiver(request_finished)
+def flush_activity_log(sender, **kwargs):
+    from . import audit
+    audit.request_finished()
+
+
+@receiver(post_save, sender=AdminSettings)
+@receiver(post_delete, sender=AdminSettings)
+def invalidate_site_settings(sender, **kwargs):
+    """Tell every worker to reload its cached copy of the settings."""
+    from .site_settings import invalidate
+    invalidate()
+
+class BulkOrderJob(models.Model):
+    """A bulk order operation processed in chunks outside the request"""
+    ACTION_CHOICES = [
+        ('delete', 'Delete Orders'),
+        ('update_status', 'Update Status'),
+        ('update_payment', 'Update Payment Status'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('cancelled', 'Cancelled'),
+        ('failed', 'Failed'),
+    ]
+
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    params = models.JSONField(default=dict, blank=True)
+    order_ids = models.JSONField(default=list)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    affected = models.PositiveIntegerField(default=0)
+    emails_sent = models.PositiveIntegerField(default=0)
+    cancel_requested = models.BooleanField(default=False)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.get_action_display()} ({self.processed}/{self.total})"
+
+    @property
+    def progress_percent(self):
+        if not self.total:
+            return 100
+        return round(self.processed * 100 / self.total)
+
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'cancelled', 'failed')
+
+
+@receiver(post_save, sender='shop.StockMovement')
+def notify_low_stock(sender, instance, created, **kwargs):
+    if created:
+        from .notifications import stock_moved
+        # After the sale or count commits: the alert must neither hold the
+        # stock rows' locks nor roll the movement back if it fails.
+        transaction.on_commit(lambda: stock_moved(instance), robust=True)
+
+
+@receiver(post_save, sender='cart.Order')
+def notify_new_order(sender, instance, created, **kwargs):
+    if created:
+        from .notifications import order_placed
+        # Outside the checkout transaction, so it never waits on or holds the
+        # staff rows' locks, and nothing is sent for a rolled-back order.
+        order_number, email, total = instance.order_number, instance.email, instance.total
+        transaction.on_commit(lambda: order_placed(order_number, email, total), robust=True)
+
+
+@receiver(post_save, sender='shop.ProductReview')
+def notify_pending_review(sender, instance, created, **kwargs):
+    if created and not instance.is_approved:
+        from django.urls import reverse
+        from .notifications import notify
+        notify(
+            'review',
+            'Review awaiting approval',
+            f'A {instance.rating}-star review "{instance.title}" is waiting for approval.',
+            key='review:pending',
+            priority='low',
+            link=reverse('admin:shop_productreview_changelist') + '?is_approved__exact=0',
+        )
+
+
+@receiver(post_save, sender='testimonials.Testimonial')
+def notify_pending_testimonial(sender, instance, created, **kwargs):
+    if created and instance.status == 'pending':
+        from django.urls import reverse
+        from .notifications import notify
+        notify(
+            'testimonial',
+            'Testimonial awaiting approval',
+            f'{instance.name} submitted "{instance.title}".',
+            key='testimonial:pending',
+            priority='low',
+            link=reverse('admin_panel:testimonials_list') + '?status=pending',
+        )
@@ -0,0 +1,149 @@
+"""
+Admin notifications.
+
+Signal receivers at the bottom of ``admin_panel.models`` turn shop events
+(stock falling to the low-stock threshold, new orders, reviews and
+testimonials awaiting approval) into ``notify`` calls. Each notification is
+fanned out to one row per active staff user. An event whose ``key`` matches a
+notification created within ``ADMIN_NOTIFICATION_COALESCE_SECONDS`` that a
+user has not read yet is folded into that user's row: a single UPDATE
+refreshes the text and bumps ``occurrences``. Only users who have already
+read it get a new row. Events that describe one item each, like new orders,
+pass a ``summary`` so the folded row reads as a count ("3 new orders")
+rather than showing only the latest item.
+
+The unread count shown in the admin header is cached per user and dropped
+when that user gets a new notification or reads one.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import CharField, F, Q, Value
+from django.db.models.functions import Cast, Concat
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import AdminNotification
+
+UNREAD_KEY = 'admin_notifications:unread:{}'
+
+
+def _unread_key(user_id):
+    return UNREAD_KEY.format(user_id)
+
+
+def staff_ids():
+    return list(
+        User.objects.filter(Q(is_staff=True) | Q(is_superuser=True), is_active=True).values_list('id', flat=True)
+    )
+
+
+def _counted(text):
+    """``"<occurrences after this event> <text>"`` computed in the UPDATE."""
+    count = Cast(F('occurrences') + 1, output_field=CharField())
+    return Concat(count, Value(f' {text}'), output_field=CharField())
+
+
+def notify(notification_type, title, message, key='', priority='medium', link='', summary=None):
+    """Notify every staff user, coalescing with their recent unread ``key`` match.
+
+    ``summary`` is a ``(title, message)`` pair used for a coalesced row, each
+    prefixed with the number of events it now covers.
+    """
+    now = timezone.now()
+    recipients = staff_ids()
+    if key:
+        window = timedelta(seconds=getattr(settings, 'ADMIN_NOTIFICATION_COALESCE_SECONDS', 900))
+        pending = AdminNotification.objects.filter(
+            key=key, is_read=False, created_at__gte=now - window, recipient_id__in=recipients,
+        )
+        coalesced = set(pending.values_list('recipient_id', flat=True))
+        if coalesced:
+            text = {'title': title, 'message': message}
+            if summary:
+                text = {'title': _counted(summary[0]), 'message': _counted(summary[1])}
+            pending.update(
+                **text, priority=priority, link=link, occurrences=F('occurrences') + 1, last_event_at=now,
+            )
+            recipients = [user_id for user_id in recipients if user_id not in coalesced]
+
+    AdminNotification.objects.bulk_create([
+        AdminNotification(
+            recipient_id=user_id, notification_type=notification_type, title=title, message=message,
+            priority=priority, link=link, key=key, last_event_at=now,
+        )
+        for user_id in recipients
+    ])
+    invalidate_unread(recipients)
+    return len(recipients)
+
+
+def unread_count(user):
+    """Unread notifications for ``user``, from the cache when possible."""
+    key = _unread_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = AdminNotification.objects.filter(recipient=user, is_read=False).count()
+        cache.set(key, count, getattr(settings, 'ADMIN_NOTIFICATION_COUNT_TIMEOUT', 300))
+    return count
+
+
+def invalidate_unread(user_ids):
+    """Drop the cached unread counts once the current transaction commits."""
+    keys = [_unread_key(user_id) for user_id in user_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def mark_read(user, notification_id=None):
+    """Mark one, or with no id all, of ``user``'s notifications read in one UPDATE."""
+    notifications = AdminNotification.objects.filter(recipient=user, is_read=False)
+    if notification_id is not None:
+        notifications = notifications.filter(pk=notification_id)
+    updated = notifications.update(is_read=True)
+    if updated:
+        invalidate_unread([user.pk])
+    return updated
+
+
+def order_placed(order_number, email, total):
+    """Tell staff about a new order, folded into their unread "N new orders" row."""
+    notify(
+        'order',
+        f'New order {order_number}',
+        f'{email} placed an order for {total}.',
+        key='order:new',
+        link=reverse('admin_panel:orders_list') + '?status=pending',
+        summary=('new orders', 'orders are waiting to be processed.'),
+    )
+
+
+def stock_moved(movement):
+    """Raise a low-stock alert when a movement takes stock down to the threshold.
+
+    Runs once the movement has committed, so the stock read here is the
+    committed total.
+    """
+    change = movement.quantity - movement.reserved
+    if change >= 0 or not movement.product.track_inventory:
+        return
+    holder = movement.variant or movement.product
+    holder.refresh_from_db(fields=['stock_quantity', 'reserved_quantity'])
+    threshold = getattr(settings, 'LOW_STOCK_THRESHOLD', 10)
+    available = holder.available_quantity
+    if not available <= threshold < available - change:
+        return
+
+    name = str(movement.variant) if movement.variant_id else movement.product.name
+    notify(
+        'low_stock',
+        f'Low stock: {name}',
+        f'Only {available} left of {name} (threshold {threshold}).',
+        key=f'low_stock:{movement.product_id}:{movement.variant_id or 0}',
+        priority='high' if available <= 0 else 'medium',
+        link=reverse('admin_panel:product_edit', args=[movement.product_id]),
+    )
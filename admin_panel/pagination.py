@@ -0,0 +1,195 @@
+"""
+Keyset (cursor) pagination for admin list views.
+
+Django's ``Paginator`` runs a ``COUNT(*)`` and an ``OFFSET`` that both grow
+with the table and the page number. ``KeysetPaginator`` instead walks an
+index on ``(ordering_field, id)`` newest first: every page is a
+``WHERE (ordering_field, id) < cursor ORDER BY ... LIMIT per_page + 1``,
+so page N costs the same as page 1. The total is optional and, when asked
+for, is a capped count or a planner estimate rather than an exact scan.
+"""
+
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+
+CURSOR_AFTER = 'after'
+CURSOR_BEFORE = 'before'
+LAST_PAGE = 'last'
+PAGINATION_PARAMS = (CURSOR_AFTER, CURSOR_BEFORE, LAST_PAGE, 'page')
+
+
+class KeysetPage:
+    """One page of results, usable like a Django ``Page`` in templates."""
+
+    def __init__(self, object_list, paginator, has_next, has_previous, query_params):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self._query_params = query_params
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def _query(self, **params):
+        query = self._query_params.copy()
+        for key in PAGINATION_PARAMS:
+            query.pop(key, None)
+        query.update(params)
+        return query.urlencode()
+
+    @property
+    def first_query(self):
+        return self._query()
+
+    @property
+    def last_query(self):
+        return self._query(**{LAST_PAGE: '1'})
+
+    @property
+    def next_query(self):
+        if not self.object_list:
+            return self._query()
+        return self._query(**{CURSOR_AFTER: self.paginator.encode_cursor(self.object_list[-1])})
+
+    @property
+    def previous_query(self):
+        if not self.object_list:
+            return self._query()
+        return self._query(**{CURSOR_BEFORE: self.paginator.encode_cursor(self.object_list[0])})
+
+    @property
+    def count(self):
+        return self.paginator.count
+
+    @property
+    def count_display(self):
+        """Total for headings: ``"1,000+"`` when capped, ``"~52,000"`` when estimated."""
+        count = self.paginator.count
+        if count is None:
+            return ''
+        if not self.paginator.count_is_estimate:
+            return f"{count:,}"
+        if count == self.paginator.count_cap:
+            return f"{count:,}+"
+        return f"~{count:,}"
+
+
+class KeysetPaginator:
+    """Paginate a queryset newest first on ``(ordering_field, pk)``.
+
+    ``count`` is ``'approximate'`` (default) for a bounded count, or
+    ``None`` to skip counting entirely.
+    """
+
+    count_cap = 1000
+
+    def __init__(self, queryset, per_page=20, ordering_field='created_at', count='approximate'):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering_field = ordering_field
+        self.count_mode = count
+        self.count_is_estimate = False
+        self._count = None
+        self._field = queryset.model._meta.get_field(ordering_field)
+
+    def encode_cursor(self, obj):
+        value = getattr(obj, self.ordering_field)
+        payload = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value, obj.pk])
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Return ``(value, pk)`` or ``None`` if the cursor is malformed."""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return self._field.to_python(value), int(pk)
+        except (ValueError, TypeError, ValidationError):
+            return None
+
+    def _seek(self, cursor, older):
+        value, pk = cursor
+        field = self.ordering_field
+        if older:
+            return Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk})
+        return Q(**{f'{field}__gt': value}) | Q(**{field: value, 'pk__gt': pk})
+
+    def get_page(self, params):
+        """Build the page described by the ``after``/``before``/``last`` query params."""
+        field = self.ordering_field
+        newest_first = self.queryset.order_by(f'-{field}', '-pk')
+        oldest_first = self.queryset.order_by(field, 'pk')
+        limit = self.per_page + 1
+
+        after = self.decode_cursor(params.get(CURSOR_AFTER, ''))
+        before = self.decode_cursor(params.get(CURSOR_BEFORE, ''))
+
+        if after:
+            rows = list(newest_first.filter(self._seek(after, older=True))[:limit])
+            has_next, has_previous = len(rows) > self.per_page, True
+            rows = rows[:self.per_page]
+        elif before:
+            rows = list(oldest_first.filter(self._seek(before, older=False))[:limit])
+            has_next, has_previous = True, len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+        elif params.get(LAST_PAGE):
+            rows = list(oldest_first[:limit])
+            has_next, has_previous = False, len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+        else:
+            rows = list(newest_first[:limit])
+            has_next, has_previous = len(rows) > self.per_page, False
+            rows = rows[:self.per_page]
+
+        return KeysetPage(rows, self, has_next, has_previous, params)
+
+    @property
+    def count(self):
+        if self.count_mode is None:
+            return None
+        if self._count is None:
+            self._count = self._approximate_count()
+        return self._count
+
+    def _approximate_count(self):
+        """Exact count up to ``count_cap``; beyond that a planner estimate."""
+        capped = self.queryset.order_by()[:self.count_cap + 1].count()
+        if capped <= self.count_cap:
+            return capped
+
+        self.count_is_estimate = True
+        connection = connections[self.queryset.db]
+        if connection.vendor == 'postgresql':
+            sql, sql_params = self.queryset.order_by().query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', sql_params)
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return max(int(plan[0]['Plan']['Plan Rows']), self.count_cap)
+        return self.count_cap
+
+
+def paginate_keyset(request, queryset, ordering_field='created_at', per_page=20, count='approximate'):
+    """Shortcut used by admin list views."""
+    paginator = KeysetPaginator(queryset, per_page=per_page, ordering_field=ordering_field, count=count)
+    return paginator.get_page(request.GET)
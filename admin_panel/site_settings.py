@@ -0,0 +1,151 @@
+"""
+Cached access to ``AdminSettings``.
+
+Every row is loaded once into a process-local dict
+(``carecove.versioned_cache``). Saving or deleting any setting replaces the
+shared version token, and each process compares against it at most once
+every ``ADMIN_SETTINGS_CHECK_INTERVAL`` seconds. Reads in between touch
+neither the database nor the cache.
+
+Writes must go through model ``save()``/``delete()`` (or ``save_values``) so
+the signals in ``admin_panel.models`` can invalidate; queryset ``update()``
+bypasses them.
+"""
+
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from carecove.versioned_cache import VersionedCache
+
+VERSION_KEY = 'admin_settings:version'
+TRUE_VALUES = {'1', 'true', 'yes', 'on'}
+
+# Settings edited on the shipping and tax pages: key -> (type, default).
+SHIPPING_SETTINGS = {
+    'domestic_shipping_rate': (Decimal, Decimal('5000')),
+    'international_shipping_rate': (Decimal, Decimal('15000')),
+    'free_shipping_threshold': (Decimal, Decimal('50000')),
+    'enable_standard_shipping': (bool, True),
+    'enable_express_shipping': (bool, False),
+    'express_shipping_rate': (Decimal, Decimal('10000')),
+    'shipping_policy': (str, 'We ship to all regions in Tanzania and internationally. '
+                             'Standard delivery takes 3-5 business days.'),
+}
+
+TAX_SETTINGS = {
+    'enable_tax': (bool, False),
+    'vat_rate': (Decimal, Decimal('18')),
+    'tax_name': (str, 'VAT'),
+    'tax_number': (str, ''),
+    'tax_included_in_price': (bool, False),
+    'tax_on_shipping': (bool, False),
+    'tax_description': (str, 'Value Added Tax (VAT) is included in all prices.'),
+}
+
+_cache = VersionedCache(VERSION_KEY, 'ADMIN_SETTINGS_CHECK_INTERVAL')
+
+
+def _load():
+    from .models import AdminSettings
+
+    return dict(AdminSettings.objects.values_list('key', 'value'))
+
+
+def _values():
+    return _cache.get('values', _load)
+
+
+def reset():
+    """Drop this process's copy so the next read reloads it."""
+    _cache.reset()
+
+
+def invalidate():
+    """Make every worker reload once the current transaction commits."""
+    _cache.invalidate()
+
+
+def get_str(key, default=''):
+    value = _values().get(key)
+    return default if value is None else value
+
+
+def get_int(key, default=0):
+    try:
+        return int(_values()[key])
+    except (KeyError, ValueError):
+        return default
+
+
+def get_decimal(key, default=Decimal('0')):
+    try:
+        return Decimal(_values()[key])
+    except (KeyError, InvalidOperation):
+        return default
+
+
+def get_bool(key, default=False):
+    value = _values().get(key)
+    if value is None:
+        return default
+    return value.strip().lower() in TRUE_VALUES
+
+
+_GETTERS = {str: get_str, int: get_int, Decimal: get_decimal, bool: get_bool}
+
+
+def get_values(schema):
+    """Return ``{key: typed value}`` for a schema such as ``TAX_SETTINGS``."""
+    return {key: _GETTERS[kind](key, default) for key, (kind, default) in schema.items()}
+
+
+def parse_values(schema, data):
+    """Convert submitted form data for ``schema``; raise ``ValueError`` on bad input."""
+    values = {}
+    for key, (kind, default) in schema.items():
+        if kind is bool:
+            values[key] = key in data
+            continue
+        raw = data.get(key, '').strip()
+        if kind is str:
+            values[key] = raw
+            continue
+        try:
+            number = kind(raw) if raw else default
+        except (ValueError, InvalidOperation):
+            raise ValueError(f'{key.replace("_", " ").capitalize()} must be a number.')
+        if number < 0:
+            raise ValueError(f'{key.replace("_", " ").capitalize()} cannot be negative.')
+        values[key] = number
+    return values
+
+
+def save_values(values):
+    """Persist ``{key: value}``, storing booleans as ``'true'``/``'false'``."""
+    from .models import AdminSettings
+
+    with transaction.atomic():
+        for key, value in values.items():
+            if isinstance(value, bool):
+                value = 'true' if value else 'false'
+            AdminSettings.objects.update_or_create(key=key, defaults={'value': str(value)})
+
+
+def shipping_cost(subtotal, country='Tanzania'):
+    """Shipping charge for an order of ``subtotal`` shipped to ``country``."""
+    shipping = get_values(SHIPPING_SETTINGS)
+    if subtotal >= shipping['free_shipping_threshold']:
+        return Decimal('0')
+    if (country or 'Tanzania').strip().lower() != 'tanzania':
+        return shipping['international_shipping_rate']
+    return shipping['domestic_shipping_rate']
+
+
+def tax_amount(subtotal, shipping=Decimal('0')):
+    """Tax to add on top of ``subtotal``; zero when disabled or already included."""
+    tax = get_values(TAX_SETTINGS)
+    if not tax['enable_tax'] or tax['tax_included_in_price']:
+        return Decimal('0')
+    taxable = Decimal(subtotal) + (shipping if tax['tax_on_shipping'] else 0)
+    return (taxable * tax['vat_rate'] / 100).quantize(Decimal('0.01'))
@@ -1,3 +1,416 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from cart.models import Order
+from chatbot import llm
+from shop import inventory
+from shop.models import Category, Product, ProductImage, StockMovement, refresh_cover_image
+from testimonials.models import Testimonial
+
+from . import audit, notifications, site_settings
+from .jobs import run_bulk_order_job
+from .models import AdminActivityLog, AdminNotification, AdminSettings, BulkOrderJob
+from .pagination import KeysetPaginator
+
+
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        for i in range(7):
+            testimonial = Testimonial.objects.create(
+                name=f'Customer {i}', email=f'c{i}@example.com', title=f'T{i}', content='Great',
+            )
+            # Two rows share a timestamp to exercise the id tie-breaker.
+            Testimonial.objects.filter(pk=testimonial.pk).update(created_at=now - timedelta(minutes=i // 2))
+        cls.expected = list(Testimonial.objects.order_by('-created_at', '-pk'))
+
+    def page(self, query=''):
+        paginator = KeysetPaginator(Testimonial.objects.all(), per_page=3)
+        return paginator.get_page(QueryDict(query))
+
+    def test_walks_forward_and_back_without_gaps(self):
+        first = self.page()
+        second = self.page(first.next_query)
+        third = self.page(second.next_query)
+
+        self.assertEqual(list(first) + list(second) + list(third), self.expected)
+        self.assertFalse(first.has_previous())
+        self.assertTrue(second.has_next())
+        self.assertFalse(third.has_next())
+        self.assertEqual(list(self.page(third.previous_query)), list(second))
+        self.assertEqual(list(self.page(first.last_query)), self.expected[-3:])
+
+    def test_keeps_filters_and_ignores_bad_cursor(self):
+        page = self.page('status=pending&after=not-a-cursor')
+
+        self.assertEqual(list(page), self.expected[:3])
+        self.assertIn('status=pending', page.next_query)
+        self.assertEqual(page.count_display, '7')
+
+
+@override_settings(ADMIN_BULK_CHUNK_SIZE=2, BACKGROUND_JOBS_ASYNC=False)
+class BulkOrderJobTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'adminpass')
+        self.orders = [
+            Order.objects.create(
+                email=f'buyer{i}@example.com', billing_first_name='Buyer', billing_last_name=str(i),
+                billing_address_1='x', billing_city='y', billing_state='z', billing_postal_code='1',
+                billing_phone='1', shipping_first_name='Buyer', shipping_last_name=str(i),
+                shipping_address_1='x', shipping_city='y', shipping_state='z', shipping_postal_code='1',
+                subtotal=1, total=1,
+            )
+            for i in range(5)
+        ]
+        self.order_ids = [order.id for order in self.orders]
+
+    def test_view_queues_job_and_reports_progress(self):
+        self.client.force_login(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('admin_panel:orders_bulk_action'),
+                json.dumps({
+                    'action': 'update_status', 'new_status': 'shipped', 'notify_customers': True,
+                    'order_ids': self.order_ids, 'admin_password': 'adminpass',
+                }),
+                content_type='application/json',
+            )
+        status = self.client.get(response.json()['status_url']).json()
+
+        self.assertEqual(status['status'], 'completed')
+        self.assertEqual((status['processed'], status['affected'], status['emails_sent']), (5, 5, 5))
+        self.assertEqual(Order.objects.filter(status='shipped').count(), 5)
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_delete_runs_in_chunks_and_honours_cancel(self):
+        job = BulkOrderJob.objects.create(action='delete', order_ids=self.order_ids, total=5)
+        BulkOrderJob.objects.filter(pk=job.pk).update(processed=2)
+        run_bulk_order_job(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed, job.affected), ('completed', 5, 3))
+        self.assertEqual(Order.objects.count(), 2)
+
+        cancelled = BulkOrderJob.objects.create(
+            action='delete', order_ids=self.order_ids[:2], total=2, cancel_requested=True,
+        )
+        run_bulk_order_job(cancelled.id)
+        cancelled.refresh_from_db()
+        self.assertEqual((cancelled.status, cancelled.processed), ('cancelled', 0))
+        self.assertEqual(Order.objects.count(), 2)
+
+
+class SiteSettingsTests(TestCase):
+    def setUp(self):
+        site_settings.reset()
+        self.addCleanup(site_settings.reset)
+
+    def test_reads_are_served_from_memory(self):
+        AdminSettings.objects.create(key='free_shipping_threshold', value='80000')
+        self.assertEqual(site_settings.get_decimal('free_shipping_threshold'), Decimal('80000'))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(site_settings.shipping_cost(Decimal('60000')), Decimal('5000'))
+            self.assertEqual(site_settings.shipping_cost(Decimal('60000'), 'Kenya'), Decimal('15000'))
+            self.assertEqual(site_settings.tax_amount(Decimal('60000')), 0)
+            self.assertTrue(site_settings.get_bool('enable_standard_shipping', True))
+            self.assertEqual(site_settings.get_int('missing', 7), 7)
+
+    def test_save_elsewhere_reloads_after_version_change(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            site_settings.save_values({'enable_tax': True, 'vat_rate': Decimal('18')})
+        self.assertEqual(site_settings.tax_amount(Decimal('1000'), Decimal('500')), Decimal('180.00'))
+
+        # Another worker changes a row and bumps the shared version.
+        AdminSettings.objects.filter(key='vat_rate').update(value='10')
+        cache.set(site_settings.VERSION_KEY, 'other-worker')
+        with override_settings(ADMIN_SETTINGS_CHECK_INTERVAL=0):
+            self.assertEqual(site_settings.tax_amount(Decimal('1000')), Decimal('100.00'))
+
+    def test_admin_tax_page_saves_settings(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'adminpass')
+        self.client.force_login(admin)
+        url = reverse('admin_panel:tax_settings')
+
+        response = self.client.post(url, {'vat_rate': 'abc'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(AdminSettings.objects.exists())
+
+        response = self.client.post(url, {'enable_tax': 'on', 'vat_rate': '16', 'tax_name': 'VAT'})
+        self.assertRedirects(response, url)
+        self.assertTrue(site_settings.get_bool('enable_tax'))
+        self.assertEqual(self.client.get(url).context['settings']['vat_rate'], Decimal('16'))
+
+
+class ChatbotManagementTests(TestCase):
+    def setUp(self):
+        llm.reset()
+        self.addCleanup(llm.reset)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'adminpass'))
+
+    def test_shows_breaker_state_and_latency(self):
+        cache.set(llm.LATENCY_KEY, [120, 340, 900])
+        llm.record_failure('timeout')
+
+        response = self.client.get(reverse('admin_panel:chatbot_management'))
+
+        self.assertEqual(response.context['llm_status']['state'], 'closed')
+        self.assertEqual(response.context['llm_status']['failures'], 1)
+        self.assertContains(response, '340ms / 900ms / 900ms')
+
+    def test_reset_breaker(self):
+        for _ in range(settings.LLM_FAILURE_THRESHOLD):
+            llm.record_failure('timeout')
+        self.assertEqual(llm.state(), 'open')
+
+        self.client.post(reverse('admin_panel:chatbot_management'), {'reset_breaker': '1'})
+
+        self.assertEqual(llm.state(), 'closed')
+
+
+class ProductAdminListTests(TestCase):
+    def test_list_and_export_use_projections(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'adminpass'))
+        category = Category.objects.create(name='Sea Moss', slug='sea-moss')
+        product = Product.objects.create(
+            name='Gold Gel', name_sw='Jeli ya Dhahabu', slug='gold-gel', category=category,
+            price='25000', description='Smooth gel.',
+        )
+        ProductImage.objects.bulk_create([ProductImage(product=product, image='products/gold.jpg', is_primary=True)])
+        refresh_cover_image(product.id)
+
+        response = self.client.get(reverse('admin_panel:products_list'))
+        self.assertContains(response, '/media/products/gold.jpg')
+
+        response = self.client.get(reverse('admin_panel:products_export'), {'format': 'csv', 'language': 'sw'})
+        self.assertIn('Jeli ya Dhahabu', response.content.decode())
+
+
+class ProductStockFormTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'adminpass'))
+        category = Category.objects.create(name='Sea Moss', slug='sea-moss')
+        self.product = Product.objects.create(
+            name='Gold Gel', slug='gold-gel', sku='GOLD-1', category=category, price='25000', description='Gel.',
+        )
+        inventory.count(self.product, 5, kind='receipt')
+        self.url = reverse('admin_panel:product_edit', args=[self.product.id])
+
+    def post(self, stock, loaded, **changes):
+        data = {
+            'name': 'Gold Gel', 'category': self.product.category_id, 'product_type': 'gel',
+            'description': 'Gel.', 'price': '25000', 'sku': 'GOLD-1', 'origin': 'Zanzibar', 'is_active': 'on',
+            'track_inventory': 'on', 'stock_quantity': stock, 'initial-stock_quantity': loaded, **changes,
+        }
+        return self.client.post(self.url, data)
+
+    def test_edit_without_stock_change_leaves_the_ledger_alone(self):
+        # Loaded with 5 on hand, then a sale and a reservation happen before saving.
+        inventory.record('sale', self.product, quantity=-2)
+        inventory.record('reservation', self.product, reserved=1)
+        movements = StockMovement.objects.count()
+
+        response = self.post(5, 5, price='30000')
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(StockMovement.objects.count(), movements)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.price, 30000)
+        self.assertEqual((self.product.stock_quantity, self.product.reserved_quantity), (3, 1))
+
+    def test_edited_stock_is_counted(self):
+        self.assertEqual(self.post(8, 5).status_code, 302)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 8)
+        self.assertEqual(StockMovement.objects.latest('id').quantity, 3)
+
+    def test_count_is_refused_when_stock_moved_since_loading(self):
+        inventory.record('sale', self.product, quantity=-2)
+
+        response = self.post(8, 5, price='30000')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('stock_quantity', response.context['form'].errors)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.price, self.product.stock_quantity), (25000, 3))
+
+
+@override_settings(LOW_STOCK_THRESHOLD=5)
+class NotificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'adminpass')
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'pass', is_staff=True)
+        User.objects.create_user('customer', 'customer@example.com', 'pass')
+        category = Category.objects.create(name='Sea Moss', slug='sea-moss')
+        self.product = Product.objects.create(
+            name='Gold Gel', slug='gold-gel', category=category, price='10', description='Gel.',
+        )
+
+    def record(self, kind, quantity):
+        with self.captureOnCommitCallbacks(execute=True):
+            inventory.record(kind, self.product, quantity=quantity)
+
+    def test_low_stock_alert_on_crossing_only(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            inventory.count(self.product, 8, kind='receipt')
+        self.record('sale', -2)
+        self.assertFalse(AdminNotification.objects.exists())
+
+        self.record('sale', -2)
+        self.record('sale', -1)
+        alerts = AdminNotification.objects.filter(notification_type='low_stock')
+        self.assertEqual(sorted(alerts.values_list('recipient__username', flat=True)), ['admin', 'staff'])
+
+        self.record('receipt', 10)
+        self.record('sale', -10)
+        self.assertEqual(list(alerts.values_list('occurrences', flat=True)), [2, 2])
+        self.assertIn('Only 3 left', alerts.first().message)
+
+    def test_low_stock_alert_waits_for_commit(self):
+        inventory.count(self.product, 6, kind='receipt')
+        alerts = AdminNotification.objects.filter(notification_type='low_stock')
+        with self.captureOnCommitCallbacks() as callbacks:
+            inventory.record('sale', self.product, quantity=-2)
+        self.assertFalse(alerts.exists())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(alerts.count(), 2)
+
+    def test_failing_low_stock_alert_keeps_the_sale(self):
+        inventory.count(self.product, 6, kind='receipt')
+        with patch.object(notifications, 'notify', side_effect=RuntimeError('down')), self.assertLogs('django', 'ERROR'):
+            with self.captureOnCommitCallbacks(execute=True):
+                inventory.record('sale', self.product, quantity=-2)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 4)
+
+    def test_new_orders_coalesce_per_recipient(self):
+        orders = AdminNotification.objects.filter(notification_type='order')
+        for i in range(3):
+            with self.captureOnCommitCallbacks(execute=True):
+                Order.objects.create(
+                    email=f'buyer{i}@example.com', billing_first_name='Buyer', billing_last_name=str(i),
+                    billing_address_1='x', billing_city='y', billing_state='z', billing_postal_code='1',
+                    billing_phone='1', shipping_first_name='Buyer', shipping_last_name=str(i),
+                    shipping_address_1='x', shipping_city='y', shipping_state='z', shipping_postal_code='1',
+                    subtotal=1, total=1,
+                )
+                # Sent once the order is committed, not inside its transaction.
+                self.assertEqual(orders.count(), 0 if i == 0 else 2)
+        self.assertEqual(orders.count(), 2)
+        self.assertEqual(set(orders.values_list('occurrences', flat=True)), {3})
+        notification = orders.get(recipient=self.admin)
+        self.assertEqual(notification.title, '3 new orders')
+        self.assertEqual(notification.message, '3 orders are waiting to be processed.')
+        self.assertEqual(notification.link, reverse('admin_panel:orders_list') + '?status=pending')
+
+        notifications.mark_read(self.staff)
+        notifications.order_placed('CC00000099', 'late@example.com', 5)
+        self.assertEqual(orders.filter(recipient=self.staff).count(), 2)
+        self.assertEqual(orders.filter(recipient=self.staff).first().title, 'New order CC00000099')
+        self.assertEqual(orders.get(recipient=self.admin).title, '4 new orders')
+
+    def test_unread_count_is_cached_and_mark_all_is_one_update(self):
+        notifications.notify('system', 'One', 'First')
+        notifications.notify('system', 'Two', 'Second')
+        self.assertEqual(notifications.unread_count(self.admin), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(notifications.unread_count(self.admin), 2)
+
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('admin_panel:notifications_list'))
+        self.assertContains(response, 'Second')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(1):
+                notifications.mark_read(self.admin)
+        self.assertEqual(notifications.unread_count(self.admin), 0)
+        self.assertEqual(notifications.unread_count(self.staff), 2)
+
+
+@override_settings(AUDIT_LOG_BUFFER_SIZE=3, AUDIT_LOG_FLUSH_INTERVAL=60)
+class AuditLogTests(TestCase):
+    def setUp(self):
+        audit.flush()
+        self.addCleanup(audit.flush)
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'adminpass')
+
+    def test_entries_are_written_in_batches(self):
+        with self.assertNumQueries(0):
+            audit.log(self.admin, 'update', 'Product', 1)
+            audit.log(self.admin, 'update', 'Product', 2)
+        self.assertEqual(audit.pending(), 2)
+        logged_at = timezone.now()
+
+        with self.assertNumQueries(1):
+            audit.log(self.admin, 'delete', 'Order', 3)
+        self.assertEqual(audit.pending(), 0)
+        self.assertEqual(
+            list(AdminActivityLog.objects.values_list('object_id', flat=True)), ['3', '2', '1'],
+        )
+        self.assertLessEqual(AdminActivityLog.objects.get(object_id='1').timestamp, logged_at)
+
+    def test_request_end_flushes_old_entries(self):
+        self.client.force_login(self.admin)
+        audit.log(self.admin, 'export', 'Order')
+        self.client.get(reverse('admin_panel:notifications_list'))
+        self.assertEqual(audit.pending(), 1)
+
+        with patch.object(audit.time, 'monotonic', return_value=audit.time.monotonic() + 61):
+            self.client.get(reverse('admin_panel:notifications_list'))
+        self.assertEqual(audit.pending(), 0)
+        self.assertTrue(AdminActivityLog.objects.filter(action='export').exists())
+
+    def test_request_that_logged_flushes_when_it_finishes(self):
+        audit.log(self.admin, 'export', 'Order')  # outside a request: batched
+        audit.request_started()
+        audit.log(self.admin, 'update', 'Product', 1)
+        self.assertEqual(audit.pending(), 2)
+
+        with self.assertNumQueries(1):
+            audit.request_finished()
+        self.assertEqual(audit.pending(), 0)
+        self.assertEqual(AdminActivityLog.objects.count(), 2)
+
+        audit.request_started()
+        with self.assertNumQueries(0):
+            audit.request_finished()
+
+    def test_prune_archives_old_entries(self):
+        for i in range(1, 6):
+            audit.log(self.admin, 'view', 'Product', i)
+        audit.flush()
+        AdminActivityLog.objects.filter(object_id__in=['1', '2', '3']).update(
+            timestamp=timezone.now() - timedelta(days=400),
+        )
+        archive = os.path.join(tempfile.mkdtemp(), 'activity.jsonl.gz')
+
+        self.assertEqual(audit.prune(timezone.now() - timedelta(days=180), batch_size=2, archive=archive), 3)
+        with gzip.open(archive, 'rt') as stream:
+            self.assertEqual(sorted(json.loads(line)['object_id'] for line in stream), ['1', '2', '3'])
+        self.assertEqual(AdminActivityLog.objects.count(), 2)
+
+    def test_activity_log_view_filters(self):
+        audit.log(self.admin, 'approve', 'Testimonial', 7)
+        audit.log(self.admin, 'delete', 'Order', 8)
+        audit.flush()
+        self.client.force_login(self.admin)
+
+        response = self.client.get(reverse('admin_panel:activity_logs'), {'action': 'approve'})
+        self.assertEqual([log.object_id for log in response.context['logs']], ['7'])
@@ -37,6 +37,8 @@ urlpatterns = [
     path('orders/export/', views.orders_export, name='orders_export'),
     path('orders/<int:order_id>/update-status/', views.order_update_status, name='order_update_status'),
     path('orders/bulk-action/', views.orders_bulk_action, name='orders_bulk_action'),
+    path('orders/bulk-jobs/<int:job_id>/', views.orders_bulk_job_status, name='orders_bulk_job_status'),
+    path('orders/bulk-jobs/<int:job_id>/cancel/', views.orders_bulk_job_cancel, name='orders_bulk_job_cancel'),
 
     # Testimonials
     path('testimonials/', views.testimonials_list, name='testimonials_list'),
@@ -48,6 +50,7 @@ urlpatterns = [
     # Newsletter
     path('newsletter/', views.newsletter_list, name='newsletter_list'),
     path('newsletter/export/', views.newsletter_export, name='newsletter_export'),
+    path('newsletter/import/', views.newsletter_import, name='newsletter_import'),
     path('newsletter/subscribers/<int:subscriber_id>/activate/', views.newsletter_subscriber_activate, name='newsletter_subscriber_activate'),
     path('newsletter/subscribers/<int:subscriber_id>/deactivate/', views.newsletter_subscriber_deactivate, name='newsletter_subscriber_deactivate'),
     path('newsletter/subscribers/<int:subscriber_id>/delete/', views.newsletter_subscriber_delete, name='newsletter_subscriber_delete'),
@@ -65,6 +68,9 @@ urlpatterns = [
     path('chatbot/sessions/', views.chatbot_sessions, name='chatbot_sessions'),
     path('chatbot/management/', views.chatbot_management, name='chatbot_management'),
 
+    # Activity log
+    path('activity-logs/', views.activity_logs, name='activity_logs'),
+
     # Notifications
     path('notifications/', views.notifications_list, name='notifications_list'),
     path('notifications/<int:notification_id>/mark-read/', views.notification_mark_read, name='notification_mark_read'),
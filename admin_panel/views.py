@@ -1,9 +1,11 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.contrib.auth import authenticate
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse, HttpResponse
 from django.core.paginator import Paginator
-from django.db.models import Q, Sum, Count, Avg
+from django.db import transaction
+from django.db.models import F, Q, Sum, Count, Avg
 from django.db.models.functions import TruncDate
 from django.utils import timezone
 from django.conf import settings
@@ -21,15 +23,24 @@ from decimal import Decimal
 from datetime import datetime, timedelta
 
 # Import models
+from shop import inventory
 from shop.models import Product, Category, ProductReview
 from cart.models import Order, OrderItem
+from cart.search import search_orders
 from accounts.models import UserProfile
 from testimonials.models import Testimonial
+from newsletter.delivery import deliver_campaign
+from newsletter.importer import import_subscribers
 from newsletter.models import Newsletter, EmailCampaign
+from chatbot import llm
 from chatbot.models import ChatbotFAQ, QuickResponse, ChatSession
 
 # Import decorators
 from .decorators import admin_required
+from .jobs import run_bulk_order_job, start_job
+from .models import AdminActivityLog, AdminNotification, BulkOrderJob
+from .pagination import paginate_keyset
+from . import notifications, site_settings
 
 logger = logging.getLogger(__name__)
 
@@ -49,11 +60,8 @@ def dashboard(request):
     # Recent orders
     recent_orders = Order.objects.select_related('user').order_by('-created_at')[:10]
 
-    # Low stock products
-    low_stock_products = Product.objects.filter(
-        track_inventory=True,
-        stock_quantity__lte=10
-    ).order_by('stock_quantity')[:10]
+    # Low stock products and variants
+    low_stock_products = inventory.low_stock()
 
     # Pending orders
     pending_orders = Order.objects.filter(
@@ -112,7 +120,7 @@ def products_list(request):
     """Display list of products in admin panel."""
 
     # Get all products
-    products = Product.objects.all()
+    products = Product.objects.for_card()
 
     # Apply filters
     search_query = request.GET.get('search', '')
@@ -138,7 +146,10 @@ def products_list(request):
         elif status_filter == 'featured':
             products = products.filter(is_featured=True)
         elif status_filter == 'low_stock':
-            products = products.filter(stock_quantity__lte=10)
+            products = products.filter(
+                track_inventory=True,
+                stock_quantity__lte=F('reserved_quantity') + settings.LOW_STOCK_THRESHOLD,
+            )
 
     # Apply sorting
     valid_sort_fields = [
@@ -162,6 +173,7 @@ def products_list(request):
         'search_query': search_query,
         'category_filter': category_filter,
         'status_filter': status_filter,
+        'low_stock_threshold': settings.LOW_STOCK_THRESHOLD,
         'sort_by': sort_by,
     }
 
@@ -193,7 +205,13 @@ def product_add(request):
     if request.method == 'POST':
         form = ProductForm(request.POST, request.FILES)
         if form.is_valid():
-            product = form.save()
+            with transaction.atomic():
+                product = form.save()
+                if 'stock_quantity' in form.changed_data and form.cleaned_data['stock_quantity']:
+                    inventory.count(
+                        product, form.cleaned_data['stock_quantity'], user=request.user,
+                        kind='receipt', note='Opening stock',
+                    )
             messages.success(request, f'Product "{product.name}" added successfully.')
             return redirect('admin_panel:products_list')
     else:
@@ -219,9 +237,26 @@ def product_edit(request, product_id):
     if request.method == 'POST':
         form = ProductForm(request.POST, request.FILES, instance=product)
         if form.is_valid():
-            product = form.save()
-            messages.success(request, f'Product "{product.name}" updated successfully.')
-            return redirect('admin_panel:products_list')
+            # Only a stock figure the admin actually edited is recorded as a count,
+            # and only if nothing moved the stock since the page was loaded.
+            counted = form.cleaned_data['stock_quantity']
+            stock_changed = 'stock_quantity' in form.changed_data and counted is not None
+            with transaction.atomic():
+                locked = Product.objects.select_for_update().filter(pk=product.pk)
+                # form.save() writes the cached totals back, so take them from the locked row.
+                current, product.reserved_quantity = locked.values_list('stock_quantity', 'reserved_quantity').get()
+                product.stock_quantity = current
+                conflict = stock_changed and current != form.loaded_stock_quantity()
+                if not conflict:
+                    product = form.save()
+                    if stock_changed:
+                        inventory.count(product, counted, user=request.user, note='Stock count from product form')
+            if not conflict:
+                messages.success(request, f'Product "{product.name}" updated successfully.')
+                return redirect('admin_panel:products_list')
+            error = f'Stock on hand changed to {current} since this page was loaded. Check the count and save again.'
+            form.add_error('stock_quantity', error)
+            messages.error(request, error)
     else:
         form = ProductForm(instance=product)
 
@@ -280,43 +315,40 @@ def payment_settings(request):
     return render(request, 'admin_panel/payment_settings.html')
 
 
-@admin_required
-def shipping_settings(request):
-    """Display shipping settings page."""
-    return render(request, 'admin_panel/shipping_settings.html')
-
+def _settings_page(request, schema, template, url_name, label):
+    """Show and save one group of ``AdminSettings`` through the settings store."""
+    if request.method == 'POST':
+        try:
+            values = site_settings.parse_values(schema, request.POST)
+        except ValueError as e:
+            messages.error(request, str(e))
+        else:
+            site_settings.save_values(values)
+            messages.success(request, f'{label} settings updated successfully.')
+            return redirect(f'admin_panel:{url_name}')
 
-@admin_required
-def tax_settings(request):
-    """Display tax settings page."""
-    return render(request, 'admin_panel/tax_settings.html')
+    context = {
+        'settings': site_settings.get_values(schema),
+    }
+    return render(request, template, context)
 
 
 @admin_required
-def customers_list(request):
-    """Display list of customers."""
-    customers = UserProfile.objects.select_related('user').order_by('-created_at')
-
-    # Search functionality
-    search_query = request.GET.get('search', '')
-    if search_query:
-        customers = customers.filter(
-            Q(user__first_name__icontains=search_query) |
-            Q(user__last_name__icontains=search_query) |
-            Q(user__email__icontains=search_query) |
-            Q(phone__icontains=search_query)
-        )
+def shipping_settings(request):
+    """Display and update shipping settings."""
+    return _settings_page(
+        request, site_settings.SHIPPING_SETTINGS,
+        'admin_panel/settings/shipping_settings.html', 'shipping_settings', 'Shipping',
+    )
 
-    # Pagination
-    paginator = Paginator(customers, 20)
-    page = request.GET.get('page')
-    customers = paginator.get_page(page)
 
-    context = {
-        'customers': customers,
-        'search_query': search_query,
-    }
-    return render(request, 'admin_panel/customers/list.html', context)
+@admin_required
+def tax_settings(request):
+    """Display and update tax settings."""
+    return _settings_page(
+        request, site_settings.TAX_SETTINGS,
+        'admin_panel/settings/tax_settings.html', 'tax_settings', 'Tax',
+    )
 
 
 @admin_required
@@ -366,11 +398,11 @@ def customers_export(request):
 
 @admin_required
 def products_export(request):
-    """Export products to CSV or PDF."""
+    """Export products to CSV or PDF, with names in ``?language=`` (default: active language)."""
     format_type = request.GET.get('format', 'csv')
 
     # Get filtered products
-    products = Product.objects.all()
+    products = Product.objects.for_export(request.GET.get('language'))
 
     search_query = request.GET.get('search', '')
     category_filter = request.GET.get('category', '')
@@ -403,7 +435,7 @@ def products_export(request):
 
         for product in products:
             writer.writerow([
-                product.name,
+                product.display_name,
                 product.sku,
                 product.category.name if product.category else '',
                 product.price,
@@ -439,7 +471,7 @@ def products_export(request):
         for product in products:
             html += f"""
                     <tr>
-                        <td>{product.name}</td>
+                        <td>{product.display_name}</td>
                         <td>{product.sku}</td>
                         <td>{product.category.name if product.category else ''}</td>
                         <td>{product.price}</td>
@@ -532,9 +564,7 @@ def testimonials_list(request):
     if status_filter:
         testimonials = testimonials.filter(status=status_filter)
 
-    paginator = Paginator(testimonials, 20)
-    page = request.GET.get('page')
-    testimonials = paginator.get_page(page)
+    testimonials = paginate_keyset(request, testimonials)
 
     context = {
         'testimonials': testimonials,
@@ -603,9 +633,7 @@ def newsletter_list(request):
             Q(name__icontains=search_query)
         )
 
-    paginator = Paginator(subscribers, 20)
-    page = request.GET.get('page')
-    subscribers = paginator.get_page(page)
+    subscribers = paginate_keyset(request, subscribers, ordering_field='subscribed_at')
 
     context = {
         'subscribers': subscribers,
@@ -638,6 +666,32 @@ def newsletter_export(request):
     return response
 
 
+@admin_required
+def newsletter_import(request):
+    """Import newsletter subscribers from an uploaded CSV file."""
+    if request.method == 'POST':
+        upload = request.FILES.get('csv_file')
+        if not upload or not upload.name.lower().endswith('.csv'):
+            messages.error(request, 'Please choose a CSV file to import.')
+            return redirect('admin_panel:newsletter_import')
+
+        language = request.POST.get('language', 'en')
+        counts = import_subscribers(
+            upload.file,
+            activate=request.POST.get('activate') == 'on',
+            default_language=language if language in ('en', 'sw') else 'en',
+        )
+        logger.info(f"Newsletter import by {request.user.username}: {counts}")
+        messages.success(
+            request,
+            f"Imported {counts['accepted']:,} subscribers. Skipped {counts['duplicates']:,} "
+            f"duplicates and {counts['invalid']:,} invalid rows."
+        )
+        return redirect('admin_panel:newsletter_list')
+
+    return render(request, 'admin_panel/newsletter/import.html')
+
+
 @admin_required
 @require_POST
 def newsletter_subscriber_activate(request, subscriber_id):
@@ -739,19 +793,26 @@ def newsletter_campaign_delete(request, campaign_id):
 
 
 @admin_required
+@require_POST
 def newsletter_campaign_send(request, campaign_id):
-    """Send an email campaign."""
+    """Queue an email campaign for background delivery."""
     campaign = get_object_or_404(EmailCampaign, id=campaign_id)
 
-    if request.method == 'POST':
-        # Logic to send campaign
-        campaign.status = 'sent'
-        campaign.sent_at = timezone.now()
-        campaign.save()
-        messages.success(request, 'Campaign sent successfully.')
-        return redirect('admin_panel:newsletter_campaigns')
+    if campaign.status in ('sending', 'sent'):
+        return JsonResponse({
+            'success': False,
+            'message': f'Campaign is already {campaign.get_status_display().lower()}.',
+        }, status=400)
 
-    return redirect('admin_panel:newsletter_campaigns')
+    campaign.status = 'sending'
+    campaign.save(update_fields=['status', 'updated_at'])
+    start_job(deliver_campaign, campaign.id)
+    logger.info(f"Campaign {campaign.id} queued for delivery by {request.user.username}")
+
+    return JsonResponse({
+        'success': True,
+        'message': 'Campaign is being sent in the background.',
+    })
 
 
 @admin_required
@@ -787,11 +848,8 @@ def chatbot_quick_responses(request):
 @admin_required
 def chatbot_sessions(request):
     """Display chatbot sessions."""
-    sessions = ChatSession.objects.all().order_by('-created_at')
-
-    paginator = Paginator(sessions, 20)
-    page = request.GET.get('page')
-    sessions = paginator.get_page(page)
+    sessions = ChatSession.objects.select_related('user')
+    sessions = paginate_keyset(request, sessions, ordering_field='started_at')
 
     context = {
         'sessions': sessions,
@@ -801,21 +859,74 @@ def chatbot_sessions(request):
 
 @admin_required
 def chatbot_management(request):
-    """Display chatbot management page."""
-    return render(request, 'admin_panel/chatbot/management.html')
+    """Display chatbot management page with the LLM circuit breaker status."""
+    if request.method == 'POST' and 'reset_breaker' in request.POST:
+        llm.reset()
+        messages.success(request, 'LLM circuit breaker reset.')
+        return redirect('admin_panel:chatbot_management')
+
+    context = {
+        'recent_sessions': ChatSession.objects.select_related('user').order_by('-started_at')[:10],
+        'llm_status': llm.status(),
+    }
+    return render(request, 'admin_panel/chatbot/management.html', context)
+
+
+ACTIVITY_LOG_MODELS = [
+    ('Product', 'Products'),
+    ('Order', 'Orders'),
+    ('User', 'Users'),
+    ('Testimonial', 'Testimonials'),
+    ('Newsletter', 'Newsletter'),
+]
+
+
+@admin_required
+def activity_logs(request):
+    """Browse the admin activity log, newest first."""
+    logs = AdminActivityLog.objects.select_related('user')
+
+    action_filter = request.GET.get('action', '')
+    model_filter = request.GET.get('model', '')
+    user_filter = request.GET.get('user', '').strip()
+    if action_filter:
+        logs = logs.filter(action=action_filter)
+    if model_filter:
+        logs = logs.filter(model_name=model_filter)
+    if user_filter:
+        logs = logs.filter(user__username=user_filter)
+
+    logs = paginate_keyset(request, logs, ordering_field='timestamp', per_page=50)
+
+    context = {
+        'logs': logs,
+        'action_choices': AdminActivityLog.ACTION_TYPES,
+        'model_choices': ACTIVITY_LOG_MODELS,
+        'action_filter': action_filter,
+        'model_filter': model_filter,
+        'user_filter': user_filter,
+    }
+    return render(request, 'admin_panel/activity_logs/index.html', context)
 
 
 @admin_required
 def notifications_list(request):
-    """Display notifications."""
-    return render(request, 'admin_panel/notifications.html')
+    """Display the current user's notifications, newest first."""
+    page = paginate_keyset(
+        request, AdminNotification.objects.filter(recipient=request.user), ordering_field='last_event_at',
+    )
+
+    context = {
+        'notifications': page,
+    }
+    return render(request, 'admin_panel/notifications.html', context)
 
 
 @admin_required
 @require_POST
 def notification_mark_read(request, notification_id):
     """Mark a notification as read."""
-    # Implementation depends on your notification model
+    notifications.mark_read(request.user, notification_id)
     messages.success(request, 'Notification marked as read.')
     return redirect('admin_panel:notifications_list')
 
@@ -824,8 +935,8 @@ def notification_mark_read(request, notification_id):
 @require_POST
 def notifications_mark_all_read(request):
     """Mark all notifications as read."""
-    # Implementation depends on your notification model
-    messages.success(request, 'All notifications marked as read.')
+    count = notifications.mark_read(request.user)
+    messages.success(request, f'{count} notification(s) marked as read.')
     return redirect('admin_panel:notifications_list')
 
 
@@ -859,12 +970,6 @@ def analytics_products(request):
     return render(request, 'admin_panel/analytics_products.html')
 
 
-@admin_required
-def tax_settings(request):
-    """Display tax settings page."""
-    return render(request, 'admin_panel/tax_settings.html')
-
-
 @admin_required
 def customers_list(request):
     """Display list of customers."""
@@ -880,10 +985,8 @@ def customers_list(request):
             Q(phone__icontains=search_query)
         )
 
-    # Pagination
-    paginator = Paginator(customers, 20)
-    page = request.GET.get('page')
-    customers = paginator.get_page(page)
+    # Keyset pagination
+    customers = paginate_keyset(request, customers)
 
     context = {
         'customers': customers,
@@ -937,105 +1040,6 @@ def customers_export(request):
     return response
 
 
-@admin_required
-def products_export(request):
-    """Export products to CSV or PDF."""
-    format_type = request.GET.get('format', 'csv')
-
-    # Get filtered products
-    products = Product.objects.all()
-
-    search_query = request.GET.get('search', '')
-    category_filter = request.GET.get('category', '')
-    status_filter = request.GET.get('status', '')
-
-    if search_query:
-        products = products.filter(
-            Q(name__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(sku__icontains=search_query)
-        )
-
-    if category_filter:
-        products = products.filter(category_id=category_filter)
-
-    if status_filter:
-        if status_filter == 'active':
-            products = products.filter(is_active=True)
-        elif status_filter == 'inactive':
-            products = products.filter(is_active=False)
-
-    if format_type == 'csv':
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="products.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow([
-            'Name', 'SKU', 'Category', 'Price', 'Stock', 'Status', 'Created At'
-        ])
-
-        for product in products:
-            writer.writerow([
-                product.name,
-                product.sku,
-                product.category.name if product.category else '',
-                product.price,
-                product.stock_quantity,
-                'Active' if product.is_active else 'Inactive',
-                product.created_at.strftime('%Y-%m-%d')
-            ])
-
-        return response
-
-    elif format_type == 'pdf':
-        # For PDF export, we'll use a simple HTML response
-        html = f"""
-        <html>
-        <head><title>Products Report</title></head>
-        <body>
-            <h1>Products Report</h1>
-            <table border="1" style="border-collapse: collapse; width: 100%;">
-                <thead>
-                    <tr>
-                        <th>Name</th>
-                        <th>SKU</th>
-                        <th>Category</th>
-                        <th>Price</th>
-                        <th>Stock</th>
-                        <th>Status</th>
-                        <th>Created At</th>
-                    </tr>
-                </thead>
-                <tbody>
-        """
-
-        for product in products:
-            html += f"""
-                    <tr>
-                        <td>{product.name}</td>
-                        <td>{product.sku}</td>
-                        <td>{product.category.name if product.category else ''}</td>
-                        <td>{product.price}</td>
-                        <td>{product.stock_quantity}</td>
-                        <td>{'Active' if product.is_active else 'Inactive'}</td>
-                        <td>{product.created_at.strftime('%Y-%m-%d')}</td>
-                    </tr>
-            """
-
-        html += """
-                </tbody>
-            </table>
-        </body>
-        </html>
-        """
-
-        response = HttpResponse(html, content_type='text/html')
-        response['Content-Disposition'] = 'attachment; filename="products.html"'
-        return response
-
-    return redirect('admin_panel:products_list')
-
-
 @admin_required
 @require_POST
 def products_bulk_update(request):
@@ -1103,15 +1107,7 @@ def orders_list(request):
     # Search functionality
     search_query = request.GET.get('search', '')
     if search_query:
-        orders = orders.filter(
-            Q(order_number__icontains=search_query) |
-            Q(user__first_name__icontains=search_query) |
-            Q(user__last_name__icontains=search_query) |
-            Q(user__email__icontains=search_query) |
-            Q(billing_first_name__icontains=search_query) |
-            Q(billing_last_name__icontains=search_query) |
-            Q(billing_email__icontains=search_query)
-        )
+        orders = search_orders(orders, search_query)
 
     # Filter by status
     status_filter = request.GET.get('status', '')
@@ -1130,10 +1126,8 @@ def orders_list(request):
             start_date = timezone.now() - timedelta(days=30)
             orders = orders.filter(created_at__gte=start_date)
 
-    # Pagination
-    paginator = Paginator(orders, 20)
-    page = request.GET.get('page')
-    orders = paginator.get_page(page)
+    # Keyset pagination
+    orders = paginate_keyset(request, orders)
 
     context = {
         'orders': orders,
@@ -1148,14 +1142,18 @@ def orders_list(request):
 @require_POST
 @csrf_exempt
 def orders_bulk_action(request):
-    """Handle bulk actions on orders with admin password confirmation."""
+    """Queue a bulk action on orders as a chunked background job, with admin password confirmation."""
     try:
         data = json.loads(request.body)
         action = data.get('action')
-        order_ids = data.get('order_ids', [])
         admin_password = data.get('admin_password')
 
-        logger.info(f"Bulk action request received: action={action}, order_ids={order_ids}")
+        try:
+            order_ids = sorted({int(order_id) for order_id in data.get('order_ids', [])})
+        except (TypeError, ValueError):
+            return JsonResponse({'error': 'Invalid order IDs.'}, status=400)
+
+        logger.info(f"Bulk action request received: action={action}, orders={len(order_ids)}")
 
         # Verify admin password
         user = authenticate(username=request.user.username, password=admin_password)
@@ -1163,63 +1161,77 @@ def orders_bulk_action(request):
             logger.warning("Invalid admin password for bulk action")
             return JsonResponse({'error': 'Invalid admin password.'}, status=403)
 
-        orders = Order.objects.filter(id__in=order_ids)
-
-        if action == 'delete':
-            count, _ = orders.delete()
-            logger.info(f"Deleted {count} orders")
-            return JsonResponse({'success': True, 'message': f'{count} orders deleted.'})
+        if not order_ids:
+            return JsonResponse({'error': 'No orders selected.'}, status=400)
 
-        elif action == 'update_status':
+        params = {}
+        if action == 'update_status':
             new_status = data.get('new_status')
             if new_status not in ['pending', 'processing', 'shipped', 'delivered', 'cancelled']:
                 logger.warning(f"Invalid status value: {new_status}")
                 return JsonResponse({'error': 'Invalid status value.'}, status=400)
-            orders.update(status=new_status)
-            logger.info("Order status updated")
-            return JsonResponse({'success': True, 'message': 'Order status updated.'})
+            params = {'new_status': new_status, 'notify_customers': bool(data.get('notify_customers'))}
 
         elif action == 'update_payment':
             new_payment_status = data.get('new_payment_status')
             if new_payment_status not in ['pending', 'paid', 'failed']:
                 logger.warning(f"Invalid payment status value: {new_payment_status}")
                 return JsonResponse({'error': 'Invalid payment status value.'}, status=400)
-            orders.update(payment_status=new_payment_status)
-            logger.info("Payment status updated")
-            return JsonResponse({'success': True, 'message': 'Payment status updated.'})
+            params = {'new_payment_status': new_payment_status}
 
-        else:
+        elif action != 'delete':
             logger.warning(f"Invalid action: {action}")
             return JsonResponse({'error': 'Invalid action.'}, status=400)
 
+        job = BulkOrderJob.objects.create(
+            action=action,
+            params=params,
+            order_ids=order_ids,
+            total=len(order_ids),
+            created_by=request.user,
+        )
+        start_job(run_bulk_order_job, job.id)
+
+        return JsonResponse({
+            'success': True,
+            'job_id': job.id,
+            'status_url': reverse('admin_panel:orders_bulk_job_status', args=[job.id]),
+            'cancel_url': reverse('admin_panel:orders_bulk_job_cancel', args=[job.id]),
+            'message': f'{job.get_action_display()} queued for {job.total} orders.',
+        })
+
     except Exception as e:
         logger.error(f"Error in bulk action: {str(e)}")
         return JsonResponse({'error': str(e)}, status=500)
 
-    # Filter by date
-    date_filter = request.GET.get('date', '')
-    if date_filter:
-        if date_filter == 'today':
-            orders = orders.filter(created_at__date=timezone.now().date())
-        elif date_filter == 'week':
-            start_date = timezone.now() - timedelta(days=7)
-            orders = orders.filter(created_at__gte=start_date)
-        elif date_filter == 'month':
-            start_date = timezone.now() - timedelta(days=30)
-            orders = orders.filter(created_at__gte=start_date)
 
-    # Pagination
-    paginator = Paginator(orders, 20)
-    page = request.GET.get('page')
-    orders = paginator.get_page(page)
+@admin_required
+def orders_bulk_job_status(request, job_id):
+    """Report progress of a bulk order job for polling."""
+    job = get_object_or_404(BulkOrderJob, id=job_id)
+    return JsonResponse({
+        'id': job.id,
+        'action': job.action,
+        'status': job.status,
+        'total': job.total,
+        'processed': job.processed,
+        'affected': job.affected,
+        'emails_sent': job.emails_sent,
+        'progress': job.progress_percent,
+        'finished': job.is_finished,
+        'error': job.error,
+    })
 
-    context = {
-        'orders': orders,
-        'search_query': search_query,
-        'status_filter': status_filter,
-        'date_filter': date_filter,
-    }
-    return render(request, 'admin_panel/orders/list.html', context)
+
+@admin_required
+@require_POST
+def orders_bulk_job_cancel(request, job_id):
+    """Ask a running bulk order job to stop after its current chunk."""
+    job = get_object_or_404(BulkOrderJob, id=job_id)
+    if job.is_finished:
+        return JsonResponse({'error': 'Job has already finished.'}, status=400)
+    BulkOrderJob.objects.filter(id=job.id).update(cancel_requested=True)
+    return JsonResponse({'success': True, 'message': 'Cancellation requested.'})
 
 
 @admin_required
@@ -1287,12 +1299,12 @@ def send_invoice_email(request, order_id):
             subject,
             message,
             settings.DEFAULT_FROM_EMAIL,
-            [order.billing_email]
+            [order.email]
         )
         email.attach(f'invoice_{order.order_number}.pdf', pdf_content, 'application/pdf')
         email.send()
 
-        messages.success(request, f'Invoice email sent to {order.billing_email}')
+        messages.success(request, f'Invoice email sent to {order.email}')
         return JsonResponse({'success': True})
 
     except Exception as e:
@@ -1326,7 +1338,7 @@ def orders_export(request):
             order.order_number,
             order.created_at.strftime('%Y-%m-%d %H:%M:%S'),
             f"{order.billing_first_name} {order.billing_last_name}",
-            order.billing_email,
+            order.email,
             order.total,
             order.payment_status,
             order.payment_method,
@@ -1350,8 +1362,10 @@ def order_update_status(request, order_id):
         notes = request.POST.get('notes', '')
 
         if new_status:
-            order.payment_status = new_status
-            order.save()
+            with transaction.atomic():
+                order.payment_status = new_status
+                order.save()
+                inventory.sync_order(order)
 
         if notes:
             order.notes = notes
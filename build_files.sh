@@ -3,8 +3,11 @@
 echo "Installing dependencies..."
 pip install -r requirements.txt
 
-echo "Collecting static files..."
-python manage.py collectstatic --noinput --clear
+echo "Collecting, bundling, fingerprinting and compressing static files..."
+STATIC_BUNDLED=True python manage.py collectstatic --noinput --clear
+
+echo "Compiling templates..."
+python manage.py compile_templates
 
 echo "Running migrations..."
 python manage.py migrate --noinput
@@ -0,0 +1,60 @@
+"""
+Client address of a request.
+
+Forwarding headers are only as trustworthy as whoever set them. They are
+read only when the request comes straight from one of ``TRUSTED_PROXIES``
+(addresses or networks such as ``172.16.0.0/12``); anything else connecting
+directly, whether bare gunicorn, a platform router that passes the headers
+through, or a client, is identified by ``REMOTE_ADDR``.
+
+Behind a trusted proxy, ``X-Real-IP`` is used first: nginx sets it from its
+own ``$remote_addr`` (see ``nginx.conf``), replacing anything the client
+sent. Otherwise the ``X-Forwarded-For`` chain is read from the right: each
+proxy appends the address it received the request from, so the rightmost
+hop that is not a trusted proxy is the client as far as our own proxies can
+tell. The leftmost entries are whatever the client chose to send.
+"""
+
+import functools
+import ipaddress
+
+from django.conf import settings
+
+
+@functools.lru_cache(maxsize=8)
+def _networks(proxies):
+    networks = []
+    for proxy in proxies:
+        try:
+            networks.append(ipaddress.ip_network(proxy, strict=False))
+        except ValueError:
+            pass
+    return tuple(networks)
+
+
+def is_trusted_proxy(address):
+    """Whether ``address`` is one of ``TRUSTED_PROXIES``."""
+    try:
+        address = ipaddress.ip_address((address or '').strip())
+    except ValueError:
+        return False
+    networks = _networks(tuple(getattr(settings, 'TRUSTED_PROXIES', ())))
+    return any(address in network for network in networks)
+
+
+def get_client_ip(request):
+    """Get client IP address"""
+    remote_addr = request.META.get('REMOTE_ADDR')
+    if not is_trusted_proxy(remote_addr):
+        return remote_addr
+
+    real_ip = request.META.get('HTTP_X_REAL_IP', '').strip()
+    if real_ip:
+        return real_ip
+
+    forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    hops = [hop.strip() for hop in forwarded_for.split(',') if hop.strip()]
+    for hop in reversed(hops):
+        if not is_trusted_proxy(hop):
+            return hop
+    return remote_addr
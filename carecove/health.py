@@ -1,128 +1,261 @@
-
 """
 Health check views for monitoring application status.
+
+The deep checks (database, cache, disk, static and media directories) and
+the operational stats (connection pool, queue depths, LLM circuit breaker)
+run at most once every ``HEALTH_CHECK_INTERVAL`` seconds per process, on a
+background thread when ``HEALTH_CHECK_BACKGROUND`` is on and otherwise on
+the first probe after the interval. Probes are answered from the last
+report, so load-balancer polling adds no database or cache traffic.
+
+* ``/health/live/`` only says the process is serving requests.
+* ``/health/ready/`` is 200 while the last report is healthy and no older
+  than ``HEALTH_CHECK_MAX_AGE`` seconds, 503 otherwise.
+* ``/health/`` returns the whole report; ``/health/simple/`` its status.
 """
 
 from django.http import JsonResponse
 from django.db import connections
 from django.core.cache import cache
 from django.conf import settings
-import time
+import logging
 import os
+import threading
+import time
 
+logger = logging.getLogger(__name__)
 
-def health_check(request):
-    """
-    Comprehensive health check endpoint.
-    
-    Returns:
-        JSON response with health status and system information
-    """
-    health_data = {
+STARTED_AT = time.time()
+
+_lock = threading.Lock()
+_state = {'pid': None, 'report': None, 'thread': None}
+
+
+def _interval():
+    return getattr(settings, 'HEALTH_CHECK_INTERVAL', 15)
+
+
+def _check_database():
+    with connections['default'].cursor() as cursor:
+        cursor.execute("SELECT 1")
+    return {'status': 'healthy'}
+
+
+def _check_cache():
+    if 'redis' not in str(getattr(settings, 'CACHES', {}).get('default', {})):
+        return {'status': 'not_configured'}
+    cache.set('health_check', 'ok', 10)
+    if cache.get('health_check') != 'ok':
+        raise Exception("Cache value mismatch")
+    return {'status': 'healthy'}
+
+
+def _check_disk():
+    try:
+        statvfs = os.statvfs('.')
+    except OSError as e:
+        return {'status': 'unknown', 'error': str(e)}
+    free_space = statvfs.f_frsize * statvfs.f_bavail
+    total_space = statvfs.f_frsize * statvfs.f_blocks
+    usage_percent = round(((total_space - free_space) / total_space) * 100, 2)
+    if usage_percent > 90:
+        return {'status': 'unhealthy', 'usage_percent': usage_percent, 'message': 'Disk usage above 90%'}
+    return {'status': 'healthy', 'usage_percent': usage_percent}
+
+
+def _check_directories():
+    checks = {}
+    static_root = getattr(settings, 'STATIC_ROOT', None)
+    if static_root and os.path.exists(static_root):
+        checks['static_files'] = {'status': 'healthy'}
+    else:
+        checks['static_files'] = {'status': 'warning', 'message': 'Static files not collected'}
+    media_root = getattr(settings, 'MEDIA_ROOT', None)
+    if media_root and os.path.exists(media_root):
+        checks['media_files'] = {'status': 'healthy'}
+    else:
+        checks['media_files'] = {'status': 'warning', 'message': 'Media directory not found'}
+    return checks
+
+
+def _pool_stats():
+    connection = connections['default']
+    if not connection.settings_dict.get('OPTIONS', {}).get('pool'):
+        return {
+            'enabled': False,
+            'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE', 0),
+            'conn_health_checks': connection.settings_dict.get('CONN_HEALTH_CHECKS', False),
+        }
+    return {'enabled': True, **connection.pool.get_stats()}
+
+
+def _queue_stats():
+    from admin_panel import audit
+    from admin_panel.models import BulkOrderJob
+    from newsletter.models import CampaignDelivery
+
+    return {
+        'admin_jobs': BulkOrderJob.objects.filter(status__in=['pending', 'running']).count(),
+        'newsletter_deliveries': CampaignDelivery.objects.filter(status='pending').count(),
+        'audit_log_buffer': audit.pending(),
+    }
+
+
+def _breaker_stats():
+    from chatbot import llm
+
+    return {'llm': llm.status()}
+
+
+CHECKS = (('database', _check_database), ('cache', _check_cache), ('disk', _check_disk))
+STATS = (('pool', _pool_stats), ('queues', _queue_stats), ('circuit_breakers', _breaker_stats))
+
+
+def run_checks():
+    """Run every check now and return the report."""
+    started = time.perf_counter()
+    report = {
         'status': 'healthy',
         'timestamp': int(time.time()),
         'version': '1.0.0',
         'environment': 'production' if not settings.DEBUG else 'development',
-        'checks': {}
+        'checks': {},
+        'stats': {},
     }
-    
-    # Database health check
-    try:
-        db_conn = connections['default']
-        with db_conn.cursor() as cursor:
-            cursor.execute("SELECT 1")
-            health_data['checks']['database'] = {'status': 'healthy'}
-    except Exception as e:
-        health_data['status'] = 'unhealthy'
-        health_data['checks']['database'] = {
-            'status': 'unhealthy',
-            'error': str(e)
-        }
-    
-    # Cache health check (if Redis is configured)
-    try:
-        if hasattr(settings, 'CACHES') and 'redis' in str(settings.CACHES.get('default', {})):
-            cache.set('health_check', 'ok', 10)
-            cache_value = cache.get('health_check')
-            if cache_value == 'ok':
-                health_data['checks']['cache'] = {'status': 'healthy'}
-            else:
-                raise Exception("Cache value mismatch")
-        else:
-            health_data['checks']['cache'] = {'status': 'not_configured'}
-    except Exception as e:
-        health_data['status'] = 'unhealthy'
-        health_data['checks']['cache'] = {
-            'status': 'unhealthy',
-            'error': str(e)
-        }
-    
-    # Disk space check
-    try:
-        statvfs = os.statvfs('.')
-        free_space = statvfs.f_frsize * statvfs.f_avail
-        total_space = statvfs.f_frsize * statvfs.f_blocks
-        usage_percent = ((total_space - free_space) / total_space) * 100
-        
-        if usage_percent > 90:
-            health_data['status'] = 'unhealthy'
-            health_data['checks']['disk'] = {
-                'status': 'unhealthy',
-                'usage_percent': round(usage_percent, 2),
-                'message': 'Disk usage above 90%'
-            }
-        else:
-            health_data['checks']['disk'] = {
-                'status': 'healthy',
-                'usage_percent': round(usage_percent, 2)
-            }
-    except Exception as e:
-        health_data['checks']['disk'] = {
-            'status': 'unknown',
-            'error': str(e)
-        }
-    
-    # Application-specific checks
+
+    for name, check in CHECKS:
+        try:
+            report['checks'][name] = check()
+        except Exception as e:
+            report['checks'][name] = {'status': 'unhealthy', 'error': str(e)}
+        if report['checks'][name]['status'] == 'unhealthy':
+            report['status'] = 'unhealthy'
     try:
-        # Check if static files are accessible
-        static_root = getattr(settings, 'STATIC_ROOT', None)
-        if static_root and os.path.exists(static_root):
-            health_data['checks']['static_files'] = {'status': 'healthy'}
-        else:
-            health_data['checks']['static_files'] = {'status': 'warning', 'message': 'Static files not collected'}
-        
-        # Check if media directory exists
-        media_root = getattr(settings, 'MEDIA_ROOT', None)
-        if media_root and os.path.exists(media_root):
-            health_data['checks']['media_files'] = {'status': 'healthy'}
-        else:
-            health_data['checks']['media_files'] = {'status': 'warning', 'message': 'Media directory not found'}
-            
+        report['checks'].update(_check_directories())
     except Exception as e:
-        health_data['checks']['application'] = {
-            'status': 'unhealthy',
-            'error': str(e)
-        }
-    
-    # Set HTTP status code based on overall health
-    status_code = 200 if health_data['status'] == 'healthy' else 503
-    
-    return JsonResponse(health_data, status=status_code)
+        report['checks']['application'] = {'status': 'unhealthy', 'error': str(e)}
+
+    for name, collect in STATS:
+        try:
+            report['stats'][name] = collect()
+        except Exception as e:
+            report['stats'][name] = {'error': str(e)}
+
+    report['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return report
+
+
+def refresh():
+    """Replace the stored report with a fresh one."""
+    report = run_checks()
+    with _lock:
+        _state['report'] = report
+    if report['status'] != 'healthy':
+        logger.warning(f"Health check unhealthy: {report['checks']}")
+    return report
+
+
+def _monitor(delay):
+    time.sleep(delay)
+    while True:
+        try:
+            refresh()
+        except Exception as e:
+            logger.error(f"Health monitor failed: {e}")
+        finally:
+            # The thread keeps no connection open between runs.
+            connections.close_all()
+        time.sleep(_interval())
+
+
+def current():
+    """The latest report, refreshed when it is older than the interval.
+
+    With the background monitor, the first call in a process runs the checks
+    inline and starts the thread; later calls only read memory.
+    """
+    with _lock:
+        if _state['pid'] != os.getpid():
+            # Forked: the parent's thread and report do not carry over.
+            _state.update(pid=os.getpid(), report=None, thread=None)
+        report = _state['report']
+        start_thread = (
+            getattr(settings, 'HEALTH_CHECK_BACKGROUND', True)
+            and (_state['thread'] is None or not _state['thread'].is_alive())
+        )
+        if start_thread:
+            # Started under the lock: a thread that exists but has not started
+            # yet is not alive, so a concurrent first probe would start another.
+            _state['thread'] = threading.Thread(
+                target=_monitor, args=(_interval(),), name='health-monitor', daemon=True,
+            )
+            _state['thread'].start()
+
+    if start_thread:
+        if report is None:
+            # Answer the first probe with a real report; the thread takes over after one interval.
+            report = refresh()
+        return report
+    if report is None or time.time() - report['timestamp'] >= _interval():
+        report = refresh()
+    return report
+
+
+def reset():
+    """Forget the stored report so the next probe runs the checks."""
+    with _lock:
+        _state['report'] = None
+
+
+def _age(report):
+    return max(0, int(time.time()) - report['timestamp'])
+
+
+def health_check(request):
+    """
+    Comprehensive health check endpoint.
+
+    Returns:
+        JSON response with the latest health report and its age in seconds
+    """
+    report = current()
+    status_code = 200 if report['status'] == 'healthy' else 503
+    return JsonResponse({**report, 'age': _age(report)}, status=status_code)
 
 
 def simple_health_check(request):
     """
     Simple health check for load balancers.
-    
+
     Returns:
-        Plain text response for basic health monitoring
+        JSON response with the status of the latest health report
     """
-    try:
-        # Quick database check
-        db_conn = connections['default']
-        with db_conn.cursor() as cursor:
-            cursor.execute("SELECT 1")
-        
+    if current()['status'] == 'healthy':
         return JsonResponse({'status': 'ok'}, status=200)
-    except Exception:
-        return JsonResponse({'status': 'error'}, status=503)
+    return JsonResponse({'status': 'error'}, status=503)
+
+
+def liveness(request):
+    """
+    Liveness probe: the process is up and serving requests.
+
+    Returns:
+        JSON response with the process id and uptime; never touches I/O
+    """
+    return JsonResponse({'status': 'alive', 'pid': os.getpid(), 'uptime': int(time.time() - STARTED_AT)})
+
+
+def readiness(request):
+    """
+    Readiness probe: the latest health report is healthy and recent.
+
+    Returns:
+        JSON response with the report status and age; 503 when not ready
+    """
+    report = current()
+    age = _age(report)
+    ready = report['status'] == 'healthy' and age <= getattr(settings, 'HEALTH_CHECK_MAX_AGE', 60)
+    return JsonResponse(
+        {'status': 'ready' if ready else 'not_ready', 'health': report['status'], 'age': age},
+        status=200 if ready else 503,
+    )
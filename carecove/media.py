@@ -0,0 +1,137 @@
+"""
+Media file delivery.
+
+``serve_media`` answers ``MEDIA_URL`` requests when no front server serves
+the files itself (``MEDIA_SERVE``). It decides the cache policy and either
+hands the transfer back to nginx or streams the file itself:
+
+* With ``MEDIA_ACCEL_REDIRECT`` set to the prefix of an ``internal`` nginx
+  location, the response is an empty ``X-Accel-Redirect`` to that location;
+  nginx sends the file with its own ETag and Range support.
+* Otherwise the file is streamed from Python, WhiteNoise style: a stat-based
+  ETag and Last-Modified, 304 for matching ``If-None-Match`` or
+  ``If-Modified-Since``, and single ``Range`` requests answered with 206.
+
+Names carrying a content hash (``name.0123456789ab.ext``) never change and
+are cached for a year as immutable. Other uploads can be replaced in place
+(product images are resized on save), so they get ``MEDIA_CACHE_MAX_AGE``
+and are revalidated with the ETag.
+"""
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def cache_control(name):
+    if HASHED_NAME.search(name):
+        return IMMUTABLE
+    return f"public, max-age={getattr(settings, 'MEDIA_CACHE_MAX_AGE', 3600)}"
+
+
+def byte_range(header, size):
+    """``(start, end)`` (inclusive) for a single-range ``Range`` header.
+
+    Returns ``None`` when the header should be ignored (absent, malformed or
+    asking for several ranges) and raises ``ValueError`` when it cannot be
+    satisfied.
+    """
+    match = RANGE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        length = int(last)
+        if not length:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def _read(path, start, length):
+    with open(path, 'rb') as stream:
+        stream.seek(start)
+        while length > 0:
+            chunk = stream.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Not found')
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404('Not found')
+    if not os.path.isfile(full_path):
+        raise Http404('Not found')
+
+    headers = {'Cache-Control': cache_control(path)}
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+
+    accel_prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT', '')
+    if accel_prefix:
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + quote(path)
+        return response
+
+    etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+    headers.update({'ETag': etag, 'Last-Modified': http_date(stat.st_mtime), 'Accept-Ranges': 'bytes'})
+
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        if etag in parse_etags(if_none_match) or if_none_match.strip() == '*':
+            return HttpResponseNotModified(headers=headers)
+    else:
+        modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        if modified_since is not None and int(stat.st_mtime) <= modified_since:
+            return HttpResponseNotModified(headers=headers)
+
+    size = stat.st_size
+    try:
+        requested = byte_range(request.headers.get('Range'), size)
+    except ValueError:
+        return HttpResponse(status=416, headers={**headers, 'Content-Range': f'bytes */{size}'})
+    if_range = request.headers.get('If-Range')
+    if requested and if_range and if_range.strip() != etag:
+        requested = None
+
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response['Content-Length'] = size
+        return response
+    if requested is None:
+        return FileResponse(open(full_path, 'rb'), content_type=content_type, headers=headers)
+
+    start, end = requested
+    response = StreamingHttpResponse(
+        _read(full_path, start, end - start + 1), status=206, content_type=content_type, headers=headers,
+    )
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
@@ -0,0 +1,165 @@
+"""
+Cache-backed rate limiting for public write endpoints.
+
+Budgets are named scopes in ``settings.RATE_LIMITS`` (``'20/m'``, ``'5/h'``,
+``'100/10m'``). A request is counted separately against its client IP, its
+session and, when logged in, its user; it is refused if any of them is over
+budget. The IP comes from ``carecove.client_ip``, which does not trust
+client-supplied forwarding headers. Each counter is a sliding-window estimate built from two fixed
+windows: ``previous * (1 - elapsed / window) + current``.
+
+With the Redis cache every check is a single pipelined round trip (INCR and
+EXPIRE of the current window, GET of the previous one for each identity).
+Other backends go through the generic cache API, which is only used in
+development and tests.
+
+Use the ``rate_limit(scope)`` decorator on a view, or list view names in
+``settings.RATE_LIMIT_ROUTES`` for ``RateLimitMiddleware``.
+"""
+
+import functools
+import logging
+import math
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.shortcuts import render
+
+from .client_ip import get_client_ip
+
+try:
+    from django_redis.cache import RedisCache
+except ImportError:  # django-redis is only needed when REDIS_URL is set
+    RedisCache = None
+
+logger = logging.getLogger(__name__)
+
+LIMITED_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+RATE_RE = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*([smhd])\s*$')
+
+
+@functools.lru_cache(maxsize=None)
+def parse_rate(rate):
+    """``'20/m'`` -> ``(20, 60)``; ``'100/10m'`` -> ``(100, 600)``."""
+    match = RATE_RE.match(rate.lower())
+    if not match:
+        raise ValueError(f"Invalid rate: {rate!r}")
+    count, multiple, period = match.groups()
+    return int(count), int(multiple or 1) * PERIODS[period]
+
+
+def identities(request):
+    """The keys a request is counted under."""
+    keys = [f"ip:{get_client_ip(request)}"]
+    session = getattr(request, 'session', None)
+    if session is not None and session.session_key:
+        keys.append(f"session:{session.session_key}")
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        keys.append(f"user:{user.pk}")
+    return keys
+
+
+def _redis_client():
+    if RedisCache is None or not isinstance(cache, RedisCache):
+        return None
+    return cache.client.get_client(write=True)
+
+
+def _hit(keys, ttl):
+    """Increment each current-window key; return ``[(current, previous), ...]``."""
+    client = _redis_client()
+    if client is not None:
+        pipe = client.pipeline(transaction=False)
+        for current, previous in keys:
+            current = cache.make_key(current)
+            pipe.incr(current)
+            pipe.expire(current, ttl)
+            pipe.get(cache.make_key(previous))
+        results = pipe.execute()
+        return [(int(results[i]), int(results[i + 2] or 0)) for i in range(0, len(results), 3)]
+
+    previous = cache.get_many([previous for _, previous in keys])
+    counts = []
+    for current, previous_key in keys:
+        cache.add(current, 0, ttl)
+        try:
+            count = cache.incr(current)
+        except ValueError:
+            count = 1
+            cache.set(current, count, ttl)
+        counts.append((count, previous.get(previous_key, 0)))
+    return counts
+
+
+def check(request, scope):
+    """Count the request against ``scope``; return seconds to wait, 0 if allowed."""
+    rate = settings.RATE_LIMITS.get(scope)
+    if not rate or not getattr(settings, 'RATE_LIMIT_ENABLED', True):
+        return 0
+    limit, window = parse_rate(rate)
+    index, elapsed = divmod(time.time(), window)
+    index = int(index)
+    keys = [
+        (f"ratelimit:{scope}:{identity}:{index}", f"ratelimit:{scope}:{identity}:{index - 1}")
+        for identity in identities(request)
+    ]
+    weight = 1 - elapsed / window
+    for current, previous in _hit(keys, window * 2):
+        if previous * weight + current > limit:
+            return max(1, math.ceil(window - elapsed))
+    return 0
+
+
+def limited_response(request, scope, retry_after):
+    logger.warning(f"Rate limit '{scope}' exceeded by {get_client_ip(request)} on {request.path}")
+    wants_json = (
+        request.content_type == 'application/json'
+        or 'application/json' in request.headers.get('Accept', '')
+        or request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    )
+    if wants_json:
+        response = JsonResponse({'error': 'Too many requests. Please try again later.'}, status=429)
+    else:
+        response = render(request, '429.html', {'retry_after': retry_after}, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def rate_limit(scope, methods=LIMITED_METHODS):
+    """Apply the ``scope`` budget to a view for the given HTTP methods."""
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            if request.method in methods:
+                retry_after = check(request, scope)
+                if retry_after:
+                    return limited_response(request, scope, retry_after)
+            return view_func(request, *args, **kwargs)
+        return wrapped
+    return decorator
+
+
+class RateLimitMiddleware:
+    """Apply budgets to the views named in ``settings.RATE_LIMIT_ROUTES``."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in LIMITED_METHODS or request.resolver_match is None:
+            return None
+        scope = getattr(settings, 'RATE_LIMIT_ROUTES', {}).get(request.resolver_match.view_name)
+        if scope is None:
+            return None
+        retry_after = check(request, scope)
+        if retry_after:
+            return limited_response(request, scope, retry_after)
+        return None
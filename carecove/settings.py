@@ -57,15 +57,23 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'carecove.ratelimit.RateLimitMiddleware',
 ]
 
 ROOT_URLCONF = 'carecove.urls'
 
+# Production template mode: pin the cached loader so templates are compiled
+# once per process (carecove.templating precompiles them all at warm-up).
+# Renders slower than TEMPLATE_SLOW_RENDER_MS are logged.
+TEMPLATE_CACHED = config('TEMPLATE_CACHED', default=not DEBUG, cast=bool)
+TEMPLATE_SLOW_RENDER_MS = config('TEMPLATE_SLOW_RENDER_MS', default=200, cast=int)
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'carecove.templating.TimedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
+        'APP_DIRS': not TEMPLATE_CACHED,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -73,10 +81,18 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'cart.context_processors.cart',
+                'admin_panel.context_processors.admin_header',
             ],
         },
     },
 ]
+if TEMPLATE_CACHED:
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
 
 
 
@@ -88,11 +104,28 @@ DATABASE_URL = config('DATABASE_URL', default=None)
 
 CSRF_TRUSTED_ORIGINS = ['https://*.ngrok-free.app',]
 
+# Connections are kept for DB_CONN_MAX_AGE seconds and checked before reuse.
+# DB_POOL switches to Django's psycopg 3 connection pool instead, which is also
+# what the uvicorn worker profile needs: persistent connections are per thread
+# and are not reused under ASGI.
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=int)
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+
 if DATABASE_URL:
     # Production database (PostgreSQL via DATABASE_URL)
     DATABASES = {
-        'default': dj_database_url.parse(DATABASE_URL)
+        'default': dj_database_url.parse(
+            DATABASE_URL,
+            conn_max_age=0 if DB_POOL else DB_CONN_MAX_AGE,
+            conn_health_checks=not DB_POOL,
+        )
     }
+    if DB_POOL:
+        DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+        }
 else:
     # Development database (SQLite)
     DATABASES = {
@@ -141,9 +174,33 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# Build stage (carecove.storage): collectstatic writes the bundles below,
+# fingerprints every file and pre-compresses it with gzip and brotli.
+STATIC_BUNDLED = config('STATIC_BUNDLED', default=not DEBUG, cast=bool)
+STATIC_BUNDLES = {
+    'css/site.min.css': ['css/style.css', 'css/layout.css'],
+    'js/site.min.js': ['js/main.js'],
+}
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': (
+            'carecove.storage.BundledStaticFilesStorage' if STATIC_BUNDLED
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Serve MEDIA_URL through carecove.media (turn off if the front server serves
+# the files itself). With MEDIA_ACCEL_REDIRECT, the prefix of an internal
+# nginx location, nginx sends the file; otherwise it is streamed with ETag and
+# Range support. Names without a content hash are cached for MEDIA_CACHE_MAX_AGE.
+MEDIA_SERVE = config('MEDIA_SERVE', default=True, cast=bool)
+MEDIA_ACCEL_REDIRECT = config('MEDIA_ACCEL_REDIRECT', default='')
+MEDIA_CACHE_MAX_AGE = config('MEDIA_CACHE_MAX_AGE', default=3600, cast=int)
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -165,6 +222,11 @@ DEFAULT_FROM_EMAIL = 'your-email@example.com'
 # For development, you can use console email backend
 # EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# Newsletter campaign delivery
+SITE_URL = config('SITE_URL', default='http://localhost:8000')  # used for links in emails
+NEWSLETTER_BATCH_SIZE = config('NEWSLETTER_BATCH_SIZE', default=100, cast=int)
+NEWSLETTER_SEND_RATE = config('NEWSLETTER_SEND_RATE', default=10, cast=float)  # messages per second, 0 = unthrottled
+
 # Session settings
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False
 SESSION_COOKIE_AGE = 86400  # 1 day
@@ -175,6 +237,20 @@ WHATSAPP_NUMBER = '+255742604651'
 # LLM API settings
 ABACUSAI_API_KEY = config('ABACUSAI_API_KEY', default='test-api-key-for-development')
 
+# LLM circuit breaker: calls slower than LLM_SLOW_CALL_SECONDS count as
+# failures; LLM_FAILURE_THRESHOLD in a row open the circuit for LLM_OPEN_SECONDS
+LLM_TIMEOUT = config('LLM_TIMEOUT', default=30, cast=int)
+LLM_SLOW_CALL_SECONDS = config('LLM_SLOW_CALL_SECONDS', default=10, cast=int)
+LLM_FAILURE_THRESHOLD = config('LLM_FAILURE_THRESHOLD', default=5, cast=int)
+LLM_OPEN_SECONDS = config('LLM_OPEN_SECONDS', default=30, cast=int)
+LLM_MAX_CONCURRENCY = config('LLM_MAX_CONCURRENCY', default=4, cast=int)
+
+# Chat history API: most messages returned per request
+CHAT_HISTORY_MAX_PAGE = config('CHAT_HISTORY_MAX_PAGE', default=50, cast=int)
+
+# Seconds between checks of the shared chatbot product digest version stamp
+CHATBOT_DIGEST_CHECK_INTERVAL = config('CHATBOT_DIGEST_CHECK_INTERVAL', default=5, cast=int)
+
 # Cart settings
 CART_SESSION_ID = 'cart'
 
@@ -271,6 +347,50 @@ LANGUAGE_CODE = config('LANGUAGE_CODE', default='en-us')
 
 # Additional App Settings
 CART_SESSION_AGE = config('CART_SESSION_AGE', default=86400, cast=int)  # 1 day
+ORDER_NUMBER_BLOCK_SIZE = config('ORDER_NUMBER_BLOCK_SIZE', default=20, cast=int)  # numbers reserved per worker
+
+# Admin background jobs (bulk order actions)
+BACKGROUND_JOBS_ASYNC = config('BACKGROUND_JOBS_ASYNC', default=True, cast=bool)
+ADMIN_BULK_CHUNK_SIZE = config('ADMIN_BULK_CHUNK_SIZE', default=200, cast=int)
+
+# Lifetime of cached home page feeds; they are also dropped on every change
+FEATURED_CACHE_TIMEOUT = config('FEATURED_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Lifetime of cached per-language product projections (shop.localization)
+PRODUCT_L10N_CACHE_TIMEOUT = config('PRODUCT_L10N_CACHE_TIMEOUT', default=86400, cast=int)
+
+# Available quantity at or below which products and variants are listed as low
+# stock, and the lifetime of the cached list (it is also dropped on every movement)
+LOW_STOCK_THRESHOLD = config('LOW_STOCK_THRESHOLD', default=10, cast=int)
+LOW_STOCK_CACHE_TIMEOUT = config('LOW_STOCK_CACHE_TIMEOUT', default=3600, cast=int)
+# Unpaid orders hold their stock this long (release_expired_reservations)
+STOCK_RESERVATION_MINUTES = config('STOCK_RESERVATION_MINUTES', default=60, cast=int)
+
+# Repeats of an admin notification within this many seconds are folded into
+# the unread one; per-user unread counts are cached for the given lifetime
+ADMIN_NOTIFICATION_COALESCE_SECONDS = config('ADMIN_NOTIFICATION_COALESCE_SECONDS', default=900, cast=int)
+ADMIN_NOTIFICATION_COUNT_TIMEOUT = config('ADMIN_NOTIFICATION_COUNT_TIMEOUT', default=300, cast=int)
+
+# Admin activity log entries are buffered per process and written in batches
+# (admin_panel.audit); prune_activity_logs keeps this many days of them
+AUDIT_LOG_BUFFER_SIZE = config('AUDIT_LOG_BUFFER_SIZE', default=50, cast=int)
+AUDIT_LOG_FLUSH_INTERVAL = config('AUDIT_LOG_FLUSH_INTERVAL', default=5, cast=int)
+AUDIT_LOG_RETENTION_DAYS = config('AUDIT_LOG_RETENTION_DAYS', default=180, cast=int)
+
+# Health checks (carecove.health) run every HEALTH_CHECK_INTERVAL seconds per
+# process, on a background thread unless HEALTH_CHECK_BACKGROUND is off (then
+# on the first probe after the interval); readiness fails once the last report
+# is older than HEALTH_CHECK_MAX_AGE
+HEALTH_CHECK_INTERVAL = config('HEALTH_CHECK_INTERVAL', default=15, cast=int)
+HEALTH_CHECK_BACKGROUND = config('HEALTH_CHECK_BACKGROUND', default=True, cast=bool)
+HEALTH_CHECK_MAX_AGE = config('HEALTH_CHECK_MAX_AGE', default=60, cast=int)
+
+# Warm the URL resolver, templates and caches before serving (carecove.warmup);
+# gunicorn runs it in the master so forked workers inherit the result
+WARMUP_ON_START = config('WARMUP_ON_START', default=False, cast=bool)
+
+# Seconds between checks of the shared AdminSettings version stamp
+ADMIN_SETTINGS_CHECK_INTERVAL = config('ADMIN_SETTINGS_CHECK_INTERVAL', default=5, cast=int)
 
 # PesaPal Payment Gateway Settings
 PESAPAL_CONSUMER_KEY = config('PESAPAL_CONSUMER_KEY', default='')
@@ -279,16 +399,22 @@ PESAPAL_DEMO = config('PESAPAL_DEMO', default=True, cast=bool)
 PESAPAL_CALLBACK_URL = config('PESAPAL_CALLBACK_URL', default='http://localhost:8000/cart/payment/callback/')
 PESAPAL_IPN_URL = config('PESAPAL_IPN_URL', default='http://localhost:8000/cart/payment/ipn/')
 
-# API Rate Limiting (if implemented)
-REST_FRAMEWORK = {
-    'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
-    ],
-    'DEFAULT_THROTTLE_RATES': {
-        'anon': config('API_RATE_ANON', default='100/hour'),
-        'user': config('API_RATE_USER', default='1000/hour')
-    }
+# Rate limiting (carecove.ratelimit): budgets per scope as "count/period"
+RATE_LIMIT_ENABLED = config('RATE_LIMIT_ENABLED', default=True, cast=bool)
+RATE_LIMITS = {
+    'chat': config('RATE_LIMIT_CHAT', default='20/m'),
+    'chat_session': config('RATE_LIMIT_CHAT_SESSION', default='10/m'),
+    'contact': config('RATE_LIMIT_CONTACT', default='5/h'),
+    'review': config('RATE_LIMIT_REVIEW', default='5/h'),
+    'newsletter': config('RATE_LIMIT_NEWSLETTER', default='5/h'),
+}
+# Proxies (addresses or networks) whose X-Real-IP/X-Forwarded-For headers are believed (carecove.client_ip)
+TRUSTED_PROXIES = config('TRUSTED_PROXIES', default='', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
+# Views limited by RateLimitMiddleware: view name -> scope
+RATE_LIMIT_ROUTES = {
+    'chatbot:chat_api': 'chat',
+    'chatbot:transfer_whatsapp': 'chat_session',
+    'chatbot:end_session': 'chat_session',
 }
 
 # Path to wkhtmltopdf executable for PDF generation
@@ -0,0 +1,68 @@
+"""
+Static file build stage.
+
+``collectstatic`` with ``BundledStaticFilesStorage`` (the ``staticfiles``
+storage whenever ``STATIC_BUNDLED`` is on) does three things once the files
+are collected:
+
+* writes each bundle in ``STATIC_BUNDLES`` by concatenating its sources in
+  order, minified with ``rcssmin``/``rjsmin`` when those are installed;
+* fingerprints every file, bundles included, and records the names in
+  ``staticfiles.json`` so ``{% static %}`` URLs carry a content hash and can
+  be cached forever;
+* writes ``.gz`` and, with ``Brotli`` installed, ``.br`` copies that
+  WhiteNoise (or nginx ``gzip_static``) serves to clients that accept them.
+
+Bundles live next to their sources so relative ``url()`` references keep
+working. ``{% bundle %}`` (``shop/templatetags/assets.py``) links the bundle
+when it is in the manifest and the individual sources otherwise, so
+development and deployments that ship without a manifest keep working.
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+logger = logging.getLogger(__name__)
+
+
+def minify(name, content):
+    """Minify CSS or JavaScript ``content``; unchanged when no minifier is installed."""
+    try:
+        if name.endswith('.css'):
+            from rcssmin import cssmin
+            return cssmin(content)
+        if name.endswith('.js'):
+            from rjsmin import jsmin
+            return jsmin(content)
+    except ImportError:
+        logger.warning(f"No minifier installed for {name}; bundling it unminified")
+    return content
+
+
+class BundledStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            for name, sources in getattr(settings, 'STATIC_BUNDLES', {}).items():
+                self.build_bundle(name, sources)
+                paths[name] = (self, name)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def build_bundle(self, name, sources):
+        parts = []
+        for source in sources:
+            with self.open(source) as stream:
+                parts.append(minify(source, stream.read().decode('utf-8')).strip())
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile('\n'.join(parts).encode('utf-8') + b'\n'))
+
+    def stored_name(self, name):
+        # Collected without this storage: there are no hashed copies to point at.
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
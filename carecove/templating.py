@@ -0,0 +1,101 @@
+"""
+Template compilation and render timing.
+
+With ``TEMPLATE_CACHED`` (on whenever ``DEBUG`` is off) the engine uses an
+explicit cached loader, so each template is read and compiled once per
+process. ``precompile`` compiles every template the engine can find, which
+fills that cache before the first request and surfaces syntax errors; the
+warm-up calls it at startup and ``manage.py compile_templates`` at deploy
+time.
+
+``TimedDjangoTemplates`` is the template backend. Every template rendered
+through it (``render``, ``TemplateResponse``, ``render_to_string``) records
+its render time per template name; renders slower than
+``TEMPLATE_SLOW_RENDER_MS`` are logged as warnings. Templates pulled in with
+``{% extends %}`` or ``{% include %}`` count towards the template that
+rendered them.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates, Template
+from django.template.utils import get_app_template_dirs
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_stats = {}
+
+
+def record(name, seconds):
+    with _lock:
+        count, total, slowest = _stats.get(name, (0, 0.0, 0.0))
+        _stats[name] = (count + 1, total + seconds, max(slowest, seconds))
+    ms = seconds * 1000
+    if ms >= getattr(settings, 'TEMPLATE_SLOW_RENDER_MS', 200):
+        logger.warning(f"Slow template render: {name} took {ms:.1f}ms")
+
+
+def render_stats():
+    """``{name: (renders, total_seconds, slowest_seconds)}`` for this process."""
+    with _lock:
+        return dict(_stats)
+
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            record(self.template.name, time.perf_counter() - started)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+def template_names(engine, include_packages=False):
+    """Every template name under the engine's directories, sorted.
+
+    Templates shipped inside installed packages outside the project (Django
+    admin and the like) are only included with ``include_packages``.
+    """
+    base = str(settings.BASE_DIR)
+    dirs = list(engine.dirs) + [
+        directory for directory in get_app_template_dirs('templates')
+        if include_packages or str(directory).startswith(base)
+    ]
+    names = set()
+    for directory in dirs:
+        for root, subdirs, files in os.walk(directory):
+            subdirs[:] = [name for name in subdirs if not name.startswith('.')]
+            for filename in files:
+                if not filename.startswith('.'):
+                    names.add(os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/'))
+    return sorted(names)
+
+
+def precompile(include_packages=False):
+    """Compile every template; return ``(compiled, {name: error})``."""
+    engine = engines['django'].engine
+    compiled, errors = 0, {}
+    for name in template_names(engine, include_packages=include_packages):
+        try:
+            engine.get_template(name)
+        except (TemplateSyntaxError, UnicodeDecodeError) as e:
+            errors[name] = str(e)
+        else:
+            compiled += 1
+    return compiled, errors
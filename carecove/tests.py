@@ -0,0 +1,295 @@
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from unittest.mock import Mock, patch
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from admin_panel.management.commands.importtime import parse_importtime
+from chatbot import llm
+
+from . import health, ratelimit, templating
+from .client_ip import get_client_ip
+from .warmup import warm_up
+
+
+@override_settings(RATE_LIMITS={'chat_session': '2/m'})
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_middleware_limits_chat_endpoints_per_client(self):
+        url = reverse('chatbot:end_session')
+        statuses = [self.client.post(url, content_type='application/json').status_code for _ in range(3)]
+
+        self.assertEqual(statuses[:2], [200, 200])
+        self.assertEqual(statuses[2], 429)
+        response = self.client.post(url, content_type='application/json')
+        self.assertEqual(response.json()['error'], 'Too many requests. Please try again later.')
+        self.assertGreater(int(response['Retry-After']), 0)
+
+        # Another client (different IP, no session) has its own budget.
+        other = self.client_class(REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(other.post(url, content_type='application/json').status_code, 200)
+
+    def test_rotated_forwarding_headers_do_not_reset_the_budget(self):
+        url = reverse('chatbot:end_session')
+        for header in ('HTTP_X_FORWARDED_FOR', 'HTTP_X_REAL_IP'):
+            cache.clear()
+            statuses = [
+                self.client.post(url, content_type='application/json', **{header: f'203.0.113.{i}'}).status_code
+                for i in range(3)
+            ]
+            self.assertEqual(statuses, [200, 200, 429], header)
+
+    @override_settings(TRUSTED_PROXIES=['10.0.0.0/24'])
+    def test_forwarding_headers_are_read_only_from_trusted_proxies(self):
+        request = RequestFactory().get(
+            '/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='1.1.1.1, 198.51.100.7, 10.0.0.2',
+        )
+        self.assertEqual(get_client_ip(request), '198.51.100.7')
+        request.META['HTTP_X_REAL_IP'] = '198.51.100.8'
+        self.assertEqual(get_client_ip(request), '198.51.100.8')
+
+        direct = RequestFactory().get(
+            '/', REMOTE_ADDR='192.0.2.5', HTTP_X_REAL_IP='198.51.100.8', HTTP_X_FORWARDED_FOR='198.51.100.7',
+        )
+        self.assertEqual(get_client_ip(direct), '192.0.2.5')
+
+    def test_previous_window_is_weighted_in(self):
+        with patch('carecove.ratelimit.time.time', return_value=600.0 + 15):  # a quarter into a window
+            cache.set('ratelimit:chat_session:ip:127.0.0.1:9', 2)  # 2 * 0.75 = 1.5 carried over
+            statuses = [
+                self.client.post(reverse('chatbot:end_session'), content_type='application/json').status_code
+                for _ in range(2)
+            ]
+
+        self.assertEqual(statuses, [429, 429])
+
+    def test_parse_rate(self):
+        self.assertEqual(ratelimit.parse_rate('20/m'), (20, 60))
+        self.assertEqual(ratelimit.parse_rate('100/10m'), (100, 600))
+        with self.assertRaises(ValueError):
+            ratelimit.parse_rate('often')
+
+
+@override_settings(HEALTH_CHECK_BACKGROUND=False, HEALTH_CHECK_INTERVAL=60, HEALTH_CHECK_MAX_AGE=120)
+class HealthCheckTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        health.reset()
+        self.addCleanup(health.reset)
+
+    def test_probes_are_served_from_the_last_report(self):
+        with CaptureQueriesContext(connection) as first:
+            self.assertEqual(self.client.get(reverse('simple_health_check')).status_code, 200)
+        self.assertGreater(len(first), 0)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse('health_ready')).status_code, 200)
+            self.assertEqual(self.client.get(reverse('health_check')).status_code, 200)
+            self.assertEqual(self.client.get(reverse('health_live')).json()['status'], 'alive')
+
+    def test_report_is_refreshed_after_the_interval(self):
+        first = health.current()
+        with patch('carecove.health.time.time', return_value=first['timestamp'] + 61):
+            with CaptureQueriesContext(connection) as queries:
+                refreshed = health.current()
+        self.assertGreater(len(queries), 0)
+        self.assertEqual(refreshed['timestamp'], first['timestamp'] + 61)
+
+    def test_report_includes_operational_stats(self):
+        llm.record_failure('timeout')
+        stats = self.client.get(reverse('health_check')).json()['stats']
+        self.assertFalse(stats['pool']['enabled'])
+        self.assertEqual(stats['queues']['admin_jobs'], 0)
+        self.assertEqual(stats['circuit_breakers']['llm']['failures'], 1)
+
+    def test_readiness_fails_when_unhealthy_or_stale(self):
+        with patch.object(health, 'CHECKS', (('database', Mock(side_effect=Exception('down'))),)):
+            response = self.client.get(reverse('health_ready'))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['health'], 'unhealthy')
+        self.assertEqual(self.client.get(reverse('health_live')).status_code, 200)
+
+        health.refresh()
+        with override_settings(HEALTH_CHECK_INTERVAL=600):
+            with patch('carecove.health.time.time', return_value=health.current()['timestamp'] + 300):
+                self.assertEqual(self.client.get(reverse('health_ready')).status_code, 503)
+
+    @override_settings(HEALTH_CHECK_BACKGROUND=True)
+    def test_concurrent_first_probes_start_one_monitor(self):
+        stop = threading.Event()
+        self.addCleanup(stop.set)
+        both_probing = threading.Barrier(2, timeout=5)
+        monitors = []
+
+        def monitor(delay):
+            monitors.append(threading.current_thread())
+            stop.wait(5)
+
+        def refresh():
+            # Hold both probes in their inline check until each has passed the lock.
+            both_probing.wait()
+            return {'status': 'healthy', 'timestamp': int(time.time())}
+
+        with patch.object(health, '_monitor', monitor), patch.object(health, 'refresh', refresh):
+            probes = [threading.Thread(target=health.current) for _ in range(2)]
+            for probe in probes:
+                probe.start()
+            for probe in probes:
+                probe.join(5)
+
+        self.assertFalse(both_probing.broken)
+        self.assertEqual(len(monitors), 1)
+
+
+class ColdStartTests(TestCase):
+    def test_parse_importtime(self):
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   _io\n"
+            "import time:      2500 |       9000 | cart.views\n"
+            "some unrelated warning\n"
+        )
+        self.assertEqual(parse_importtime(output), [('_io', 120, 120), ('cart.views', 2500, 9000)])
+
+    def test_views_do_not_load_pdf_stack(self):
+        code = (
+            "import django; django.setup(); import carecove.urls, sys; "
+            "print(sorted(m for m in ('xhtml2pdf', 'pdfkit', 'reportlab') if m in sys.modules))"
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='carecove.settings')
+        result = subprocess.run(
+            [sys.executable, '-c', code], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        self.assertEqual(result.stdout.strip().splitlines()[-1], '[]', result.stderr)
+
+    def test_warm_up_is_opt_in(self):
+        with override_settings(WARMUP_ON_START=False):
+            self.assertEqual(warm_up(), {})
+
+    def test_warm_up_primes_feeds(self):
+        cache.clear()
+        with override_settings(WARMUP_ON_START=True):
+            timings = warm_up()
+        self.assertEqual(set(timings), {'urls', 'templates', 'caches'})
+        self.assertIsNotNone(cache.get('featured:products'))
+
+
+class TemplateCompilationTests(TestCase):
+    def test_every_project_template_compiles(self):
+        compiled, errors = templating.precompile()
+        self.assertEqual(errors, {})
+        self.assertGreater(compiled, 50)
+
+    def test_command_fails_on_syntax_error(self):
+        directory = tempfile.mkdtemp()
+        with open(os.path.join(directory, 'broken.html'), 'w') as stream:
+            stream.write('{% if %}')
+        engine = dict(settings.TEMPLATES[0], DIRS=[directory])
+        with override_settings(TEMPLATES=[engine]):
+            with self.assertRaises(CommandError):
+                call_command('compile_templates', stderr=io.StringIO())
+
+    def test_render_time_is_recorded(self):
+        templating.reset_stats()
+        with override_settings(TEMPLATE_SLOW_RENDER_MS=0), self.assertLogs('carecove.templating', 'WARNING'):
+            self.client.get(reverse('shop:about'))
+        renders, total, slowest = templating.render_stats()['shop/about.html']
+        self.assertEqual(renders, 1)
+        self.assertEqual(total, slowest)
+
+
+class StaticBundleTests(TestCase):
+    def render(self):
+        return Template("{% load assets %}{% bundle 'css/site.min.css' %}").render(Context())
+
+    def test_sources_are_linked_without_a_build(self):
+        html = self.render()
+        self.assertIn('/static/css/style.css', html)
+        self.assertIn('/static/css/layout.css', html)
+
+    def test_collectstatic_bundles_fingerprints_and_compresses(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, True)
+        storages = dict(settings.STORAGES, staticfiles={'BACKEND': 'carecove.storage.BundledStaticFilesStorage'})
+        with override_settings(STATIC_ROOT=root, STORAGES=storages):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            html = self.render()
+
+        self.assertRegex(html, r'^<link rel="stylesheet" href="/static/css/site\.min\.[0-9a-f]{12}\.css">$')
+        hashed = html.split('/static/')[1].split('"')[0]
+        self.assertTrue(os.path.exists(os.path.join(root, hashed + '.gz')))
+        with open(os.path.join(root, hashed)) as stream:
+            bundle = stream.read()
+        self.assertIn('.nav-label', bundle)
+        self.assertIn('body', bundle)
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root, MEDIA_ACCEL_REDIRECT='')
+        media.enable()
+        self.addCleanup(media.disable)
+        os.makedirs(os.path.join(self.media_root, 'products'))
+        for name in ('gel.jpg', 'gel.0123456789ab.jpg'):
+            with open(os.path.join(self.media_root, 'products', name), 'wb') as stream:
+                stream.write(bytes(range(100)))
+
+    def test_full_response_and_revalidation(self):
+        response = self.client.get('/media/products/gel.jpg')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(100)))
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        again = self.client.get('/media/products/gel.jpg', headers={'If-None-Match': response['ETag']})
+        self.assertEqual(again.status_code, 304)
+
+    def test_hashed_names_are_immutable(self):
+        response = self.client.get('/media/products/gel.0123456789ab.jpg')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+
+    def test_ranges(self):
+        response = self.client.get('/media/products/gel.jpg', headers={'Range': 'bytes=10-19'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(10, 20)))
+
+        response = self.client.get('/media/products/gel.jpg', headers={'Range': 'bytes=-5'})
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(95, 100)))
+
+        response = self.client.get('/media/products/gel.jpg', headers={'Range': 'bytes=100-'})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */100')
+
+        stale = self.client.get('/media/products/gel.jpg', headers={'Range': 'bytes=0-1', 'If-Range': '"old"'})
+        self.assertEqual(stale.status_code, 200)
+
+    def test_accel_redirect(self):
+        with override_settings(MEDIA_ACCEL_REDIRECT='/protected-media/'):
+            response = self.client.get('/media/products/gel.jpg')
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/products/gel.jpg')
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+
+    def test_missing_and_outside_files(self):
+        self.assertEqual(self.client.get('/media/products/none.jpg').status_code, 404)
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+        self.assertEqual(self.client.get('/media/products/').status_code, 404)
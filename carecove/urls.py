@@ -1,9 +1,12 @@
 
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
-from .health import health_check, simple_health_check
+from .health import health_check, liveness, readiness, simple_health_check
+from .media import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -18,8 +21,14 @@ urlpatterns = [
     # Health check endpoints
     path('health/', health_check, name='health_check'),
     path('health/simple/', simple_health_check, name='simple_health_check'),
+    path('health/live/', liveness, name='health_live'),
+    path('health/ready/', readiness, name='health_ready'),
 ]
 
+if settings.MEDIA_SERVE:
+    urlpatterns += [
+        re_path(rf"^{re.escape(settings.MEDIA_URL.lstrip('/'))}(?P<path>.+)$", serve_media, name='media'),
+    ]
+
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
@@ -0,0 +1,74 @@
+"""
+Process-local caches invalidated through a shared version token.
+
+Data read on nearly every request (site settings, the chatbot's catalogue
+digest) is kept in a dict in each process. A version token in the shared
+cache tells workers when their copy is stale: ``invalidate`` replaces the
+token once the current transaction commits, and each process compares
+against it at most once every ``interval_setting`` seconds. Reads in between
+touch neither the database nor the cache.
+"""
+
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+class VersionedCache:
+    """Entries built on first use and dropped together when the version changes."""
+
+    def __init__(self, version_key, interval_setting, default_interval=5):
+        self.version_key = version_key
+        self.interval_setting = interval_setting
+        self.default_interval = default_interval
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._version = None
+        self._checked_at = 0.0
+
+    def _shared_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            # Evicted or never set: any fresh token differs from what workers hold.
+            cache.add(self.version_key, uuid.uuid4().hex, timeout=None)
+            version = cache.get(self.version_key)
+        return version
+
+    def get(self, key, build):
+        """The entry for ``key``, calling ``build()`` when it is missing or stale."""
+        entries = self._entries
+        interval = getattr(settings, self.interval_setting, self.default_interval)
+        if key in entries and time.monotonic() - self._checked_at < interval:
+            return entries[key]
+
+        with self._lock:
+            # Read the token before building: a write landing in between then
+            # only causes one extra rebuild, never a missed one.
+            version = self._shared_version()
+            if self._version != version:
+                self._entries = {}
+                self._version = version
+            if key not in self._entries:
+                self._entries[key] = build()
+            self._checked_at = time.monotonic()
+            return self._entries[key]
+
+    def reset(self):
+        """Drop this process's entries so the next read rebuilds them."""
+        with self._lock:
+            self._entries = {}
+            self._version = None
+            self._checked_at = 0.0
+
+    def invalidate(self):
+        """Make every worker rebuild once the current transaction commits."""
+        def bump():
+            cache.set(self.version_key, uuid.uuid4().hex, timeout=None)
+            self.reset()
+
+        self.reset()
+        transaction.on_commit(bump)
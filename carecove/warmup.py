@@ -0,0 +1,83 @@
+"""
+Process warm-up.
+
+``warm_up`` does the work the first request in a fresh process would
+otherwise pay for: it populates the URL resolver, compiles every project
+template into the cached loader (``carecove.templating``) and fills the site
+settings and home page feed caches. Under gunicorn it runs once in the master (``when_ready`` in
+``gunicorn.conf.py``, with ``preload_app``), so every forked worker starts
+with the result; ``vercel_app.py`` runs it when a serverless instance starts.
+It is off unless ``WARMUP_ON_START`` is set.
+
+Each step is independent and a failing step is logged and skipped, so a
+missing table or unreachable cache never stops the server from starting.
+Database and cache connections opened here, and the database connection pool
+when ``DB_POOL`` is on, are closed afterwards so forked workers do not share
+them.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+URL_NAMES = ('shop:home', 'shop:product_list', 'cart:cart_detail')
+
+
+def _urls():
+    from django.urls import get_resolver, reverse
+
+    get_resolver().url_patterns
+    for name in URL_NAMES:
+        reverse(name)
+
+
+def _templates():
+    from .templating import precompile
+
+    _, errors = precompile()
+    for name, error in errors.items():
+        logger.error(f"Template {name} does not compile: {error}")
+
+
+def _caches():
+    from admin_panel import site_settings
+    from shop import featured
+
+    site_settings.get_str('site_name')
+    featured.featured_testimonials()
+    featured.featured_products()
+    featured.top_categories()
+
+
+STEPS = (('urls', _urls), ('templates', _templates), ('caches', _caches))
+
+
+def warm_up(force=False):
+    """Run every warm-up step; return ``{step: seconds}`` for those that succeeded."""
+    if not (force or getattr(settings, 'WARMUP_ON_START', False)):
+        return {}
+
+    from django.core.cache import caches
+    from django.db import connections
+
+    timings = {}
+    for name, step in STEPS:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logger.warning(f"Warm-up step {name} failed: {e}")
+            continue
+        timings[name] = time.perf_counter() - started
+        logger.info(f"Warm-up step {name} took {timings[name] * 1000:.0f}ms")
+
+    connections.close_all()
+    for connection in connections.all(initialized_only=True):
+        # A psycopg pool's worker threads do not survive a fork.
+        if connection.settings_dict.get('OPTIONS', {}).get('pool'):
+            connection.close_pool()
+    caches.close_all()
+    return timings
@@ -1,7 +1,7 @@
 
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Cart, CartItem, Order, OrderItem
+from .models import Cart, CartItem, Order, OrderItem, OrderNumberSequence
 
 @admin.register(Cart)
 class CartAdmin(admin.ModelAdmin):
@@ -78,3 +78,8 @@ class OrderAdmin(admin.ModelAdmin):
         queryset.update(status='delivered')
         self.message_user(request, f"{queryset.count()} orders marked as delivered.")
     mark_as_delivered.short_description = "Mark selected orders as delivered"
+
+@admin.register(OrderNumberSequence)
+class OrderNumberSequenceAdmin(admin.ModelAdmin):
+    list_display = ['name', 'next_value']
+    readonly_fields = ['name', 'next_value']
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from cart.models import Order
+from cart.search import create_search_index, drop_search_index
+
+class Command(BaseCommand):
+    help = 'Recompute Order.search_text and rebuild the admin order search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        orders = Order.objects.select_related('user')
+        batch = []
+        updated = 0
+
+        for order in orders.iterator(chunk_size=batch_size):
+            order.search_text = order.build_search_text()
+            batch.append(order)
+            if len(batch) >= batch_size:
+                Order.objects.bulk_update(batch, ['search_text'])
+                updated += len(batch)
+                batch = []
+        Order.objects.bulk_update(batch, ['search_text'])
+        updated += len(batch)
+
+        drop_search_index()
+        create_search_index()
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt search text for {updated} orders.'))
@@ -0,0 +1,42 @@
+from django.db import migrations, models
+
+
+def seed_order_number_sequence(apps, schema_editor):
+    """Start the sequence above every existing order number.
+
+    Legacy numbers were 'CC' plus 8 random digits. They are kept as-is
+    (payment references point at them) and new numbers start after the
+    highest one, so the two can never collide.
+    """
+    Order = apps.get_model('cart', 'Order')
+    OrderNumberSequence = apps.get_model('cart', 'OrderNumberSequence')
+
+    highest = 0
+    numbers = Order.objects.using(schema_editor.connection.alias).values_list('order_number', flat=True)
+    for order_number in numbers.iterator(chunk_size=2000):
+        if order_number.startswith('CC') and order_number[2:].isdigit():
+            highest = max(highest, int(order_number[2:]))
+
+    OrderNumberSequence.objects.using(schema_editor.connection.alias).update_or_create(
+        name='order_number',
+        defaults={'next_value': highest + 1},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0002_order_payment_confirmation_code_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderNumberSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('next_value', models.PositiveBigIntegerField(default=1)),
+            ],
+        ),
+        migrations.RunPython(seed_order_number_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:20
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_search_text(apps, schema_editor):
+    Order = apps.get_model('cart', 'Order')
+    orders = Order.objects.using(schema_editor.connection.alias).select_related('user')
+    batch = []
+    for order in orders.iterator(chunk_size=2000):
+        parts = [
+            order.order_number, order.email, order.billing_first_name,
+            order.billing_last_name, order.billing_phone,
+        ]
+        if order.user_id:
+            parts += [order.user.username, order.user.first_name, order.user.last_name, order.user.email]
+        order.search_text = ' '.join(part for part in parts if part).lower()
+        batch.append(order)
+        if len(batch) >= 2000:
+            Order.objects.using(schema_editor.connection.alias).bulk_update(batch, ['search_text'])
+            batch = []
+    Order.objects.using(schema_editor.connection.alias).bulk_update(batch, ['search_text'])
+
+
+def add_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS cart_order_search_trgm ON cart_order USING gin (search_text gin_trgm_ops)'
+    )
+
+
+def remove_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS cart_order_search_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0004_order_order_created_keyset_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='search_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='order_email_lower_idx'),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(add_search_index, remove_search_index),
+    ]
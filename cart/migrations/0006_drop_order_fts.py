@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def drop_fts_mirror(apps, schema_editor):
+    # Databases migrated before 0005 stopped creating the SQLite FTS5 mirror
+    # still carry its table and triggers; searches no longer read them.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for trigger in ('cart_order_fts_ai', 'cart_order_fts_ad', 'cart_order_fts_au'):
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    schema_editor.execute('DROP TABLE IF EXISTS cart_order_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0005_order_search_text'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_fts_mirror, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
 
 from django.db import models
+from django.db.models.functions import Lower
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 from shop.models import Product, ProductVariant
 
@@ -46,6 +49,13 @@ class CartItem(models.Model):
     def total_price(self):
         return self.price * self.quantity
 
+
+# Order fields that build_search_text() copies into search_text
+SEARCH_ORDER_FIELDS = frozenset({
+    'order_number', 'email', 'billing_first_name', 'billing_last_name', 'billing_phone', 'user', 'user_id',
+})
+
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending Payment'),
@@ -110,6 +120,9 @@ class Order(models.Model):
     
     # Notes
     order_notes = models.TextField(blank=True)
+
+    # Lowercased denormalized text for admin search, see cart.search
+    search_text = models.TextField(blank=True, editable=False)
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -117,17 +130,37 @@ class Order(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='order_created_keyset_idx'),
+            models.Index(Lower('email'), name='order_email_lower_idx'),
+        ]
 
     def __str__(self):
         return f"Order {self.order_number}"
 
     def save(self, *args, **kwargs):
         if not self.order_number:
-            import random
-            import string
-            self.order_number = 'CC' + ''.join(random.choices(string.digits, k=8))
+            from .order_numbers import allocate_order_number
+            self.order_number = allocate_order_number()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.search_text = self.build_search_text()
+        elif SEARCH_ORDER_FIELDS & set(update_fields):
+            self.search_text = self.build_search_text()
+            if 'search_text' not in update_fields:
+                kwargs['update_fields'] = [*update_fields, 'search_text']
         super().save(*args, **kwargs)
 
+    def build_search_text(self):
+        """Text indexed for admin order search."""
+        parts = [
+            self.order_number, self.email, self.billing_first_name,
+            self.billing_last_name, self.billing_phone,
+        ]
+        if self.user_id:
+            parts += [self.user.username, self.user.first_name, self.user.last_name, self.user.email]
+        return ' '.join(part for part in parts if part).lower()
+
     @property
     def full_billing_address(self):
         address = f"{self.billing_address_1}"
@@ -136,6 +169,40 @@ class Order(models.Model):
         address += f", {self.billing_city}, {self.billing_state} {self.billing_postal_code}, {self.billing_country}"
         return address
 
+# User fields that build_search_text() copies into search_text
+SEARCH_USER_FIELDS = frozenset({'username', 'first_name', 'last_name', 'email'})
+
+
+@receiver(post_save, sender=User)
+def refresh_order_search_text(sender, instance, created, update_fields=None, **kwargs):
+    """Keep search_text in step with the customer's name and email."""
+    # Logins save only last_login; nothing searchable changed then.
+    if created or (update_fields is not None and not SEARCH_USER_FIELDS & set(update_fields)):
+        return
+    orders = Order.objects.filter(user=instance).only(
+        'order_number', 'email', 'billing_first_name', 'billing_last_name', 'billing_phone', 'user_id', 'search_text'
+    )
+    changed = []
+    for order in orders.iterator():
+        order.user = instance
+        search_text = order.build_search_text()
+        if search_text != order.search_text:
+            order.search_text = search_text
+            changed.append(order)
+    Order.objects.bulk_update(changed, ['search_text'], batch_size=500)
+
+class OrderNumberSequence(models.Model):
+    """Counter backing order number allocation.
+
+    Workers reserve numbers from ``next_value`` in blocks, see
+    ``cart.order_numbers``.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.PositiveBigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
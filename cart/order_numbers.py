@@ -0,0 +1,95 @@
+"""
+Order number allocation.
+
+Order numbers are handed out from ``OrderNumberSequence`` in blocks. Each
+worker process reserves ``ORDER_NUMBER_BLOCK_SIZE`` numbers with a single
+``UPDATE ... RETURNING`` statement and then serves them from memory, so
+creating an order costs no extra query until the block runs out. Numbers are
+unique across workers without any retry loop; a restarted worker simply
+leaves a gap.
+
+Checkout saves the order inside a transaction. Reserving there would hold the
+sequence row lock until the whole checkout commits, so a block is reserved on
+a short-lived connection of its own, in autocommit, and the lock is released
+as soon as the ``UPDATE`` finishes. SQLite is the exception: the outer
+transaction already holds its single database write lock, so a second
+connection would only wait for it; there a single number is reserved on the
+request's connection and no leftovers are kept, since a rollback undoes it.
+"""
+
+import os
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connection, connections
+
+ORDER_NUMBER_PREFIX = 'CC'
+ORDER_NUMBER_DIGITS = 8
+SEQUENCE_NAME = 'order_number'
+
+_lock = threading.Lock()
+_block = {'pid': None, 'next': 0, 'end': 0}
+
+
+def format_order_number(value):
+    """Render a sequence value as a human-friendly order number."""
+    return f"{ORDER_NUMBER_PREFIX}{value:0{ORDER_NUMBER_DIGITS}d}"
+
+
+def _reserve(size, using=None):
+    """Reserve ``size`` numbers and return the first one."""
+    from .models import OrderNumberSequence
+
+    using = using or connection
+    table = using.ops.quote_name(OrderNumberSequence._meta.db_table)
+    with using.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} SET next_value = next_value + %s "
+            f"WHERE name = %s RETURNING next_value",
+            [size, SEQUENCE_NAME],
+        )
+        row = cursor.fetchone()
+    if row is None:
+        # The data migration seeds this row; recreate it if it was removed.
+        try:
+            columns = ', '.join(using.ops.quote_name(column) for column in ('name', 'next_value'))
+            with using.cursor() as cursor:
+                cursor.execute(f"INSERT INTO {table} ({columns}) VALUES (%s, 1)", [SEQUENCE_NAME])
+        except IntegrityError:
+            pass  # another worker recreated it first
+        return _reserve(size, using)
+    return row[0] - size
+
+
+def _reserve_block(size):
+    """Reserve ``size`` numbers outside any transaction the caller is in."""
+    if not connection.in_atomic_block:
+        return _reserve(size)
+    own = connections.create_connection(DEFAULT_DB_ALIAS)
+    try:
+        return _reserve(size, own)
+    finally:
+        own.close()
+
+
+def allocate_order_number():
+    """Return the next unique order number."""
+    if connection.in_atomic_block and connection.vendor == 'sqlite':
+        # Rolled back with the caller's transaction, so never kept as a block.
+        return format_order_number(_reserve(1))
+
+    block_size = max(1, getattr(settings, 'ORDER_NUMBER_BLOCK_SIZE', 20))
+    with _lock:
+        # Blocks reserved before a fork (gunicorn preload) must not be shared.
+        if _block['pid'] != os.getpid() or _block['next'] >= _block['end']:
+            start = _reserve_block(block_size)
+            _block.update(pid=os.getpid(), next=start, end=start + block_size)
+        value = _block['next']
+        _block['next'] += 1
+    return format_order_number(value)
+
+
+def reset_block():
+    """Drop the in-memory block, e.g. between tests."""
+    with _lock:
+        _block.update(pid=None, next=0, end=0)
@@ -1,36 +1,39 @@
-import requests
+import functools
 import json
 import logging
+import shutil
+
+import requests
 from django.conf import settings
-import pdfkit
-import os
+from django.template.loader import render_to_string
 
 logger = logging.getLogger(__name__)
 
-# Configure pdfkit to use the wkhtmltopdf executable path
-# For Vercel/Linux deployment, wkhtmltopdf is not available, so we'll use xhtml2pdf instead
-try:
-    # Try to find wkhtmltopdf in system PATH first
-    import shutil
-    wkhtmltopdf_path = shutil.which('wkhtmltopdf')
-    if wkhtmltopdf_path:
-        pdfkit_config = pdfkit.configuration(wkhtmltopdf=wkhtmltopdf_path)
-    else:
-        # Fallback - disable pdfkit for serverless environments like Vercel
-        pdfkit_config = None
-        logger.warning("wkhtmltopdf not found, PDF generation will use xhtml2pdf instead")
-except Exception as e:
-    pdfkit_config = None
-    logger.warning(f"Could not configure pdfkit: {e}. Using xhtml2pdf instead.")
 
-from xhtml2pdf import pisa
-from io import BytesIO
+@functools.lru_cache(maxsize=None)
+def pdfkit_config():
+    """pdfkit configuration for the local wkhtmltopdf, or None without one.
 
-# Replace the generate_invoice_pdf function to use xhtml2pdf
+    pdfkit and the PATH lookup are only paid for the first time a caller
+    asks. On Vercel and other hosts without wkhtmltopdf, PDFs are made with
+    xhtml2pdf instead.
+    """
+    try:
+        wkhtmltopdf_path = shutil.which('wkhtmltopdf')
+        if wkhtmltopdf_path:
+            import pdfkit
+            return pdfkit.configuration(wkhtmltopdf=wkhtmltopdf_path)
+        logger.warning("wkhtmltopdf not found, PDF generation will use xhtml2pdf instead")
+    except Exception as e:
+        logger.warning(f"Could not configure pdfkit: {e}. Using xhtml2pdf instead.")
+    return None
 
-from django.template.loader import render_to_string
 
 def generate_invoice_pdf(order, order_items, output_path):
+    # xhtml2pdf pulls in reportlab and takes a noticeable part of a second
+    # to import, so load it only when a PDF is actually made.
+    from xhtml2pdf import pisa
+
     # Render the invoice HTML with embedded CSS
     html_content = render_to_string('cart/pre_payment_invoice_print.html', {
         'order': order,
@@ -0,0 +1,66 @@
+"""
+Order search for the admin panel.
+
+Every order keeps a lowercased ``search_text`` column (order number, emails,
+customer and billing names, phone). On PostgreSQL it has a pg_trgm GIN index,
+so substring searches use an index instead of OR'ed ``icontains`` scans over
+a join. SQLite (development only) scans the single column; an FTS5 mirror
+kept by triggers was dropped because Django silently loses the triggers
+whenever it rebuilds the table. Exact order numbers and emails skip the
+substring search entirely.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models.functions import Lower
+
+ORDER_TABLE = 'cart_order'
+TRGM_INDEX = 'cart_order_search_trgm'
+
+ORDER_NUMBER_RE = re.compile(r'^CC\d{8,}$', re.IGNORECASE)
+EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+
+def create_search_index(schema_editor=None):
+    """Create the trigram index over ``cart_order.search_text`` (PostgreSQL only)."""
+    conn = schema_editor.connection if schema_editor else connection
+    if conn.vendor != 'postgresql':
+        return
+    with conn.cursor() as cursor:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {TRGM_INDEX} '
+            f'ON {ORDER_TABLE} USING gin (search_text gin_trgm_ops)'
+        )
+
+
+def drop_search_index(schema_editor=None):
+    conn = schema_editor.connection if schema_editor else connection
+    if conn.vendor != 'postgresql':
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(f'DROP INDEX IF EXISTS {TRGM_INDEX}')
+
+
+def search_orders(queryset, query):
+    """Filter an ``Order`` queryset by an admin search string."""
+    query = (query or '').strip()
+    if not query:
+        return queryset
+
+    # Fast path: an exact order number or email hits a plain index.
+    if ORDER_NUMBER_RE.match(query):
+        return queryset.filter(order_number=query.upper())
+    if EMAIL_RE.match(query):
+        exact = queryset.alias(email_lower=Lower('email')).filter(email_lower=query.lower())
+        if exact.exists():
+            return exact
+
+    terms = query.lower().split()
+
+    # search_text is stored lowercased, so a case-sensitive LIKE is enough
+    # and lets PostgreSQL use the trigram index.
+    for term in terms:
+        queryset = queryset.filter(search_text__contains=term)
+    return queryset
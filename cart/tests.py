@@ -1,3 +1,241 @@
-from django.test import TestCase
+import io
+import json
+from datetime import timedelta
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from admin_panel.jobs import run_bulk_order_job
+from admin_panel.models import BulkOrderJob
+from shop import inventory
+from shop.models import Category, Product, ProductVariant
+
+from . import order_numbers
+from .models import Order, OrderItem, OrderNumberSequence
+from .order_numbers import allocate_order_number, format_order_number, reset_block
+from .search import search_orders
+
+ORDER_FIELDS = dict(
+    email='a@example.com', billing_first_name='A', billing_last_name='B',
+    billing_address_1='x', billing_city='y', billing_state='z',
+    billing_postal_code='1', billing_phone='1', shipping_first_name='A',
+    shipping_last_name='B', shipping_address_1='x', shipping_city='y',
+    shipping_state='z', shipping_postal_code='1', subtotal=1, total=1,
+)
+
+
+class OrderNumberAllocationTests(TransactionTestCase):
+    def setUp(self):
+        reset_block()
+        OrderNumberSequence.objects.update_or_create(name='order_number', defaults={'next_value': 500})
+
+    def tearDown(self):
+        reset_block()
+
+    @override_settings(ORDER_NUMBER_BLOCK_SIZE=5)
+    def test_numbers_are_sequential_and_reserved_in_blocks(self):
+        with patch.object(order_numbers, '_reserve', wraps=order_numbers._reserve) as reserve:
+            numbers = [allocate_order_number() for _ in range(7)]
+
+        self.assertEqual(numbers, [format_order_number(n) for n in range(500, 507)])
+        self.assertEqual(reserve.call_count, 2)
+        self.assertEqual(OrderNumberSequence.objects.get(name='order_number').next_value, 510)
+
+    @override_settings(ORDER_NUMBER_BLOCK_SIZE=5)
+    def test_block_reserved_inside_a_transaction_outlives_it(self):
+        # As on PostgreSQL: the block comes from a separate autocommit connection.
+        with patch.object(connection, 'vendor', 'postgresql'):
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    first = allocate_order_number()
+                    raise RuntimeError
+            second = allocate_order_number()
+
+        self.assertEqual([first, second], [format_order_number(500), format_order_number(501)])
+        self.assertEqual(OrderNumberSequence.objects.get(name='order_number').next_value, 505)
+
+    def test_recreates_missing_sequence_row(self):
+        OrderNumberSequence.objects.all().delete()
+        self.assertEqual(allocate_order_number(), 'CC00000001')
+
+
+class OrderNumberInTransactionTests(TestCase):
+    def test_order_save_assigns_unique_numbers(self):
+        first = Order.objects.create(**ORDER_FIELDS)
+        second = Order.objects.create(**ORDER_FIELDS)
+
+        self.assertRegex(first.order_number, r'^CC\d{8,}$')
+        self.assertNotEqual(first.order_number, second.order_number)
+
+
+class OrderSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('amina', email='amina@example.com', first_name='Amina')
+        self.order = Order.objects.create(**{
+            **ORDER_FIELDS, 'user': self.user, 'email': 'Buyer@Example.com',
+            'billing_first_name': 'Juma', 'billing_last_name': 'Mwinyi',
+        })
+        self.other = Order.objects.create(**ORDER_FIELDS)
+
+    def search(self, query):
+        return list(search_orders(Order.objects.all(), query))
+
+    def test_exact_order_number_and_email(self):
+        self.assertEqual(self.search(self.order.order_number.lower()), [self.order])
+        self.assertEqual(self.search('buyer@example.com'), [self.order])
+
+    def test_substring_terms_match_names_and_customer(self):
+        self.assertEqual(self.search('mwin'), [self.order])
+        self.assertEqual(self.search('JUMA amina'), [self.order])
+        self.assertEqual(self.search('ju'), [self.order])
+        self.assertEqual(self.search('nobody'), [])
+
+    def test_user_rename_refreshes_search_text(self):
+        self.user.last_name = 'Salim'
+        self.user.save()
+
+        self.assertEqual(self.search('salim'), [self.order])
+
+    def test_unrelated_user_saves_skip_orders(self):
+        self.user.last_login = timezone.now()
+        with CaptureQueriesContext(connection) as queries:
+            self.user.save(update_fields=['last_login'])
+        self.assertFalse([query for query in queries if 'cart_order' in query['sql']])
+
+        self.user.email = 'salim@example.com'
+        self.user.save(update_fields=['email'])
+        self.assertEqual(self.search('salim@'), [self.order])
+
+    def test_status_saves_leave_search_text_alone(self):
+        order = Order.objects.get(pk=self.order.pk)
+        order.status = 'processing'
+        with CaptureQueriesContext(connection) as queries:
+            order.save(update_fields=['status'])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('search_text', queries[0]['sql'])
+
+        order.billing_last_name = 'Hamisi'
+        order.save(update_fields=['billing_last_name'])
+        self.assertEqual(self.search('hamisi'), [self.order])
+
+
+class OrderStockTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Sea Moss', slug='sea-moss')
+        self.product = Product.objects.create(
+            name='Gold Gel', slug='gold-gel', category=category, price='10', description='Gel.',
+        )
+        self.variant = ProductVariant.objects.create(product=self.product, name='500ml', price='12')
+        inventory.count(self.product, 5, kind='receipt')
+        inventory.count(self.product, 3, variant=self.variant, kind='receipt')
+        self.order = Order.objects.create(**ORDER_FIELDS)
+        OrderItem.objects.create(order=self.order, product=self.product, quantity=2, price=10, total=20)
+        OrderItem.objects.create(
+            order=self.order, product=self.product, variant=self.variant, quantity=3, price=12, total=36,
+        )
+
+    def totals(self):
+        self.product.refresh_from_db()
+        self.variant.refresh_from_db()
+        return [
+            (self.product.stock_quantity, self.product.reserved_quantity),
+            (self.variant.stock_quantity, self.variant.reserved_quantity),
+        ]
+
+    def test_reserve_then_sell_once(self):
+        inventory.reserve_order(self.order)
+        self.assertEqual(self.totals(), [(5, 2), (3, 3)])
+
+        self.assertTrue(inventory.fulfil_order(self.order))
+        self.assertFalse(inventory.fulfil_order(self.order))
+        self.assertFalse(inventory.release_order(self.order))
+        self.assertEqual(self.totals(), [(3, 0), (0, 0)])
+        self.assertEqual(inventory.discrepancies(), [])
+
+    def test_release_returns_reservation(self):
+        inventory.reserve_order(self.order)
+        self.assertTrue(inventory.release_order(self.order))
+        self.assertFalse(inventory.release_order(self.order))
+        self.assertEqual(self.totals(), [(5, 0), (3, 0)])
+
+    def test_reservation_is_all_or_nothing(self):
+        OrderItem.objects.filter(variant=self.variant).update(quantity=4)
+        with self.assertRaises(inventory.InsufficientStock):
+            inventory.reserve_order(self.order)
+        self.assertEqual(self.totals(), [(5, 0), (3, 0)])
+
+        self.product.allow_backorders = True
+        self.product.save()
+        inventory.reserve_order(self.order)
+        self.assertEqual(self.totals(), [(5, 2), (3, 4)])
+
+    def test_unpaid_reservations_expire(self):
+        inventory.reserve_order(self.order)
+        cutoff = timezone.now() + timedelta(minutes=1)
+        paid = Order.objects.create(**ORDER_FIELDS)
+        OrderItem.objects.create(order=paid, product=self.product, quantity=1, price=10, total=10)
+        inventory.reserve_order(paid)
+        Order.objects.filter(pk=paid.pk).update(payment_status='completed')
+
+        self.assertEqual(inventory.expire_reservations(timezone.now() - timedelta(minutes=60)), 0)
+        call_command('release_expired_reservations', minutes=-1, stdout=io.StringIO())
+        self.assertEqual(self.totals(), [(5, 1), (3, 0)])
+        self.assertEqual(inventory.expire_reservations(cutoff), 0)
+
+    def test_admin_failure_and_cancellation_release_stock(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'adminpass')
+        self.client.force_login(admin)
+        inventory.reserve_order(self.order)
+        self.client.post(reverse('admin_panel:order_update_status', args=[self.order.id]), {'status': 'failed'})
+        self.assertEqual(self.totals(), [(5, 0), (3, 0)])
+
+        other = Order.objects.create(**ORDER_FIELDS)
+        OrderItem.objects.create(order=other, product=self.product, quantity=2, price=10, total=20)
+        inventory.reserve_order(other)
+        job = BulkOrderJob.objects.create(
+            action='update_status', params={'new_status': 'cancelled'}, order_ids=[other.id], total=1,
+        )
+        run_bulk_order_job(job.id)
+        self.assertEqual(self.totals(), [(5, 0), (3, 0)])
+
+    def test_admin_payment_completion_sells_reserved_stock(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'adminpass'))
+        inventory.reserve_order(self.order)
+        self.client.post(reverse('admin_panel:order_update_status', args=[self.order.id]), {'status': 'completed'})
+        self.assertEqual(self.totals(), [(3, 0), (0, 0)])
+
+        inventory.count(self.product, 5, kind='receipt')
+        other = Order.objects.create(**ORDER_FIELDS)
+        OrderItem.objects.create(order=other, product=self.product, quantity=2, price=10, total=20)
+        inventory.reserve_order(other)
+        job = BulkOrderJob.objects.create(
+            action='update_payment', params={'new_payment_status': 'completed'}, order_ids=[other.id], total=1,
+        )
+        run_bulk_order_job(job.id)
+        self.assertEqual(self.totals(), [(3, 0), (0, 0)])
+        self.assertEqual(inventory.expire_reservations(timezone.now() + timedelta(days=1)), 0)
+
+    def test_ipn_failure_releases_stock(self):
+        inventory.reserve_order(self.order)
+        status = {'status': '200', 'status_code': 2, 'payment_status_description': 'Failed', 'payment_status': {}}
+        with patch('cart.pesapal.PesapalService.get_transaction_status', return_value=status), \
+                patch('cart.pesapal.PesapalService.__init__', return_value=None):
+            self.client.post(
+                reverse('cart:pesapal_ipn'),
+                json.dumps({'OrderTrackingId': 'T1', 'OrderMerchantReference': self.order.order_number}),
+                content_type='application/json',
+            )
+        self.order.refresh_from_db()
+        self.assertEqual((self.order.status, self.order.payment_status), ('cancelled', 'failed'))
+        self.assertEqual(self.totals(), [(5, 0), (3, 0)])
+
+    def test_payment_failed_page(self):
+        response = self.client.get(reverse('cart:payment_failed'), {'order_id': self.order.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['order'], self.order)
@@ -2,10 +2,13 @@
 from io import BytesIO
 from django.http import HttpResponse
 from django.template.loader import get_template
-from xhtml2pdf import pisa
 import logging
 
 def render_to_pdf(template_src, context_dict={}):
+    # Imported here: xhtml2pdf and reportlab are slow to load and most
+    # requests never make a PDF.
+    from xhtml2pdf import pisa
+
     template = get_template(template_src)
     html = template.render(context_dict)
     result = BytesIO()
@@ -15,8 +15,9 @@ import logging
 import json
 from .models import Cart, CartItem, Order, OrderItem
 from .forms import CheckoutForm
-from .pesapal import PesapalService
+from shop import inventory
 from shop.models import Product, ProductVariant
+from admin_panel import site_settings
 
 logger = logging.getLogger(__name__)
 
@@ -228,6 +229,7 @@ def process_payment(request):
             return redirect('cart:checkout')
 
     try:
+        from .pesapal import PesapalService
         pesapal = PesapalService()
 
         # Prepare payment data
@@ -369,52 +371,59 @@ def checkout_confirm(request):
         if form.is_valid():
             # Calculate totals
             subtotal = cart.total_price
-            shipping_cost = 5000 if subtotal < 50000 else 0  # Free shipping over 50,000 TSH
-            tax_amount = 0  # No tax for now
+            shipping_country = form.cleaned_data.get('shipping_country') or form.cleaned_data.get('billing_country')
+            shipping_cost = site_settings.shipping_cost(subtotal, shipping_country)
+            tax_amount = site_settings.tax_amount(subtotal, shipping_cost)
             total = subtotal + shipping_cost + tax_amount
 
-            # Create pending order
-            order = Order.objects.create(
-                user=request.user if request.user.is_authenticated else None,
-                email=form.cleaned_data['email'],
-                billing_first_name=form.cleaned_data['billing_first_name'],
-                billing_last_name=form.cleaned_data['billing_last_name'],
-                billing_company=form.cleaned_data.get('billing_company', ''),
-                billing_address_1=form.cleaned_data['billing_address_1'],
-                billing_address_2=form.cleaned_data.get('billing_address_2', ''),
-                billing_city=form.cleaned_data['billing_city'],
-                billing_state=form.cleaned_data['billing_state'],
-                billing_postal_code=form.cleaned_data['billing_postal_code'],
-                billing_country=form.cleaned_data.get('billing_country', 'Tanzania'),
-                billing_phone=form.cleaned_data['billing_phone'],
-                shipping_first_name=form.cleaned_data.get('shipping_first_name', form.cleaned_data['billing_first_name']),
-                shipping_last_name=form.cleaned_data.get('shipping_last_name', form.cleaned_data['billing_last_name']),
-                shipping_company=form.cleaned_data.get('shipping_company', ''),
-                shipping_address_1=form.cleaned_data.get('shipping_address_1', form.cleaned_data['billing_address_1']),
-                shipping_address_2=form.cleaned_data.get('shipping_address_2', ''),
-                shipping_city=form.cleaned_data.get('shipping_city', form.cleaned_data['billing_city']),
-                shipping_state=form.cleaned_data.get('shipping_state', form.cleaned_data['billing_state']),
-                shipping_postal_code=form.cleaned_data.get('shipping_postal_code', form.cleaned_data['billing_postal_code']),
-                shipping_country=form.cleaned_data.get('shipping_country', 'Tanzania'),
-                subtotal=subtotal,
-                shipping_cost=shipping_cost,
-                tax_amount=tax_amount,
-                total=total,
-                order_notes=form.cleaned_data.get('order_notes', ''),
-                payment_status='pending',
-                status='pending'
-            )
-
-            # Create order items
-            for cart_item in cart.items.all():
-                OrderItem.objects.create(
-                    order=order,
-                    product=cart_item.product,
-                    variant=cart_item.variant,
-                    quantity=cart_item.quantity,
-                    price=cart_item.price,
-                    total=cart_item.total_price,
-                )
+            # Create pending order and hold its stock
+            try:
+                with transaction.atomic():
+                    order = Order.objects.create(
+                        user=request.user if request.user.is_authenticated else None,
+                        email=form.cleaned_data['email'],
+                        billing_first_name=form.cleaned_data['billing_first_name'],
+                        billing_last_name=form.cleaned_data['billing_last_name'],
+                        billing_company=form.cleaned_data.get('billing_company', ''),
+                        billing_address_1=form.cleaned_data['billing_address_1'],
+                        billing_address_2=form.cleaned_data.get('billing_address_2', ''),
+                        billing_city=form.cleaned_data['billing_city'],
+                        billing_state=form.cleaned_data['billing_state'],
+                        billing_postal_code=form.cleaned_data['billing_postal_code'],
+                        billing_country=form.cleaned_data.get('billing_country', 'Tanzania'),
+                        billing_phone=form.cleaned_data['billing_phone'],
+                        shipping_first_name=form.cleaned_data.get('shipping_first_name', form.cleaned_data['billing_first_name']),
+                        shipping_last_name=form.cleaned_data.get('shipping_last_name', form.cleaned_data['billing_last_name']),
+                        shipping_company=form.cleaned_data.get('shipping_company', ''),
+                        shipping_address_1=form.cleaned_data.get('shipping_address_1', form.cleaned_data['billing_address_1']),
+                        shipping_address_2=form.cleaned_data.get('shipping_address_2', ''),
+                        shipping_city=form.cleaned_data.get('shipping_city', form.cleaned_data['billing_city']),
+                        shipping_state=form.cleaned_data.get('shipping_state', form.cleaned_data['billing_state']),
+                        shipping_postal_code=form.cleaned_data.get('shipping_postal_code', form.cleaned_data['billing_postal_code']),
+                        shipping_country=form.cleaned_data.get('shipping_country', 'Tanzania'),
+                        subtotal=subtotal,
+                        shipping_cost=shipping_cost,
+                        tax_amount=tax_amount,
+                        total=total,
+                        order_notes=form.cleaned_data.get('order_notes', ''),
+                        payment_status='pending',
+                        status='pending'
+                    )
+
+                    # Create order items
+                    for cart_item in cart.items.all():
+                        OrderItem.objects.create(
+                            order=order,
+                            product=cart_item.product,
+                            variant=cart_item.variant,
+                            quantity=cart_item.quantity,
+                            price=cart_item.price,
+                            total=cart_item.total_price,
+                        )
+                    inventory.reserve_order(order)
+            except inventory.InsufficientStock as e:
+                messages.error(request, str(e))
+                return redirect('cart:cart_detail')
 
             # Store order ID in session for guest access
             request.session['last_order_id'] = str(order.id)
@@ -485,6 +494,7 @@ def pesapal_callback(request, order_number):
 
     if transaction_id and merchant_reference == order.order_number:
         try:
+            from .pesapal import PesapalService
             pesapal = PesapalService()
             transaction_status = pesapal.get_transaction_status(transaction_id)
 
@@ -525,6 +535,7 @@ def pesapal_callback(request, order_number):
                     order.status = 'confirmed'  # Changed from 'processing' to 'confirmed'
                     order.pesapal_order_tracking_id = transaction_id
                     order.save()
+                    inventory.fulfil_order(order)
 
                     # Send confirmation email
                     try:
@@ -539,6 +550,7 @@ def pesapal_callback(request, order_number):
                     order.payment_status = 'failed'
                     order.status = 'cancelled'
                     order.save()
+                    inventory.release_order(order)
                     messages.error(request, f'Payment failed for order #{order.order_number}. Reason: {payment_status_description}')
                     return redirect(f'/cart/payment-failed/?order_id={order.id}')
 
@@ -550,6 +562,14 @@ def pesapal_callback(request, order_number):
     messages.error(request, 'Payment processing failed. Please contact support.')
     return redirect('cart:payment_failed')
 
+def _pesapal_payment_failed(transaction_status):
+    """Whether a Pesapal transaction status reports a failed, reversed or invalid payment."""
+    description = str(transaction_status.get('payment_status_description', '')).upper()
+    if any(word in description for word in ('FAILED', 'CANCELLED', 'REVERSED', 'INVALID')):
+        return True
+    # Pesapal status codes: 0 invalid, 1 completed, 2 failed, 3 reversed
+    return str(transaction_status.get('status_code')) in ('0', '2', '3')
+
 @csrf_exempt
 def pesapal_ipn(request):
     """Handle Pesapal IPN (Instant Payment Notification)."""
@@ -562,6 +582,7 @@ def pesapal_ipn(request):
             if order_tracking_id and order_merchant_reference:
                 order = get_object_or_404(Order, order_number=order_merchant_reference)
                 
+                from .pesapal import PesapalService
                 pesapal = PesapalService()
                 transaction_status = pesapal.get_transaction_status(order_tracking_id)
                 
@@ -572,12 +593,18 @@ def pesapal_ipn(request):
                         order.payment_status = 'completed'
                         order.pesapal_order_tracking_id = order_tracking_id
                         order.save()
+                        inventory.fulfil_order(order)
                         
                         # Send confirmation email
                         try:
                             send_order_confirmation_email(order)
                         except Exception as e:
                             logger.error(f"Error sending confirmation email: {str(e)}")
+                    elif order.payment_status != 'completed' and _pesapal_payment_failed(transaction_status):
+                        order.payment_status = 'failed'
+                        order.status = 'cancelled'
+                        order.save()
+                        inventory.release_order(order)
                 
                 return JsonResponse({'status': 'success'})
                 
@@ -656,7 +683,6 @@ def send_order_invoice_email(order):
 
 from django.http import HttpResponse
 from django.template.loader import get_template
-from xhtml2pdf import pisa
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 import logging
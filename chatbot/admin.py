@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ChatSession, ChatMessage, ChatbotFAQ, QuickResponse
+from .models import ChatSession, ChatMessage, ChatArchive, ChatbotFAQ, QuickResponse
 
 @admin.register(ChatSession)
 class ChatSessionAdmin(admin.ModelAdmin):
@@ -22,6 +22,23 @@ class ChatMessageAdmin(admin.ModelAdmin):
         return obj.content[:100] + "..." if len(obj.content) > 100 else obj.content
     content_preview.short_description = 'Content'
 
+@admin.register(ChatArchive)
+class ChatArchiveAdmin(admin.ModelAdmin):
+    list_display = ['session_id', 'user', 'message_count', 'transferred_to_whatsapp', 'started_at', 'archived_at']
+    list_filter = ['transferred_to_whatsapp', 'started_at']
+    search_fields = ['session_id', 'user__username', 'visitor_ip']
+    exclude = ['payload']
+    readonly_fields = [
+        'session_id', 'user', 'visitor_ip', 'started_at', 'ended_at', 'transferred_to_whatsapp',
+        'message_count', 'archived_at', 'transcript',
+    ]
+
+    def transcript(self, obj):
+        return "\n".join(f"[{message['message_type']}] {message['content']}" for message in obj.messages)
+
+    def has_add_permission(self, request):
+        return False
+
 @admin.register(ChatbotFAQ)
 class ChatbotFAQAdmin(admin.ModelAdmin):
     list_display = ['question', 'category', 'priority', 'is_active', 'created_at']
@@ -0,0 +1,204 @@
+"""
+Calls to the external chat completion API.
+
+A circuit breaker keeps a slow or failing API from holding web workers for
+the whole request timeout. Its state lives in the shared cache, so every
+worker sees it:
+
+* each failed call, and each call slower than ``LLM_SLOW_CALL_SECONDS``,
+  adds to a consecutive failure count; a good call resets it;
+* at ``LLM_FAILURE_THRESHOLD`` the breaker opens for ``LLM_OPEN_SECONDS``,
+  during which ``complete`` raises ``LLMUnavailable`` at once and the caller
+  serves its fallback;
+* afterwards a single probe request is let through; its outcome closes the
+  breaker again or reopens it.
+
+In-flight calls are capped at ``LLM_MAX_CONCURRENCY`` across all workers by a
+semaphore of cache slots. Each slot expires on its own after the request
+timeout, so a worker killed mid-call cannot leak it.
+
+Recent call latencies are kept in the cache for the admin chatbot page. That
+list is updated with a plain get/set, so a sample can be lost when two
+workers finish at the same moment; it is only used for reporting.
+"""
+
+import logging
+import time
+import uuid
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+API_URL = 'https://apps.abacus.ai/v1/chat/completions'
+MODEL = 'gpt-4.1-mini'
+CONNECT_TIMEOUT = 5
+LATENCY_SAMPLES = 200
+
+FAILURES_KEY = 'chatbot:llm:failures'
+OPEN_KEY = 'chatbot:llm:open'
+PROBE_KEY = 'chatbot:llm:probe'
+LATENCY_KEY = 'chatbot:llm:latency'
+SLOT_KEY = 'chatbot:llm:slot:{}'
+
+
+class LLMUnavailable(Exception):
+    """The breaker is open or every call slot is taken."""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _request_timeout():
+    return _setting('LLM_TIMEOUT', 30)
+
+
+def _failures():
+    return cache.get(FAILURES_KEY) or 0
+
+
+def state():
+    """``'closed'``, ``'open'`` or ``'half-open'``."""
+    if cache.get(OPEN_KEY):
+        return 'open'
+    if _failures() >= _setting('LLM_FAILURE_THRESHOLD', 5):
+        return 'half-open'
+    return 'closed'
+
+
+def allow_request():
+    current = state()
+    if current == 'open':
+        return False
+    if current == 'half-open':
+        # Only one worker gets to probe the API after the open period.
+        return cache.add(PROBE_KEY, 1, timeout=_request_timeout() + CONNECT_TIMEOUT)
+    return True
+
+
+def record_success():
+    cache.delete_many([FAILURES_KEY, OPEN_KEY, PROBE_KEY])
+
+
+def record_failure(reason):
+    cache.add(FAILURES_KEY, 0, timeout=None)
+    try:
+        failures = cache.incr(FAILURES_KEY)
+    except ValueError:
+        failures = 1
+        cache.set(FAILURES_KEY, failures, timeout=None)
+    if failures >= _setting('LLM_FAILURE_THRESHOLD', 5):
+        open_seconds = _setting('LLM_OPEN_SECONDS', 30)
+        cache.set(OPEN_KEY, time.time() + open_seconds, timeout=open_seconds)
+        cache.delete(PROBE_KEY)
+        logger.warning(f"LLM circuit opened for {open_seconds}s after {failures} failure(s): {reason}")
+
+
+def reset():
+    """Close the breaker and forget recorded latencies."""
+    cache.delete_many([FAILURES_KEY, OPEN_KEY, PROBE_KEY, LATENCY_KEY])
+
+
+def _acquire_slot():
+    token = uuid.uuid4().hex
+    timeout = _request_timeout() + CONNECT_TIMEOUT
+    for index in range(_setting('LLM_MAX_CONCURRENCY', 4)):
+        key = SLOT_KEY.format(index)
+        if cache.add(key, token, timeout=timeout):
+            return key, token
+    return None
+
+
+def _release_slot(slot):
+    key, token = slot
+    if cache.get(key) == token:
+        cache.delete(key)
+
+
+def in_flight():
+    keys = [SLOT_KEY.format(index) for index in range(_setting('LLM_MAX_CONCURRENCY', 4))]
+    return len(cache.get_many(keys))
+
+
+def _record_latency(seconds):
+    samples = cache.get(LATENCY_KEY) or []
+    samples.append(round(seconds * 1000))
+    cache.set(LATENCY_KEY, samples[-LATENCY_SAMPLES:], timeout=None)
+
+
+def latency_percentiles(percentiles=(50, 90, 99)):
+    """Nearest-rank percentiles (ms) of recent call latencies."""
+    samples = sorted(cache.get(LATENCY_KEY) or [])
+    if not samples:
+        return {}
+    return {
+        p: samples[min(len(samples) - 1, max(0, -(-p * len(samples) // 100) - 1))]
+        for p in percentiles
+    }
+
+
+def status():
+    """Breaker state and recent latency for the admin chatbot page."""
+    opened_until = cache.get(OPEN_KEY)
+    return {
+        'state': state(),
+        'failures': _failures(),
+        'failure_threshold': _setting('LLM_FAILURE_THRESHOLD', 5),
+        'reopens_in': max(0, round(opened_until - time.time())) if opened_until else 0,
+        'in_flight': in_flight(),
+        'max_concurrency': _setting('LLM_MAX_CONCURRENCY', 4),
+        'samples': len(cache.get(LATENCY_KEY) or []),
+        'percentiles': latency_percentiles(),
+    }
+
+
+def complete(messages, max_tokens=500, temperature=0.7):
+    """Return ``(reply_text, response_json)`` or raise.
+
+    Raises ``LLMUnavailable`` without calling the API when the breaker is open
+    or the concurrency limit is reached; any other exception means the call
+    was made and failed.
+    """
+    if not allow_request():
+        raise LLMUnavailable('LLM API circuit is open')
+    slot = _acquire_slot()
+    if slot is None:
+        raise LLMUnavailable('Too many LLM requests in flight')
+
+    started = time.monotonic()
+    try:
+        response = requests.post(
+            API_URL,
+            headers={
+                'Content-Type': 'application/json',
+                'Authorization': f'Bearer {settings.ABACUSAI_API_KEY}'
+            },
+            json={
+                'model': MODEL,
+                'messages': messages,
+                'max_tokens': max_tokens,
+                'temperature': temperature
+            },
+            timeout=(CONNECT_TIMEOUT, _request_timeout())
+        )
+        if response.status_code != 200:
+            raise Exception(f"LLM API error: {response.status_code}")
+        data = response.json()
+        reply = data['choices'][0]['message']['content'].strip()
+    except Exception as e:
+        _record_latency(time.monotonic() - started)
+        record_failure(str(e))
+        raise
+    finally:
+        _release_slot(slot)
+
+    elapsed = time.monotonic() - started
+    _record_latency(elapsed)
+    if elapsed > _setting('LLM_SLOW_CALL_SECONDS', 10):
+        record_failure(f"slow response ({elapsed:.1f}s)")
+    else:
+        record_success()
+    return reply, data
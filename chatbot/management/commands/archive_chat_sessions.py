@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from chatbot.storage import archive_sessions, inactive_sessions
+
+
+class Command(BaseCommand):
+    help = 'Move chat sessions with no recent activity into compressed archive rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Archive sessions idle for this many days')
+        parser.add_argument('--batch-size', type=int, default=200, help='Sessions archived per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many sessions would be archived')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+
+        if options['dry_run']:
+            count = inactive_sessions(cutoff).count()
+            self.stdout.write(f'{count} session(s) idle since {cutoff:%Y-%m-%d} would be archived.')
+            return
+
+        sessions, messages = archive_sessions(cutoff, batch_size=max(1, options['batch_size']))
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {sessions} session(s) with {messages} message(s).'
+        ))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatsession',
+            index=models.Index(fields=['started_at', 'id'], name='chatsession_started_keyset'),
+        ),
+    ]
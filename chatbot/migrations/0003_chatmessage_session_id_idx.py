@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0002_chatsession_chatsession_started_keyset'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['session', 'id'], name='chatmessage_session_id_idx'),
+        ),
+    ]
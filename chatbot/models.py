@@ -1,7 +1,12 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.utils import timezone
+from shop.models import Product
+import json
 import uuid
+import zlib
 
 class ChatSession(models.Model):
     """Track chat sessions for users"""
@@ -19,6 +24,9 @@ class ChatSession(models.Model):
     
     class Meta:
         ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['started_at', 'id'], name='chatsession_started_keyset'),
+        ]
     
     def __str__(self):
         return f"Chat Session {self.session_id} - {self.started_at.strftime('%Y-%m-%d %H:%M')}"
@@ -49,10 +57,39 @@ class ChatMessage(models.Model):
     
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            models.Index(fields=['session', 'id'], name='chatmessage_session_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.message_type}: {self.content[:50]}..."
 
+class ChatArchive(models.Model):
+    """A finished chat session and its messages, compressed into one row"""
+    session_id = models.UUIDField(unique=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    visitor_ip = models.GenericIPAddressField(null=True, blank=True)
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField(null=True, blank=True)
+    transferred_to_whatsapp = models.BooleanField(default=False)
+    message_count = models.PositiveIntegerField(default=0)
+    payload = models.BinaryField(help_text="zlib-compressed JSON list of messages")
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"Archived chat {self.session_id} ({self.message_count} messages)"
+
+    @staticmethod
+    def compress(messages):
+        return zlib.compress(json.dumps(messages, separators=(',', ':')).encode(), 9)
+
+    @property
+    def messages(self):
+        return json.loads(zlib.decompress(bytes(self.payload)))
+
 class ChatbotFAQ(models.Model):
     """Predefined FAQ responses for common questions"""
     question = models.CharField(max_length=200)
@@ -100,3 +137,10 @@ class QuickResponse(models.Model):
     
     def __str__(self):
         return self.title
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_digest(sender, **kwargs):
+    from .prompts import invalidate
+    invalidate()
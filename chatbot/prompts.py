@@ -0,0 +1,178 @@
+"""
+Prompt assembly for the chatbot's LLM path.
+
+The system prompt only depends on settings, so it is built once per process.
+Product recommendations come from a compact digest of the active catalogue
+(name, price, type, a short description and a set of search words per
+product) held in process memory, one per language and built from the cached
+``shop.localization`` projections; matching a message against it touches
+neither the database nor the cache. As with ``admin_panel.site_settings``, a
+version token in the shared cache (``carecove.versioned_cache``) tells
+workers when to reload: saving or deleting a product replaces it, and each
+process checks it at most once every ``CHATBOT_DIGEST_CHECK_INTERVAL``
+seconds.
+
+Every built prompt is logged with its build time and an estimated token count.
+"""
+
+import functools
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+from carecove.versioned_cache import VersionedCache
+from shop.models import content_language
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'chatbot:product_digest:version'
+MAX_RECOMMENDATIONS = 3
+DESCRIPTION_LENGTH = 100
+WORD_RE = re.compile(r'[a-z0-9]+')
+# Words too common in shop questions to say anything about the product.
+STOP_WORDS = {
+    'the', 'and', 'for', 'you', 'your', 'with', 'what', 'how', 'does', 'can',
+    'have', 'are', 'is', 'do', 'of', 'to', 'in', 'a', 'an', 'it', 'me', 'my',
+    'i', 'sea', 'moss', 'product', 'products', 'about', 'any', 'which', 'this',
+}
+NAME_WEIGHT, TYPE_WEIGHT, DESCRIPTION_WEIGHT = 3, 2, 1
+
+SYSTEM_PROMPT = """You are CareCove's AI assistant, helping customers with Sea Moss products from Zanzibar, Tanzania.
+
+Company Information:
+- CareCove specializes in premium Sea Moss products
+- Products are sourced from Zanzibar, Tanzania
+- We offer: Sea Moss Gel, Sea Moss Powder, Sea Moss Capsules, and Raw Sea Moss
+- WhatsApp contact: {whatsapp_number}
+- Our sea moss is natural, organic, and authentic
+
+Guidelines:
+1. Be helpful, friendly, and knowledgeable about sea moss benefits
+2. Keep responses concise but informative
+3. If asked about orders, shipping, or complex issues, suggest contacting WhatsApp
+4. Focus on health benefits, usage instructions, and product information
+5. Always maintain a professional tone
+6. If you don't know something specific, be honest and refer to WhatsApp support
+
+Please provide a helpful response to the customer's query."""
+
+_digests = VersionedCache(VERSION_KEY, 'CHATBOT_DIGEST_CHECK_INTERVAL')
+
+
+@dataclass
+class Prompt:
+    messages: list
+    products: list = field(default_factory=list)
+    build_ms: float = 0.0
+    tokens: int = 0
+
+
+@functools.lru_cache(maxsize=4)
+def _system_prompt(whatsapp_number):
+    return SYSTEM_PROMPT.format(whatsapp_number=whatsapp_number)
+
+
+def system_prompt():
+    return _system_prompt(settings.WHATSAPP_NUMBER)
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token for English)."""
+    return (len(text) + 3) // 4
+
+
+def _words(text):
+    return {word for word in WORD_RE.findall(text.lower()) if word not in STOP_WORDS and len(word) > 2}
+
+
+def _build_digest(language):
+    from shop.localization import get_products
+    from shop.models import Product
+
+    product_ids = (
+        Product.objects.filter(is_active=True)
+        .order_by('-is_featured', '-created_at')
+        .values_list('id', flat=True)
+    )
+    digest = []
+    for product in get_products(product_ids, language).values():
+        description = product['description']
+        if len(description) > DESCRIPTION_LENGTH:
+            description = description[:DESCRIPTION_LENGTH] + "..."
+        digest.append({
+            'name': product['name'],
+            'price': product['price'],
+            'description': description,
+            'url': product['url'],
+            'type': product['type'],
+            'name_words': frozenset(_words(product['name'])),
+            'type_words': frozenset(_words(f"{product['product_type']} {product['type']}")),
+            'description_words': frozenset(_words(product['description'])),
+        })
+    return digest
+
+
+def product_digest(language=None):
+    """The in-memory catalogue digest for ``language``, reloaded when products change."""
+    language = content_language(language)
+    return _digests.get(language, lambda: _build_digest(language))
+
+
+def reset():
+    """Drop this process's digest so the next read reloads it."""
+    _digests.reset()
+
+
+def invalidate():
+    """Make every worker rebuild its digest once the current transaction commits."""
+    _digests.invalidate()
+
+
+def recommend_products(message, limit=MAX_RECOMMENDATIONS, language=None):
+    """Best matching products for ``message`` as recommendation dicts."""
+    words = _words(message)
+    if not words:
+        return []
+    scored = []
+    for position, product in enumerate(product_digest(language)):
+        score = (
+            NAME_WEIGHT * len(words & product['name_words'])
+            + TYPE_WEIGHT * len(words & product['type_words'])
+            + DESCRIPTION_WEIGHT * len(words & product['description_words'])
+        )
+        if score:
+            scored.append((-score, position, product))
+    scored.sort(key=lambda item: item[:2])
+    return [
+        {key: product[key] for key in ('name', 'price', 'description', 'url', 'type')}
+        for _, _, product in scored[:limit]
+    ]
+
+
+def build_prompt(user_message, language=None):
+    """Assemble the chat completion messages for ``user_message``."""
+    started = time.perf_counter()
+    products = recommend_products(user_message, language=language)
+    content = f"Customer Query: {user_message}"
+    if products:
+        content += "\n\nRelevant Products Found:\n"
+        for product in products:
+            content += f"- {product['name']} (${product['price']}) - {product['description']}\n"
+    system = system_prompt()
+    prompt = Prompt(
+        messages=[
+            {'role': 'system', 'content': system},
+            {'role': 'user', 'content': content},
+        ],
+        products=products,
+        build_ms=(time.perf_counter() - started) * 1000,
+        tokens=estimate_tokens(system) + estimate_tokens(content),
+    )
+    logger.info(
+        f"Chat prompt built in {prompt.build_ms:.2f}ms, ~{prompt.tokens} tokens, "
+        f"{len(products)} product(s)"
+    )
+    return prompt
@@ -0,0 +1,115 @@
+"""
+Chat persistence.
+
+``chat_api`` no longer writes the user's message before answering: both
+sides of an exchange are inserted together with one ``bulk_create`` once the
+reply is known. Finished conversations are moved out of the live tables by
+``archive_sessions`` (``manage.py archive_chat_sessions``), which packs each
+session's messages into a single zlib-compressed ``ChatArchive`` row so that
+``ChatSession`` and ``ChatMessage`` only hold recent conversations.
+"""
+
+from django.db import transaction
+from django.db.models import Max
+from django.db.models.functions import Coalesce
+
+from .models import ChatArchive, ChatMessage, ChatSession
+
+ARCHIVE_FIELDS = ('id', 'message_type', 'content', 'timestamp', 'is_from_ai', 'ai_confidence', 'response_time_ms')
+
+
+def record_exchange(chat_session, user_message, reply, is_from_ai=False, response_time_ms=None):
+    """Store a user message and the bot's reply in one INSERT; return the reply."""
+    user_msg = ChatMessage(session=chat_session, message_type='user', content=user_message)
+    bot_msg = ChatMessage(
+        session=chat_session,
+        message_type='bot',
+        content=reply,
+        is_from_ai=is_from_ai,
+        response_time_ms=response_time_ms,
+    )
+    ChatMessage.objects.bulk_create([user_msg, bot_msg])
+    return bot_msg
+
+
+def inactive_sessions(cutoff):
+    """Sessions with no activity since ``cutoff``."""
+    return (
+        ChatSession.objects
+        .annotate(last_activity=Coalesce(Max('messages__timestamp'), 'started_at'))
+        .filter(started_at__lt=cutoff, last_activity__lt=cutoff)
+        .order_by()
+    )
+
+
+def _archive_batch(session_ids):
+    with transaction.atomic():
+        sessions = {
+            session.id: session
+            for session in ChatSession.objects.select_for_update().filter(id__in=session_ids)
+        }
+        messages = {session_id: [] for session_id in sessions}
+        last_seen = {}
+        rows = (
+            ChatMessage.objects.filter(session_id__in=sessions)
+            .order_by('session_id', 'id')
+            .values('session_id', *ARCHIVE_FIELDS)
+        )
+        for row in rows:
+            session_id = row.pop('session_id')
+            last_seen[session_id] = row['timestamp']
+            row['timestamp'] = row['timestamp'].isoformat()
+            messages[session_id].append(row)
+
+        # A session id can already have an archive (a session restored from a
+        # backup, say): append to it rather than dropping either side.
+        existing = {
+            archive.session_id: archive
+            for archive in ChatArchive.objects.select_for_update().filter(
+                session_id__in=[session.session_id for session in sessions.values()]
+            )
+        }
+        archives, merged = [], []
+        for session_id, session in sessions.items():
+            ended_at = session.ended_at or last_seen.get(session_id, session.started_at)
+            archive = existing.get(session.session_id)
+            if archive is None:
+                archives.append(ChatArchive(
+                    session_id=session.session_id,
+                    user_id=session.user_id,
+                    visitor_ip=session.visitor_ip,
+                    started_at=session.started_at,
+                    ended_at=ended_at,
+                    transferred_to_whatsapp=session.transferred_to_whatsapp,
+                    message_count=len(messages[session_id]),
+                    payload=ChatArchive.compress(messages[session_id]),
+                ))
+                continue
+            archived = archive.messages + messages[session_id]
+            archive.started_at = min(archive.started_at, session.started_at)
+            archive.ended_at = max(filter(None, (archive.ended_at, ended_at)))
+            archive.transferred_to_whatsapp |= session.transferred_to_whatsapp
+            archive.message_count = len(archived)
+            archive.payload = ChatArchive.compress(archived)
+            merged.append(archive)
+
+        ChatArchive.objects.bulk_create(archives)
+        ChatArchive.objects.bulk_update(
+            merged, ['started_at', 'ended_at', 'transferred_to_whatsapp', 'message_count', 'payload']
+        )
+        ChatMessage.objects.filter(session_id__in=sessions).delete()
+        ChatSession.objects.filter(id__in=sessions).delete()
+    return len(sessions), sum(len(session_messages) for session_messages in messages.values())
+
+
+def archive_sessions(cutoff, batch_size=200):
+    """Archive every session inactive since ``cutoff``; return (sessions, messages)."""
+    total_sessions = total_messages = 0
+    while True:
+        session_ids = list(inactive_sessions(cutoff).values_list('id', flat=True)[:batch_size])
+        if not session_ids:
+            break
+        sessions, messages = _archive_batch(session_ids)
+        total_sessions += sessions
+        total_messages += messages
+    return total_sessions, total_messages
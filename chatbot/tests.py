@@ -1,3 +1,213 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import Mock, patch
 
-# Create your tests here.
+import requests
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from shop.models import Category, Product
+from . import llm, prompts
+from .models import ChatArchive, ChatbotFAQ, ChatMessage, ChatSession
+from .storage import archive_sessions, record_exchange
+
+
+class ChatHistoryTests(TestCase):
+    def setUp(self):
+        self.chat = ChatSession.objects.create(session_token='token-1')
+        self.messages = [
+            ChatMessage.objects.create(session=self.chat, message_type='user', content=f'msg {i}')
+            for i in range(5)
+        ]
+        session = self.client.session
+        session['chat_session_token'] = 'token-1'
+        session.save()
+        self.url = reverse('chatbot:chat_history')
+
+    def ids(self, response):
+        return [message['id'] for message in response.json()['messages']]
+
+    def test_read_without_session_creates_nothing(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.json()['messages'], [])
+        self.assertEqual(ChatSession.objects.count(), 1)
+
+    def test_pages_and_incremental_sync(self):
+        ids = [message.id for message in self.messages]
+
+        latest = self.client.get(self.url, {'limit': 2})
+        self.assertEqual(self.ids(latest), ids[3:])
+        self.assertTrue(latest.json()['has_more'])
+
+        older = self.client.get(self.url, {'before': ids[3], 'limit': 2})
+        self.assertEqual(self.ids(older), ids[1:3])
+
+        newer = self.client.get(self.url, {'since': ids[1]})
+        self.assertEqual(self.ids(newer), ids[2:])
+        self.assertFalse(newer.json()['has_more'])
+
+    def test_unchanged_conversation_returns_304(self):
+        first = self.client.get(self.url, {'since': self.messages[-1].id})
+
+        with self.assertNumQueries(3):  # session, chat session, newest id
+            unchanged = self.client.get(
+                self.url, {'since': self.messages[-1].id}, HTTP_IF_NONE_MATCH=first['ETag'],
+            )
+        self.assertEqual(unchanged.status_code, 304)
+
+        ChatMessage.objects.create(session=self.chat, message_type='bot', content='reply')
+        changed = self.client.get(self.url, {'since': self.messages[-1].id}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual([m['content'] for m in changed.json()['messages']], ['reply'])
+
+
+class ChatStorageTests(TestCase):
+    def test_exchange_is_written_in_one_insert(self):
+        ChatbotFAQ.objects.create(question='Shipping?', keywords='shipping', answer='We ship daily.', category='shipping')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('chatbot:chat_api'), json.dumps({'message': 'How does shipping work?'}),
+                content_type='application/json',
+            )
+
+        self.assertEqual(response.json()['source'], 'faq')
+        message_writes = [q['sql'] for q in queries if 'chatbot_chatmessage' in q['sql']]
+        self.assertEqual(len(message_writes), 1)
+        messages = list(ChatMessage.objects.order_by('id').values_list('message_type', 'content'))
+        self.assertEqual(messages, [('user', 'How does shipping work?'), ('bot', 'We ship daily.')])
+        self.assertEqual(response.json()['message_id'], ChatMessage.objects.get(message_type='bot').id)
+
+    def test_archive_command_compresses_idle_sessions(self):
+        old = ChatSession.objects.create(session_token='old')
+        record_exchange(old, 'hi', 'hello', response_time_ms=5)
+        ChatSession.objects.filter(pk=old.pk).update(started_at=timezone.now() - timedelta(days=40))
+        ChatMessage.objects.filter(session=old).update(timestamp=timezone.now() - timedelta(days=40))
+        recent = ChatSession.objects.create(session_token='recent')
+        record_exchange(recent, 'hi', 'hello')
+
+        call_command('archive_chat_sessions', '--days', '30', stdout=StringIO())
+
+        self.assertEqual(list(ChatSession.objects.values_list('session_token', flat=True)), ['recent'])
+        self.assertEqual(ChatMessage.objects.count(), 2)
+        archive = ChatArchive.objects.get(session_id=old.session_id)
+        self.assertEqual(archive.message_count, 2)
+        self.assertEqual([m['content'] for m in archive.messages], ['hi', 'hello'])
+
+    def test_archiving_a_session_id_again_appends_to_its_archive(self):
+        cutoff = timezone.now() + timedelta(minutes=1)
+        session = ChatSession.objects.create()
+        record_exchange(session, 'hi', 'hello')
+        archive_sessions(cutoff)
+
+        ChatSession.objects.create(session_id=session.session_id)
+        record_exchange(ChatSession.objects.get(), 'still there?', 'yes')
+        self.assertEqual(archive_sessions(cutoff), (1, 2))
+
+        self.assertFalse(ChatMessage.objects.exists())
+        archive = ChatArchive.objects.get()
+        self.assertEqual(archive.message_count, 4)
+        self.assertEqual([m['content'] for m in archive.messages], ['hi', 'hello', 'still there?', 'yes'])
+
+
+class PromptBuilderTests(TestCase):
+    def setUp(self):
+        prompts.reset()
+        self.addCleanup(prompts.reset)
+        category = Category.objects.create(name='Sea Moss', slug='sea-moss')
+        self.gel = Product.objects.create(
+            name='Gold Sea Moss Gel', slug='gold-gel', category=category, product_type='gel',
+            price='25000', description='Smooth gel for smoothies and skin care.',
+        )
+        Product.objects.create(
+            name='Purple Capsules', slug='purple-capsules', category=category, product_type='capsules',
+            price='30000', description='Easy daily capsules.',
+        )
+
+    def test_recommendations_come_from_the_digest(self):
+        prompts.product_digest()
+
+        with self.assertNumQueries(0):
+            prompt = prompts.build_prompt('Is the gel good for smoothies?')
+
+        self.assertEqual([p['name'] for p in prompt.products], ['Gold Sea Moss Gel'])
+        self.assertEqual(prompt.products[0]['url'], self.gel.get_absolute_url())
+        self.assertEqual(prompt.messages[0]['role'], 'system')
+        self.assertIn(settings.WHATSAPP_NUMBER, prompt.messages[0]['content'])
+        self.assertIn('Gold Sea Moss Gel', prompt.messages[1]['content'])
+        self.assertGreater(prompt.tokens, 0)
+
+    def test_product_changes_refresh_the_digest(self):
+        self.assertEqual(prompts.recommend_products('capsules'), [
+            {
+                'name': 'Purple Capsules', 'price': '30000.00', 'description': 'Easy daily capsules.',
+                'url': reverse('shop:product_detail', args=['purple-capsules']), 'type': 'Sea Moss Capsules',
+            },
+        ])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.filter(slug='purple-capsules').get().delete()
+
+        self.assertEqual(prompts.recommend_products('capsules'), [])
+
+
+@override_settings(LLM_FAILURE_THRESHOLD=2, LLM_OPEN_SECONDS=60, LLM_MAX_CONCURRENCY=1)
+class CircuitBreakerTests(TestCase):
+    def setUp(self):
+        llm.reset()
+        self.addCleanup(llm.reset)
+
+    def ask(self):
+        response = self.client.post(
+            reverse('chatbot:chat_api'), json.dumps({'message': 'Tell me something'}),
+            content_type='application/json',
+        )
+        return response.json()
+
+    def test_opens_after_failures_and_serves_fallback_without_calling(self):
+        with patch('chatbot.llm.requests.post', side_effect=requests.Timeout('timed out')) as post:
+            self.assertEqual(self.ask()['source'], 'fallback')
+            self.assertEqual(self.ask()['source'], 'fallback')
+            self.assertEqual(llm.state(), 'open')
+
+            reply = self.ask()
+
+        self.assertEqual(post.call_count, 2)
+        self.assertEqual(reply['source'], 'fallback')
+        self.assertIn('circuit is open', reply['error'])
+
+    def test_probe_success_closes_the_breaker(self):
+        ok = Mock(status_code=200)
+        ok.json.return_value = {'choices': [{'message': {'content': 'Hello!'}}]}
+        with patch('chatbot.llm.requests.post', side_effect=[requests.ConnectionError(), requests.ConnectionError(), ok]):
+            self.ask()
+            self.ask()
+            cache.delete(llm.OPEN_KEY)  # open period elapsed
+            self.assertEqual(llm.state(), 'half-open')
+
+            self.assertEqual(self.ask()['source'], 'ai')
+
+        self.assertEqual(llm.state(), 'closed')
+        self.assertEqual(llm.status()['samples'], 3)
+
+    def test_concurrency_limit(self):
+        slot = llm._acquire_slot()
+        self.assertIsNotNone(slot)
+        with self.assertRaises(llm.LLMUnavailable):
+            llm.complete([])
+        llm._release_slot(slot)
+        self.assertEqual(llm.in_flight(), 0)
+
+    def test_latency_percentiles(self):
+        cache.set(llm.LATENCY_KEY, list(range(1, 101)))
+        self.assertEqual(llm.latency_percentiles(), {50: 50, 90: 90, 99: 99})
@@ -1,26 +1,29 @@
 from django.shortcuts import render
-from django.http import JsonResponse, StreamingHttpResponse
+from django.http import HttpResponseNotModified, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.conf import settings
 from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
 from django.contrib.auth.models import User
-from django.db.models import Q
+from carecove.client_ip import get_client_ip
 import json
+import logging
 import time
-import requests
 import uuid
+from . import llm
 from .models import ChatSession, ChatMessage, ChatbotFAQ, QuickResponse
-from shop.models import Product
+from .prompts import build_prompt
+from .storage import record_exchange
 
-def get_client_ip(request):
-    """Get client IP address"""
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
+logger = logging.getLogger(__name__)
+
+def get_chat_session(request):
+    """Return the visitor's active chat session without creating one."""
+    session_token = request.session.get('chat_session_token')
+    if not session_token:
+        return None
+    return ChatSession.objects.filter(session_token=session_token, is_active=True).first()
 
 def get_or_create_session(request):
     """Get or create chat session for user"""
@@ -61,28 +64,6 @@ def find_faq_response(user_message):
     
     return None
 
-def get_product_recommendations(query):
-    """Get product recommendations based on query"""
-    products = Product.objects.filter(
-        Q(name__icontains=query) | 
-        Q(description__icontains=query) | 
-        Q(product_type__icontains=query),
-        is_active=True
-    )[:3]
-    
-    if products:
-        recommendations = []
-        for product in products:
-            recommendations.append({
-                'name': product.name,
-                'price': str(product.price),
-                'description': product.description[:100] + "..." if len(product.description) > 100 else product.description,
-                'url': product.get_absolute_url(),
-                'type': product.get_product_type_display()
-            })
-        return recommendations
-    return None
-
 @csrf_exempt
 @require_http_methods(["POST"])
 def chat_api(request):
@@ -94,28 +75,18 @@ def chat_api(request):
         if not user_message:
             return JsonResponse({'error': 'Message is required'}, status=400)
         
-        # Get or create chat session
+        # Get or create chat session; messages are stored once the reply is known
         chat_session = get_or_create_session(request)
         
-        # Save user message
-        user_msg = ChatMessage.objects.create(
-            session=chat_session,
-            message_type='user',
-            content=user_message
-        )
-        
         start_time = time.time()
         
         # Check for FAQ response first
         faq_response = find_faq_response(user_message)
         if faq_response:
             response_time = int((time.time() - start_time) * 1000)
-            bot_msg = ChatMessage.objects.create(
-                session=chat_session,
-                message_type='bot',
-                content=faq_response,
-                is_from_ai=False,
-                response_time_ms=response_time
+            bot_msg = record_exchange(
+                chat_session, user_message, faq_response,
+                is_from_ai=False, response_time_ms=response_time,
             )
             return JsonResponse({
                 'message': faq_response,
@@ -124,85 +95,40 @@ def chat_api(request):
                 'response_time': response_time
             })
         
-        # Get product recommendations
-        product_recommendations = get_product_recommendations(user_message)
-        
-        # Prepare context for LLM
-        context = f"""You are CareCove's AI assistant, helping customers with Sea Moss products from Zanzibar, Tanzania.
-
-Company Information:
-- CareCove specializes in premium Sea Moss products
-- Products are sourced from Zanzibar, Tanzania
-- We offer: Sea Moss Gel, Sea Moss Powder, Sea Moss Capsules, and Raw Sea Moss
-- WhatsApp contact: {settings.WHATSAPP_NUMBER}
-- Our sea moss is natural, organic, and authentic
-
-Customer Query: {user_message}
-
-Guidelines:
-1. Be helpful, friendly, and knowledgeable about sea moss benefits
-2. Keep responses concise but informative
-3. If asked about orders, shipping, or complex issues, suggest contacting WhatsApp
-4. Focus on health benefits, usage instructions, and product information
-5. Always maintain a professional tone
-6. If you don't know something specific, be honest and refer to WhatsApp support
-
-Please provide a helpful response to the customer's query."""
-
-        # Add product recommendations to context if found
-        if product_recommendations:
-            context += f"\n\nRelevant Products Found:\n"
-            for product in product_recommendations:
-                context += f"- {product['name']} (${product['price']}) - {product['description']}\n"
+        # Static system prompt plus products matched from the in-memory digest
+        prompt = build_prompt(user_message)
+        product_recommendations = prompt.products
 
         try:
-            # Call LLM API
-            response = requests.post(
-                'https://apps.abacus.ai/v1/chat/completions',
-                headers={
-                    'Content-Type': 'application/json',
-                    'Authorization': f'Bearer {settings.ABACUSAI_API_KEY}'
-                },
-                json={
-                    'model': 'gpt-4.1-mini',
-                    'messages': [
-                        {'role': 'user', 'content': context}
-                    ],
-                    'max_tokens': 500,
-                    'temperature': 0.7
-                },
-                timeout=30
+            # Call LLM API; fails fast while the circuit breaker is open
+            bot_response, ai_response = llm.complete(prompt.messages)
+            usage = ai_response.get('usage') or {}
+            if usage:
+                logger.info(
+                    f"Chat completion used {usage.get('prompt_tokens')} prompt tokens "
+                    f"(estimated {prompt.tokens})"
+                )
+            
+            response_time = int((time.time() - start_time) * 1000)
+            
+            # Save the exchange
+            bot_msg = record_exchange(
+                chat_session, user_message, bot_response,
+                is_from_ai=True, response_time_ms=response_time,
             )
             
-            if response.status_code == 200:
-                ai_response = response.json()
-                bot_response = ai_response['choices'][0]['message']['content'].strip()
-                
-                response_time = int((time.time() - start_time) * 1000)
-                
-                # Save bot response
-                bot_msg = ChatMessage.objects.create(
-                    session=chat_session,
-                    message_type='bot',
-                    content=bot_response,
-                    is_from_ai=True,
-                    response_time_ms=response_time
-                )
-                
-                response_data = {
-                    'message': bot_response,
-                    'message_id': bot_msg.id,
-                    'source': 'ai',
-                    'response_time': response_time
-                }
-                
-                # Add product recommendations if found
-                if product_recommendations:
-                    response_data['product_recommendations'] = product_recommendations
-                
-                return JsonResponse(response_data)
-            else:
-                raise Exception(f"LLM API error: {response.status_code}")
+            response_data = {
+                'message': bot_response,
+                'message_id': bot_msg.id,
+                'source': 'ai',
+                'response_time': response_time
+            }
+            
+            # Add product recommendations if found
+            if product_recommendations:
+                response_data['product_recommendations'] = product_recommendations
+            
+            return JsonResponse(response_data)
                 
         except Exception as e:
             # Fallback response if LLM fails
@@ -220,12 +146,9 @@ How can I help you today?"""
 
             response_time = int((time.time() - start_time) * 1000)
             
-            bot_msg = ChatMessage.objects.create(
-                session=chat_session,
-                message_type='bot',
-                content=fallback_response,
-                is_from_ai=False,
-                response_time_ms=response_time
+            bot_msg = record_exchange(
+                chat_session, user_message, fallback_response,
+                is_from_ai=False, response_time_ms=response_time,
             )
             
             return JsonResponse({
@@ -257,26 +180,68 @@ def get_quick_responses(request):
     
     return JsonResponse({'quick_responses': responses_data})
 
+def _message_id_param(request, name):
+    try:
+        return max(0, int(request.GET.get(name, 0)))
+    except ValueError:
+        return 0
+
 @require_http_methods(["GET"])
 def get_chat_history(request):
-    """Get chat history for current session"""
-    chat_session = get_or_create_session(request)
-    messages = chat_session.messages.all()
-    
-    messages_data = []
-    for msg in messages:
-        messages_data.append({
-            'id': msg.id,
-            'type': msg.message_type,
-            'content': msg.content,
-            'timestamp': msg.timestamp.isoformat(),
-            'is_from_ai': msg.is_from_ai
-        })
-    
-    return JsonResponse({
-        'messages': messages_data,
-        'session_id': str(chat_session.session_id)
+    """Get chat history for current session.
+
+    Without parameters this returns the latest ``limit`` messages. Pollers
+    pass ``since=<last seen id>`` to get only newer ones; ``before=<id>``
+    pages back through older ones. Responses carry an ETag on the session's
+    newest message, so an unchanged conversation answers 304 without a
+    message query. Reading never creates a session.
+    """
+    chat_session = get_chat_session(request)
+    if chat_session is None:
+        return JsonResponse({'messages': [], 'session_id': None, 'last_id': None, 'has_more': False})
+
+    max_page = getattr(settings, 'CHAT_HISTORY_MAX_PAGE', 50)
+    limit = min(max(1, _message_id_param(request, 'limit') or max_page), max_page)
+    since = _message_id_param(request, 'since')
+    before = _message_id_param(request, 'before')
+
+    messages = chat_session.messages.order_by('id')
+    last_id = messages.values_list('id', flat=True).last()
+    etag = quote_etag(f"{chat_session.session_id}-{last_id}-{since}-{before}-{limit}")
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    fields = ('id', 'message_type', 'content', 'timestamp', 'is_from_ai')
+    if since:
+        page = list(messages.filter(id__gt=since).only(*fields)[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+    else:
+        older = messages.filter(id__lt=before) if before else messages
+        page = list(older.order_by('-id').only(*fields)[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit][::-1]
+
+    response = JsonResponse({
+        'messages': [
+            {
+                'id': msg.id,
+                'type': msg.message_type,
+                'content': msg.content,
+                'timestamp': msg.timestamp.isoformat(),
+                'is_from_ai': msg.is_from_ai
+            }
+            for msg in page
+        ],
+        'session_id': str(chat_session.session_id),
+        'last_id': last_id,
+        'has_more': has_more,
     })
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
 @csrf_exempt
 @require_http_methods(["POST"])
@@ -5,12 +5,37 @@ import multiprocessing
 import os
 
 # Server socket
-bind = "0.0.0.0:8000"
+bind = os.environ.get("GUNICORN_BIND", f"0.0.0.0:{os.environ.get('PORT', '8000')}")
 backlog = 2048
 
 # Worker processes
-workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "sync"
+#
+# GUNICORN_PROFILE picks how requests are served:
+#   sync     one request per process; a slow Pesapal, LLM or SMTP call blocks it
+#   gthread  GUNICORN_THREADS requests per process, so slow outbound calls only
+#            hold a thread; pair with DB_CONN_MAX_AGE or DB_POOL
+#   uvicorn  the ASGI application under uvicorn workers; set DB_POOL, since
+#            persistent connections are not reused under ASGI
+# The application is chosen here, so start gunicorn without an app argument.
+# `manage.py benchmark_storefront --profiles sync,gthread,uvicorn` compares them.
+profile = os.environ.get("GUNICORN_PROFILE", "sync")
+wsgi_app = "carecove.wsgi:application"
+cpus = multiprocessing.cpu_count()
+
+if profile == "gthread":
+    worker_class = "gthread"
+    workers = int(os.environ.get("GUNICORN_WORKERS", cpus + 1))
+    threads = int(os.environ.get("GUNICORN_THREADS", 4))
+elif profile == "uvicorn":
+    worker_class = "uvicorn.workers.UvicornWorker"
+    workers = int(os.environ.get("GUNICORN_WORKERS", cpus + 1))
+    wsgi_app = "carecove.asgi:application"
+elif profile == "sync":
+    worker_class = "sync"
+    workers = int(os.environ.get("GUNICORN_WORKERS", cpus * 2 + 1))
+else:
+    raise ValueError(f"Unknown GUNICORN_PROFILE {profile!r}; use sync, gthread or uvicorn")
+
 worker_connections = 1000
 timeout = 30
 keepalive = 2
@@ -52,3 +77,11 @@ worker_tmp_dir = '/dev/shm'
 limit_request_line = 4094
 limit_request_fields = 100
 limit_request_field_size = 8190
+
+
+def when_ready(server):
+    # With preload_app the application is already loaded here, so the warm-up
+    # happens once in the master and every forked worker inherits it.
+    from carecove.warmup import warm_up
+
+    warm_up()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Newsletter, EmailCampaign
+from .models import Newsletter, EmailCampaign, CampaignDelivery
 
 @admin.register(Newsletter)
 class NewsletterAdmin(admin.ModelAdmin):
@@ -20,6 +20,15 @@ class NewsletterAdmin(admin.ModelAdmin):
 
 @admin.register(EmailCampaign)
 class EmailCampaignAdmin(admin.ModelAdmin):
-    list_display = ['subject', 'status', 'created_at']
+    list_display = ['subject', 'status', 'sent_count', 'failed_count', 'total_recipients', 'created_at', 'sent_at']
     list_filter = ['status', 'created_at']
-    search_fields = ['subject']
\ No newline at end of file
+    search_fields = ['subject']
+    readonly_fields = ['sent_count', 'failed_count', 'total_recipients', 'sent_at']
+
+@admin.register(CampaignDelivery)
+class CampaignDeliveryAdmin(admin.ModelAdmin):
+    list_display = ['email', 'campaign', 'language', 'status', 'sent_at']
+    list_filter = ['status', 'language']
+    search_fields = ['email']
+    raw_id_fields = ['campaign']
+    readonly_fields = ['campaign', 'email', 'language', 'status', 'error', 'sent_at']
\ No newline at end of file
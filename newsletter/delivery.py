@@ -0,0 +1,174 @@
+"""
+Newsletter campaign delivery.
+
+Sending a campaign first queues one ``CampaignDelivery`` row per active
+subscriber, streamed with ``.iterator()`` and inserted in bulk. Pending rows
+are then sent language by language: the email templates are rendered once per
+language and only the unsubscribe link is filled in per recipient. Every
+message goes over one SMTP connection that stays open for the whole run, and
+delivery state is written back once per batch, so a run that is interrupted
+resumes with the recipients that are still pending. ``NEWSLETTER_SEND_RATE``
+caps the number of messages per second to stay under provider limits.
+"""
+
+import logging
+import smtplib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import CampaignDelivery, EmailCampaign, Newsletter
+
+logger = logging.getLogger(__name__)
+
+QUEUE_CHUNK_SIZE = 2000
+UNSUBSCRIBE_PLACEHOLDER = '__unsubscribe_url__'
+
+
+class Throttle:
+    """Sleep as needed to keep an average of ``rate`` messages per second."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.started = time.monotonic()
+        self.count = 0
+
+    def wait(self, sent):
+        self.count += sent
+        if not self.rate:
+            return
+        delay = self.started + self.count / self.rate - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def queue_recipients(campaign):
+    """Add a pending delivery for every active subscriber; safe to repeat."""
+    subscribers = (
+        Newsletter.objects.filter(is_active=True)
+        .order_by('language_preference', 'id')
+        .values_list('email', 'language_preference')
+    )
+    batch = []
+    for email, language in subscribers.iterator(chunk_size=QUEUE_CHUNK_SIZE):
+        batch.append(CampaignDelivery(campaign=campaign, email=email, language=language))
+        if len(batch) >= QUEUE_CHUNK_SIZE:
+            CampaignDelivery.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        CampaignDelivery.objects.bulk_create(batch, ignore_conflicts=True)
+    return campaign.deliveries.count()
+
+
+def render_campaign(campaign, language):
+    """Render the text and HTML bodies for one language."""
+    context = {
+        'campaign': campaign,
+        'language': language,
+        'unsubscribe_url': UNSUBSCRIBE_PLACEHOLDER,
+    }
+    return (
+        render_to_string('newsletter/campaign_email.txt', context),
+        render_to_string('newsletter/campaign_email.html', context),
+    )
+
+
+def unsubscribe_url(email):
+    path = reverse('newsletter:unsubscribe')
+    return f"{settings.SITE_URL.rstrip('/')}{path}?{urlencode({'email': email})}"
+
+
+def build_message(campaign, bodies, email):
+    text_body, html_body = bodies
+    url = unsubscribe_url(email)
+    message = EmailMultiAlternatives(
+        subject=campaign.subject,
+        body=text_body.replace(UNSUBSCRIBE_PLACEHOLDER, url),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email],
+        headers={'List-Unsubscribe': f'<{url}>'},
+    )
+    message.attach_alternative(html_body.replace(UNSUBSCRIBE_PLACEHOLDER, url), 'text/html')
+    return message
+
+
+def _send_batch(mail_connection, messages):
+    """Send over the open connection; return ``(sent_indexes, {index: error})``.
+
+    Messages go one ``send_messages`` call each so that a refused recipient
+    only fails that delivery instead of leaving the rest of the batch unknown.
+    """
+    sent, failed = [], {}
+    for index, message in enumerate(messages):
+        try:
+            mail_connection.send_messages([message])
+            sent.append(index)
+        except (smtplib.SMTPException, OSError) as e:
+            failed[index] = str(e)[:255]
+            # SMTPException is an OSError too; only reconnect on a dropped link.
+            if isinstance(e, smtplib.SMTPServerDisconnected) or not isinstance(e, smtplib.SMTPException):
+                mail_connection.close()
+                mail_connection.open()
+    return sent, failed
+
+
+def deliver_campaign(campaign_id):
+    """Send a campaign to every pending recipient, resuming earlier progress."""
+    campaign = EmailCampaign.objects.get(pk=campaign_id)
+    if campaign.status == 'sent':
+        return
+
+    campaigns = EmailCampaign.objects.filter(pk=campaign_id)
+    campaigns.update(status='sending', updated_at=timezone.now())
+    batch_size = max(1, getattr(settings, 'NEWSLETTER_BATCH_SIZE', 100))
+    throttle = Throttle(getattr(settings, 'NEWSLETTER_SEND_RATE', 0))
+    mail_connection = get_connection()
+
+    try:
+        campaigns.update(total_recipients=queue_recipients(campaign))
+        pending = campaign.deliveries.filter(status='pending')
+        languages = pending.order_by('language').values_list('language', flat=True).distinct()
+
+        mail_connection.open()
+        for language in list(languages):
+            bodies = render_campaign(campaign, language)
+            last_id = 0
+            while True:
+                # Keyset batches: no cursor stays open while rows are updated.
+                batch = list(
+                    pending.filter(language=language, id__gt=last_id)
+                    .order_by('id').values_list('id', 'email')[:batch_size]
+                )
+                if not batch:
+                    break
+                last_id = batch[-1][0]
+
+                messages = [build_message(campaign, bodies, email) for _, email in batch]
+                sent, failed = _send_batch(mail_connection, messages)
+
+                now = timezone.now()
+                CampaignDelivery.objects.filter(id__in=[batch[i][0] for i in sent]).update(
+                    status='sent', sent_at=now,
+                )
+                for index, error in failed.items():
+                    CampaignDelivery.objects.filter(id=batch[index][0]).update(status='failed', error=error)
+                campaigns.update(
+                    sent_count=F('sent_count') + len(sent),
+                    failed_count=F('failed_count') + len(failed),
+                    updated_at=now,
+                )
+                throttle.wait(len(batch))
+
+        campaigns.update(status='sent', sent_at=timezone.now())
+        logger.info(f"Campaign {campaign_id} delivered to {throttle.count} recipient(s)")
+    except Exception as e:
+        logger.error(f"Campaign {campaign_id} delivery failed: {str(e)}")
+        campaigns.update(status='failed', updated_at=timezone.now())
+    finally:
+        mail_connection.close()
@@ -0,0 +1,125 @@
+"""
+Bulk import of newsletter subscribers from CSV.
+
+The file is read row by row, emails are stripped and lowercased, and each one
+is checked against an in-memory set of every address already subscribed
+(loaded once, in chunks) plus those seen earlier in the file. New rows are
+written with ``bulk_create(ignore_conflicts=True)`` in batches, so an import
+costs one INSERT per batch and a concurrent signup of the same address is
+skipped rather than failing the whole import.
+"""
+
+import csv
+import io
+import re
+
+from django.db import transaction
+
+from .models import Newsletter
+
+IMPORT_BATCH_SIZE = 5000
+EXISTING_CHUNK_SIZE = 20000
+LANGUAGES = {'en', 'sw'}
+NAME_MAX_LENGTH = Newsletter._meta.get_field('name').max_length
+EMAIL_MAX_LENGTH = Newsletter._meta.get_field('email').max_length
+
+# Deliberately simple: one "@", no whitespace, a dot in the domain. Full
+# RFC validation would dominate the cost of a million-row import.
+EMAIL_RE = re.compile(r'^[^@\s,;<>"]+@[^@\s,;<>"]+\.[a-z0-9-]{2,}$')
+
+
+def normalize_email(value):
+    """Return the canonical form of ``value`` or ``''`` if it isn't an email."""
+    email = (value or '').strip().strip('<>').strip().lower()
+    if len(email) > EMAIL_MAX_LENGTH or not EMAIL_RE.match(email):
+        return ''
+    return email
+
+
+def existing_emails():
+    """Every subscribed address, lowercased, fetched in chunks."""
+    emails = Newsletter.objects.order_by().values_list('email', flat=True)
+    return {email.lower() for email in emails.iterator(chunk_size=EXISTING_CHUNK_SIZE)}
+
+
+def _rows(stream):
+    """Yield ``(email, name, language)`` from a CSV with or without a header."""
+    reader = csv.reader(stream)
+    columns = {'email': 0, 'name': 1, 'language': 2}
+    first = next(reader, None)
+    if first is None:
+        return
+    header = [cell.strip().lower() for cell in first]
+    if 'email' in header:
+        columns = {key: header.index(key) for key in ('email', 'name') if key in header}
+        for key in ('language', 'language_preference', 'lang'):
+            if key in header:
+                columns['language'] = header.index(key)
+                break
+        rows = reader
+    else:
+        rows = _prepend(first, reader)
+
+    email_col = columns['email']
+    name_col = columns.get('name')
+    language_col = columns.get('language')
+    for row in rows:
+        if not row:
+            continue
+        yield (
+            row[email_col] if len(row) > email_col else '',
+            row[name_col] if name_col is not None and len(row) > name_col else '',
+            row[language_col] if language_col is not None and len(row) > language_col else '',
+        )
+
+
+def _prepend(first, rows):
+    yield first
+    yield from rows
+
+
+def import_subscribers(file, activate=False, default_language='en'):
+    """Import subscribers from an uploaded (binary) CSV file.
+
+    Returns ``{'accepted': n, 'duplicates': n, 'invalid': n}``. With
+    ``activate`` the addresses are treated as already opted in; otherwise
+    they wait for approval like website signups.
+    """
+    stream = io.TextIOWrapper(file, encoding='utf-8-sig', errors='replace', newline='')
+    seen = existing_emails()
+    counts = {'accepted': 0, 'duplicates': 0, 'invalid': 0}
+    batch = []
+
+    def flush():
+        with transaction.atomic():
+            Newsletter.objects.bulk_create(batch, batch_size=IMPORT_BATCH_SIZE, ignore_conflicts=True)
+        batch.clear()
+
+    try:
+        for raw_email, name, language in _rows(stream):
+            email = normalize_email(raw_email)
+            if not email:
+                counts['invalid'] += 1
+                continue
+            if email in seen:
+                counts['duplicates'] += 1
+                continue
+            seen.add(email)
+
+            language = language.strip().lower()[:2]
+            batch.append(Newsletter(
+                email=email,
+                name=name.strip()[:NAME_MAX_LENGTH],
+                language_preference=language if language in LANGUAGES else default_language,
+                is_active=activate,
+                is_pending_approval=not activate,
+            ))
+            counts['accepted'] += 1
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                flush()
+        if batch:
+            flush()
+    finally:
+        stream.detach()
+
+    return counts
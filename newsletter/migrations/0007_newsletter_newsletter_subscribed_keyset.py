@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsletter', '0006_alter_newsletter_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='newsletter',
+            index=models.Index(fields=['subscribed_at', 'id'], name='newsletter_subscribed_keyset'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsletter', '0007_newsletter_newsletter_subscribed_keyset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailcampaign',
+            name='failed_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='emailcampaign',
+            name='sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='emailcampaign',
+            name='sent_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='emailcampaign',
+            name='total_recipients',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='emailcampaign',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='emailcampaign',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Draft'), ('scheduled', 'Scheduled'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], default='draft', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='CampaignDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254)),
+                ('language', models.CharField(default='en', max_length=2)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='newsletter.emailcampaign')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['campaign', 'status', 'language', 'id'], name='campaign_delivery_queue_idx')],
+                'constraints': [models.UniqueConstraint(fields=('campaign', 'email'), name='unique_campaign_recipient')],
+            },
+        ),
+    ]
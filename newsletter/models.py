@@ -18,16 +18,59 @@ class Newsletter(models.Model):
 
     class Meta:
         ordering = ['-subscribed_at']
+        indexes = [
+            models.Index(fields=['subscribed_at', 'id'], name='newsletter_subscribed_keyset'),
+        ]
 
 class EmailCampaign(models.Model):
     subject = models.CharField(max_length=200)
     content = models.TextField()
     status = models.CharField(
         max_length=10, 
-        choices=[('draft', 'Draft'), ('sent', 'Sent'), ('scheduled', 'Scheduled')], 
+        choices=[
+            ('draft', 'Draft'), ('scheduled', 'Scheduled'), ('sending', 'Sending'),
+            ('sent', 'Sent'), ('failed', 'Failed'),
+        ],
         default='draft'
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    total_recipients = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
-        return self.subject
\ No newline at end of file
+        return self.subject
+
+    @property
+    def progress_percent(self):
+        if not self.total_recipients:
+            return 0
+        return round((self.sent_count + self.failed_count) * 100 / self.total_recipients)
+
+class CampaignDelivery(models.Model):
+    """One recipient of a campaign; lets an interrupted send resume where it stopped"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    campaign = models.ForeignKey(EmailCampaign, on_delete=models.CASCADE, related_name='deliveries')
+    email = models.EmailField()
+    language = models.CharField(max_length=2, default='en')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    error = models.CharField(max_length=255, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.campaign_id} -> {self.email} ({self.status})"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'email'], name='unique_campaign_recipient'),
+        ]
+        indexes = [
+            models.Index(fields=['campaign', 'status', 'language', 'id'], name='campaign_delivery_queue_idx'),
+        ]
\ No newline at end of file
@@ -1,3 +1,209 @@
-from django.test import TestCase
+import io
+import logging
+import os
+import socketserver
+import threading
+import time
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .delivery import deliver_campaign
+from .importer import import_subscribers
+from .models import CampaignDelivery, EmailCampaign, Newsletter
+
+logger = logging.getLogger(__name__)
+
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept mail from smtplib and count it."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply('220 fake-smtp ready')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.reply('250 fake-smtp')
+            elif command.startswith('RCPT TO:'):
+                address = command[8:].strip('<> ').lower()
+                if address in server.refused:
+                    self.reply('550 no such user')
+                else:
+                    self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 end with .')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                with server.lock:
+                    server.messages += 1
+                self.reply('250 queued')
+            elif command == 'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, refused=()):
+        super().__init__(('127.0.0.1', 0), FakeSMTPHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = 0
+        self.refused = {address.lower() for address in refused}
+
+
+class CampaignDeliveryTests(TestCase):
+    def start_server(self, refused=()):
+        server = FakeSMTPServer(refused)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        smtp_settings = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=server.server_address[1],
+            EMAIL_USE_TLS=False, EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+            NEWSLETTER_BATCH_SIZE=50, NEWSLETTER_SEND_RATE=0,
+        )
+        smtp_settings.enable()
+        self.addCleanup(smtp_settings.disable)
+        return server
+
+    def subscribe(self, count):
+        Newsletter.objects.bulk_create(
+            Newsletter(
+                email=f'reader{i}@example.com', is_active=True, is_pending_approval=False,
+                language_preference='sw' if i % 3 == 0 else 'en',
+            )
+            for i in range(count)
+        )
+
+    def test_sends_over_one_connection_and_records_failures(self):
+        server = self.start_server(refused=['reader7@example.com'])
+        self.subscribe(120)
+        Newsletter.objects.create(email='gone@example.com', is_active=False)
+        campaign = EmailCampaign.objects.create(subject='Hello', content='<p>New sea moss gel</p>')
+
+        deliver_campaign(campaign.id)
+
+        campaign.refresh_from_db()
+        self.assertEqual(campaign.status, 'sent')
+        self.assertEqual((campaign.total_recipients, campaign.sent_count, campaign.failed_count), (120, 119, 1))
+        self.assertEqual(server.messages, 119)
+        self.assertEqual(server.connections, 1)
+        failed = CampaignDelivery.objects.get(status='failed')
+        self.assertEqual(failed.email, 'reader7@example.com')
+
+    def test_interrupted_run_resumes_with_pending_recipients(self):
+        server = self.start_server()
+        self.subscribe(80)
+        campaign = EmailCampaign.objects.create(subject='Hello', content='News', status='sending')
+        CampaignDelivery.objects.bulk_create(
+            CampaignDelivery(campaign=campaign, email=f'reader{i}@example.com', status='sent')
+            for i in range(30)
+        )
+        EmailCampaign.objects.filter(pk=campaign.pk).update(sent_count=30)
+
+        deliver_campaign(campaign.id)
+
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.status, campaign.sent_count, campaign.total_recipients), ('sent', 80, 80))
+        self.assertEqual(server.messages, 50)
+        self.assertFalse(campaign.deliveries.filter(status='pending').exists())
+
+    def test_load_against_fake_smtp(self):
+        """Set NEWSLETTER_LOAD_TEST=100000 to run the full-size delivery."""
+        count = int(os.environ.get('NEWSLETTER_LOAD_TEST', 0))
+        if not count:
+            self.skipTest('NEWSLETTER_LOAD_TEST not set')
+        server = self.start_server()
+        self.subscribe(count)
+        campaign = EmailCampaign.objects.create(subject='Load test', content='<p>Hello</p>')
+
+        with override_settings(NEWSLETTER_BATCH_SIZE=500):
+            started = time.monotonic()
+            deliver_campaign(campaign.id)
+            elapsed = time.monotonic() - started
+
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.status, campaign.sent_count), ('sent', count))
+        self.assertEqual((server.messages, server.connections), (count, 1))
+        logger.debug(f'Delivered {count} messages in {elapsed:.1f}s ({count / elapsed:.0f}/s)')
+
+
+class SubscriberImportTests(TestCase):
+    def test_normalizes_and_dedupes(self):
+        Newsletter.objects.create(email='Existing@Example.com')
+        csv_file = io.BytesIO(
+            b'\xef\xbb\xbfName,Email,Language\n'
+            b'Asha, ASHA@example.com ,sw\n'
+            b'Asha again,asha@example.com,en\n'
+            b'Old,existing@example.com,\n'
+            b'Broken,not-an-email,en\n'
+            b'Juma,juma@example.co.tz,fr\n'
+        )
+
+        counts = import_subscribers(csv_file, default_language='sw')
+
+        self.assertEqual(counts, {'accepted': 2, 'duplicates': 2, 'invalid': 1})
+        asha = Newsletter.objects.get(email='asha@example.com')
+        self.assertEqual((asha.name, asha.language_preference, asha.is_active), ('Asha', 'sw', False))
+        self.assertEqual(Newsletter.objects.get(email='juma@example.co.tz').language_preference, 'sw')
+
+    def test_admin_upload_without_header(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'adminpass')
+        self.client.force_login(admin)
+        upload = SimpleUploadedFile('list.csv', b'one@example.com,One\ntwo@example.com\n', 'text/csv')
+
+        response = self.client.post(reverse('admin_panel:newsletter_import'), {'csv_file': upload, 'activate': 'on'})
+
+        self.assertRedirects(response, reverse('admin_panel:newsletter_list'), fetch_redirect_response=False)
+        self.assertEqual(Newsletter.objects.filter(is_active=True, is_pending_approval=False).count(), 2)
+
+    def test_large_import(self):
+        """Set NEWSLETTER_IMPORT_LOAD_TEST=1000000 to time a full-size import."""
+        count = int(os.environ.get('NEWSLETTER_IMPORT_LOAD_TEST', 0))
+        if not count:
+            self.skipTest('NEWSLETTER_IMPORT_LOAD_TEST not set')
+        lines = [b'user%d@example.com,User %d,en\n' % (i, i) for i in range(count)]
+        duplicates = lines[:1000]
+
+        started = time.monotonic()
+        counts = import_subscribers(io.BytesIO(b''.join([b'email,name,language\n', *lines, *duplicates])))
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(counts, {'accepted': count, 'duplicates': len(duplicates), 'invalid': 0})
+        self.assertEqual(Newsletter.objects.count(), count)
+        logger.debug(f'Imported {count} rows in {elapsed:.1f}s')
+
+
+@override_settings(RATE_LIMITS={'newsletter': '1/h'})
+class SubscribeRateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_second_signup_from_same_client_is_refused(self):
+        url = reverse('newsletter:subscribe')
+        self.client.post(url, {'email': 'first@example.com', 'language_preference': 'en'})
+
+        response = self.client.post(url, {'email': 'second@example.com', 'language_preference': 'en'})
+
+        self.assertEqual(response.status_code, 429)
+        self.assertTemplateUsed(response, '429.html')
+        self.assertFalse(Newsletter.objects.filter(email='second@example.com').exists())
+        self.assertEqual(self.client.get(url).status_code, 200)
@@ -2,11 +2,13 @@ import logging
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.utils import timezone
+from carecove.ratelimit import rate_limit
 from .models import Newsletter
 from .forms import NewsletterForm
 
 logger = logging.getLogger(__name__)
 
+@rate_limit('newsletter')
 def subscribe(request):
     debug_info = {}
 
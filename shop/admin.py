@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.core.mail import mail_admins
-from .models import Category, Product, ProductImage, ProductVariant, ProductReview
+from . import inventory
+from .models import Category, Product, ProductImage, ProductVariant, ProductReview, StockMovement
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -19,15 +20,16 @@ class ProductImageInline(admin.TabularInline):
 class ProductVariantInline(admin.TabularInline):
     model = ProductVariant
     extra = 1
-    fields = ['name', 'sku', 'price', 'stock_quantity', 'weight', 'is_active']
+    fields = ['name', 'sku', 'price', 'stock_quantity', 'reserved_quantity', 'weight', 'is_active']
+    readonly_fields = ['stock_quantity', 'reserved_quantity']
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ['name', 'category', 'product_type', 'price', 'stock_quantity', 'is_active', 'is_featured']
+    list_display = ['name', 'category', 'product_type', 'price', 'stock_quantity', 'reserved_quantity', 'is_active', 'is_featured']
     list_filter = ['category', 'product_type', 'is_active', 'is_featured', 'created_at']
     search_fields = ['name', 'description', 'sku']
     prepopulated_fields = {'slug': ('name',)}
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['stock_quantity', 'reserved_quantity', 'created_at', 'updated_at']
     inlines = [ProductImageInline, ProductVariantInline]
     
     fieldsets = (
@@ -38,7 +40,7 @@ class ProductAdmin(admin.ModelAdmin):
             'fields': ('price', 'compare_at_price', 'cost_price')
         }),
         ('Inventory', {
-            'fields': ('sku', 'stock_quantity', 'track_inventory', 'allow_backorders')
+            'fields': ('sku', 'stock_quantity', 'reserved_quantity', 'track_inventory', 'allow_backorders')
         }),
         ('Product Details', {
             'fields': ('weight', 'origin', 'ingredients', 'benefits', 'usage_instructions')
@@ -94,9 +96,38 @@ class ProductReviewAdmin(admin.ModelAdmin):
 class ProductImageAdmin(admin.ModelAdmin):
     list_display = ['product', 'image_preview', 'alt_text', 'is_primary', 'sort_order']
     list_filter = ['is_primary', 'product']
+    list_select_related = ['product']
     
     def image_preview(self, obj):
         if obj.image:
             return format_html('<img src="{}" style="width: 50px; height: 50px; object-fit: cover;">', obj.image.url)
         return "No Image"
-    image_preview.short_description = "Preview"
\ No newline at end of file
+    image_preview.short_description = "Preview"
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    """The ledger is append-only: new movements go through ``inventory.record``."""
+    list_display = ['created_at', 'product', 'variant', 'kind', 'quantity', 'reserved', 'reference', 'created_by']
+    list_filter = ['kind', 'created_at']
+    search_fields = ['product__name', 'variant__sku', 'reference', 'note']
+    list_select_related = ['product', 'variant', 'created_by']
+    raw_id_fields = ['product', 'variant']
+    fields = ['product', 'variant', 'kind', 'quantity', 'reserved', 'reference', 'note', 'created_by', 'created_at']
+    readonly_fields = ['created_by', 'created_at']
+
+    def get_readonly_fields(self, request, obj=None):
+        if obj is not None:
+            return self.fields
+        return self.readonly_fields
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            return
+        movement = inventory.record(
+            obj.kind, obj.product, obj.variant, quantity=obj.quantity, reserved=obj.reserved,
+            reference=obj.reference, note=obj.note, user=request.user,
+        )
+        obj.pk = movement.pk
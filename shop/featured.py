@@ -0,0 +1,151 @@
+"""
+Featured content shared by the home and testimonials pages.
+
+Featured testimonials, featured products and top categories are each cached
+as a plain list of dicts, so a cache hit needs no database access and the
+payload can live in any cache backend. Each list is rebuilt with a single
+query when it is missing; saves and deletes of the underlying models drop the
+affected entry once their transaction commits. Stock movements update the
+product with ``.update()`` and fire no signal, so ``inventory.record`` calls
+``stock_changed`` to keep ``is_in_stock`` current.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.urls import reverse
+
+from testimonials.models import Testimonial
+from .models import Category, Product, ProductImage, content_language
+
+CACHE_KEYS = {
+    'testimonials': 'featured:testimonials',
+    'products': 'featured:products',
+    'categories': 'featured:categories',
+}
+FEATURED_TESTIMONIALS = 3
+FEATURED_PRODUCTS = 4
+TOP_CATEGORIES = 4
+
+
+def _file_url(field, name):
+    return field.storage.url(name) if name else ''
+
+
+def _build_testimonials():
+    image_field = Testimonial._meta.get_field('image')
+    rows = (
+        Testimonial.objects.filter(status='approved', is_featured=True)
+        .order_by('-created_at')
+        .values('id', 'name', 'location', 'title', 'content', 'rating', 'image')[:FEATURED_TESTIMONIALS]
+    )
+    testimonials = []
+    for row in rows:
+        row['image_url'] = _file_url(image_field, row.pop('image'))
+        testimonials.append(row)
+    return testimonials
+
+
+def _build_products():
+    image_field = ProductImage._meta.get_field('image')
+    rows = (
+        Product.objects.filter(is_active=True, is_featured=True)
+        .annotate(image_name=F('cover_image__image'))
+        .order_by('-created_at')
+        .values(
+            'id', 'name', 'name_sw', 'slug', 'price', 'compare_at_price',
+            'stock_quantity', 'reserved_quantity', 'track_inventory', 'allow_backorders', 'image_name',
+        )[:FEATURED_PRODUCTS]
+    )
+    products = []
+    for row in rows:
+        price, compare_at = row['price'], row['compare_at_price']
+        on_sale = bool(compare_at and compare_at > price)
+        products.append({
+            'id': row['id'],
+            'name': row['name'],
+            'name_sw': row['name_sw'],
+            'url': reverse('shop:product_detail', args=[row['slug']]),
+            'price': str(price),
+            'compare_at_price': str(compare_at) if compare_at is not None else '',
+            'is_on_sale': on_sale,
+            'sale_percentage': round((compare_at - price) / compare_at * 100) if on_sale else 0,
+            'is_in_stock': (
+                not row['track_inventory']
+                or row['stock_quantity'] > row['reserved_quantity']
+                or row['allow_backorders']
+            ),
+            'image_url': _file_url(image_field, row['image_name']),
+        })
+    return products
+
+
+def _build_categories():
+    image_field = Category._meta.get_field('image')
+    rows = (
+        Category.objects.filter(is_active=True)
+        .annotate(product_count=Count('products', filter=Q(products__is_active=True)))
+        .order_by('-product_count', 'name')
+        .values('id', 'name', 'name_sw', 'slug', 'image', 'product_count')[:TOP_CATEGORIES]
+    )
+    return [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'name_sw': row['name_sw'],
+            'url': reverse('shop:category_detail', args=[row['slug']]),
+            'image_url': _file_url(image_field, row['image']),
+            'product_count': row['product_count'],
+        }
+        for row in rows
+    ]
+
+
+BUILDERS = {
+    'testimonials': _build_testimonials,
+    'products': _build_products,
+    'categories': _build_categories,
+}
+
+
+def get_feed(kind):
+    """Return the cached payload for ``kind``, rebuilding it on a miss."""
+    payload = cache.get(CACHE_KEYS[kind])
+    if payload is None:
+        payload = BUILDERS[kind]()
+        cache.set(CACHE_KEYS[kind], payload, getattr(settings, 'FEATURED_CACHE_TIMEOUT', 3600))
+    return payload
+
+
+def featured_testimonials():
+    return get_feed('testimonials')
+
+
+def featured_products(language=None):
+    """The cached featured products, with ``display_name`` in the given or active language."""
+    swahili = content_language(language) == 'sw'
+    return [
+        {**product, 'display_name': (product['name_sw'] or product['name']) if swahili else product['name']}
+        for product in get_feed('products')
+    ]
+
+
+def top_categories():
+    return get_feed('categories')
+
+
+def invalidate(*kinds):
+    """Drop the given payloads once the current transaction commits."""
+    keys = [CACHE_KEYS[kind] for kind in kinds]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def stock_changed(product_id):
+    """Drop the featured products once the transaction commits if ``product_id`` is one of them."""
+    def drop():
+        products = cache.get(CACHE_KEYS['products'])
+        if products and any(product['id'] == product_id for product in products):
+            cache.delete(CACHE_KEYS['products'])
+
+    transaction.on_commit(drop)
@@ -32,11 +32,19 @@ class ContactForm(forms.Form):
     )
 
 class ProductForm(forms.ModelForm):
+    # Not a model field: the view records the difference as a stock movement.
+    # The hidden initial value is the stock shown when the page was loaded, so
+    # changed_data tells whether the admin edited it.
+    stock_quantity = forms.IntegerField(
+        min_value=0, required=False, show_hidden_initial=True,
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+    )
+
     class Meta:
         model = Product
         fields = [
             'name', 'name_sw', 'category', 'product_type', 'description', 'description_sw',
-            'price', 'compare_at_price', 'cost_price', 'sku', 'stock_quantity', 'weight',
+            'price', 'compare_at_price', 'cost_price', 'sku', 'weight',
             'track_inventory', 'allow_backorders', 'is_featured', 'origin', 'ingredients',
             'benefits', 'usage_instructions', 'meta_title', 'meta_description', 'is_active'
         ]
@@ -51,7 +59,6 @@ class ProductForm(forms.ModelForm):
             'compare_at_price': forms.NumberInput(attrs={'class': 'form-control'}),
             'cost_price': forms.NumberInput(attrs={'class': 'form-control'}),
             'sku': forms.TextInput(attrs={'class': 'form-control'}),
-            'stock_quantity': forms.NumberInput(attrs={'class': 'form-control'}),
             'weight': forms.NumberInput(attrs={'class': 'form-control'}),
             'track_inventory': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
             'allow_backorders': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
@@ -65,6 +72,16 @@ class ProductForm(forms.ModelForm):
             'is_active': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['stock_quantity'].initial = self.instance.stock_quantity
+
+    def loaded_stock_quantity(self):
+        """The stock on hand when the form was rendered."""
+        field = self.fields['stock_quantity']
+        name = self.add_initial_prefix('stock_quantity')
+        return field.to_python(field.hidden_widget().value_from_datadict(self.data, self.files, name))
+
 class ProductReviewForm(forms.ModelForm):
     class Meta:
         model = ProductReview
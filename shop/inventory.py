@@ -0,0 +1,295 @@
+"""
+Inventory ledger.
+
+Stock only changes through ``record``, which appends a ``StockMovement`` and
+adds its ``quantity`` and ``reserved`` to the cached ``stock_quantity`` and
+``reserved_quantity`` of the variant (or, without one, the product) with an
+``UPDATE ... SET stock_quantity = stock_quantity + n`` in the same
+transaction. Concurrent checkouts therefore never overwrite each other's
+counts, and a reservation that needs stock is refused by the same UPDATE
+when too little is available.
+
+An order reserves its stock at checkout (``reserve_order``); payment turns
+the reservation into a sale (``fulfil_order``) and a failed payment gives it
+back (``release_order``), as does cancelling the order. Status changes made
+from the admin go through ``sync_order``, which does whichever of the two the
+order's new status calls for. Movements carry the order number as
+``reference``, so the last two are safe to call more than once, e.g. from both
+the Pesapal callback and the IPN. Orders that are never paid give their stock back once
+they are ``STOCK_RESERVATION_MINUTES`` old (``manage.py
+release_expired_reservations``, run from cron).
+
+The dashboard's low-stock list covers products and variants and is built
+with a single UNION query. It is kept in the cache until the next movement
+or product change; SQLite has no materialized views, so this plays that part
+on every backend. ``manage.py reconcile_stock`` checks the cached totals
+against the ledger.
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import CharField, F, IntegerField, Sum, Value
+
+from . import featured
+from .models import Product, ProductVariant, StockMovement
+
+logger = logging.getLogger(__name__)
+
+LOW_STOCK_KEY = 'inventory:low_stock'
+LOW_STOCK_LIMIT = 50
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product, variant, requested):
+        self.product = product
+        self.variant = variant
+        self.requested = requested
+        name = f"{product.name} - {variant.name}" if variant else product.name
+        super().__init__(f"Only limited stock of {name} is available ({requested} requested)")
+
+
+def _holder(product, variant):
+    if variant is not None:
+        return ProductVariant.objects.filter(pk=variant.pk)
+    return Product.objects.filter(pk=product.pk)
+
+
+def record(kind, product, variant=None, quantity=0, reserved=0, reference='', note='', user=None,
+           check_available=False):
+    """Append a movement and apply it to the cached totals.
+
+    With ``check_available`` the movement is refused with ``InsufficientStock``
+    when it would leave less than nothing available.
+    """
+    with transaction.atomic():
+        rows = _holder(product, variant)
+        if check_available:
+            rows = rows.filter(stock_quantity__gte=F('reserved_quantity') + reserved - quantity)
+        updated = rows.update(
+            stock_quantity=F('stock_quantity') + quantity,
+            reserved_quantity=F('reserved_quantity') + reserved,
+        )
+        if not updated:
+            raise InsufficientStock(product, variant, reserved - quantity)
+        movement = StockMovement.objects.create(
+            product=product,
+            variant=variant,
+            kind=kind,
+            quantity=quantity,
+            reserved=reserved,
+            reference=reference,
+            note=note,
+            created_by=user,
+        )
+    invalidate()
+    if variant is None:
+        featured.stock_changed(product.pk)
+    return movement
+
+
+def count(product, counted, variant=None, user=None, note='', kind='adjustment'):
+    """Record whatever movement brings stock on hand to ``counted``."""
+    with transaction.atomic():
+        current = _holder(product, variant).select_for_update().values_list('stock_quantity', flat=True).get()
+        if counted == current:
+            return None
+        return record(kind, product, variant, quantity=counted - current, note=note, user=user)
+
+
+def _tracked_lines(order):
+    """``{(product, variant): quantity}`` for the order's inventory-tracked items."""
+    lines = {}
+    for item in order.items.select_related('product', 'variant'):
+        if item.product.track_inventory:
+            key = (item.product, item.variant)
+            lines[key] = lines.get(key, 0) + item.quantity
+    return lines
+
+
+def _held(order):
+    """Quantity still reserved for ``order``, by (product id, variant id)."""
+    rows = (
+        StockMovement.objects.filter(reference=order.order_number)
+        .values('product_id', 'variant_id')
+        .annotate(held=Sum('reserved'))
+        .order_by()
+    )
+    return {(row['product_id'], row['variant_id']): row['held'] for row in rows}
+
+
+def _lock(order):
+    type(order).objects.select_for_update().filter(pk=order.pk).exists()
+
+
+def reserve_order(order):
+    """Hold stock for every tracked item of a new order, or raise ``InsufficientStock``."""
+    with transaction.atomic():
+        for (product, variant), quantity in _tracked_lines(order).items():
+            record(
+                'reservation', product, variant, reserved=quantity, reference=order.order_number,
+                check_available=not product.allow_backorders,
+            )
+
+
+def fulfil_order(order):
+    """Turn a paid order's reservation into a sale; repeated calls do nothing."""
+    with transaction.atomic():
+        _lock(order)
+        if StockMovement.objects.filter(reference=order.order_number, kind='sale').exists():
+            return False
+        held = _held(order)
+        for (product, variant), quantity in _tracked_lines(order).items():
+            record(
+                'sale', product, variant, quantity=-quantity,
+                reserved=-held.get((product.pk, variant.pk if variant else None), 0),
+                reference=order.order_number,
+            )
+    logger.info(f"Stock sold for order {order.order_number}")
+    return True
+
+
+def release_order(order):
+    """Give back whatever an unpaid order still holds."""
+    with transaction.atomic():
+        _lock(order)
+        if StockMovement.objects.filter(reference=order.order_number, kind='sale').exists():
+            return False
+        held = _held(order)
+        released = False
+        for (product, variant) in _tracked_lines(order):
+            quantity = held.get((product.pk, variant.pk if variant else None), 0)
+            if quantity:
+                record('release', product, variant, reserved=-quantity, reference=order.order_number)
+                released = True
+    return released
+
+
+def releases_stock(order):
+    """Whether ``order`` is in a state that should no longer hold stock."""
+    return order.status == 'cancelled' or order.payment_status == 'failed'
+
+
+def sync_order(order):
+    """Release or sell the order's stock to match its status; return whether anything moved."""
+    if releases_stock(order):
+        return release_order(order)
+    if order.payment_status == 'completed':
+        return fulfil_order(order)
+    return False
+
+
+def expire_reservations(cutoff):
+    """Release what unpaid orders placed before ``cutoff`` still hold; return how many."""
+    from cart.models import Order
+
+    holding = (
+        StockMovement.objects.order_by().values('reference')
+        .annotate(held=Sum('reserved')).filter(held__gt=0).values('reference')
+    )
+    orders = Order.objects.filter(payment_status='pending', created_at__lt=cutoff, order_number__in=holding)
+    released = 0
+    for order in orders.iterator():
+        if release_order(order):
+            released += 1
+    if released:
+        logger.info(f"Released stock held by {released} unpaid order(s) placed before {cutoff}")
+    return released
+
+
+def _build_low_stock(threshold):
+    available = F('stock_quantity') - F('reserved_quantity')
+    products = (
+        Product.objects.filter(is_active=True, track_inventory=True)
+        .annotate(
+            item_product=F('pk'),
+            item_name=F('name'),
+            item_variant=Value(None, output_field=IntegerField()),
+            item_variant_name=Value('', output_field=CharField()),
+            item_sku=F('sku'),
+            item_available=available,
+        )
+        .filter(item_available__lte=threshold)
+    )
+    variants = (
+        ProductVariant.objects.filter(is_active=True, product__is_active=True, product__track_inventory=True)
+        .annotate(
+            item_product=F('product_id'),
+            item_name=F('product__name'),
+            item_variant=F('pk'),
+            item_variant_name=F('name'),
+            item_sku=F('sku'),
+            item_available=available,
+        )
+        .filter(item_available__lte=threshold)
+    )
+    columns = ('item_product', 'item_name', 'item_variant', 'item_variant_name', 'item_sku', 'item_available')
+    rows = (
+        products.order_by().values_list(*columns)
+        .union(variants.order_by().values_list(*columns), all=True)
+        .order_by('item_available', 'item_name')[:LOW_STOCK_LIMIT]
+    )
+    return [
+        {
+            'product_id': product_id,
+            'name': name,
+            'variant_id': variant_id,
+            'variant_name': variant_name,
+            'sku': sku,
+            'available': available,
+        }
+        for product_id, name, variant_id, variant_name, sku, available in rows
+    ]
+
+
+def low_stock():
+    """Products and variants at or below ``LOW_STOCK_THRESHOLD``, lowest first."""
+    items = cache.get(LOW_STOCK_KEY)
+    if items is None:
+        items = _build_low_stock(getattr(settings, 'LOW_STOCK_THRESHOLD', 10))
+        cache.set(LOW_STOCK_KEY, items, getattr(settings, 'LOW_STOCK_CACHE_TIMEOUT', 3600))
+    return items
+
+
+def invalidate():
+    """Drop the low-stock list once the current transaction commits."""
+    transaction.on_commit(lambda: cache.delete(LOW_STOCK_KEY))
+
+
+def discrepancies():
+    """Holders whose cached totals differ from their ledger, in one grouped query.
+
+    Returns ``(product_id, variant_id, cached, ledger)`` tuples where
+    ``cached`` and ``ledger`` are ``(stock, reserved)`` pairs. Holders without
+    any movement are not visited: their totals can only be non-zero if they
+    were written outside ``record``.
+    """
+    rows = (
+        StockMovement.objects.values(
+            'product_id', 'variant_id',
+            'product__stock_quantity', 'product__reserved_quantity',
+            'variant__stock_quantity', 'variant__reserved_quantity',
+        )
+        .annotate(stock=Sum('quantity'), held=Sum('reserved'))
+        .order_by('product_id', 'variant_id')
+    )
+    found = []
+    for row in rows:
+        holder = 'variant' if row['variant_id'] else 'product'
+        cached = (row[f'{holder}__stock_quantity'], row[f'{holder}__reserved_quantity'])
+        ledger = (row['stock'], row['held'])
+        if cached != ledger:
+            found.append((row['product_id'], row['variant_id'], cached, ledger))
+    return found
+
+
+def repair(product_id, variant_id, ledger):
+    """Overwrite one holder's cached totals with its ledger sums."""
+    stock, reserved = ledger
+    rows = ProductVariant.objects.filter(pk=variant_id) if variant_id else Product.objects.filter(pk=product_id)
+    rows.update(stock_quantity=stock, reserved_quantity=reserved)
+    invalidate()
+    if not variant_id:
+        featured.stock_changed(product_id)
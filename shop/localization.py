@@ -0,0 +1,80 @@
+"""
+Localized product projections.
+
+``Product.objects.localized()`` picks the English or Swahili columns in SQL
+for querysets rendered into templates or exports. Code that looks up the
+same products again and again by id (the chatbot's catalogue digest) uses
+``get_products`` instead: one small dict per (product, language), kept in the
+cache and dropped when the product is saved or deleted. A Swahili lookup
+therefore costs the same as an English one.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+
+from .models import Product, content_language
+
+CACHE_KEY = 'product:l10n:{}:{}'
+CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def _key(product_id, language):
+    return CACHE_KEY.format(product_id, language)
+
+
+def _build(product_ids, language):
+    type_labels = dict(Product.PRODUCT_TYPES)
+    rows = (
+        Product.objects.filter(id__in=product_ids)
+        .localized(language)
+        .order_by()
+        .values('id', 'slug', 'price', 'product_type', 'is_active', 'display_name', 'display_description')
+    )
+    return {
+        row['id']: {
+            'id': row['id'],
+            'name': row['display_name'],
+            'description': row['display_description'],
+            'url': reverse('shop:product_detail', args=[row['slug']]),
+            'price': str(row['price']),
+            'product_type': row['product_type'],
+            'type': type_labels.get(row['product_type'], row['product_type']),
+            'is_active': row['is_active'],
+        }
+        for row in rows
+    }
+
+
+def get_products(product_ids, language=None):
+    """Return ``{id: projection}`` for ``product_ids`` in ``language``.
+
+    Ids that don't exist are left out. The result follows the order of
+    ``product_ids``.
+    """
+    language = content_language(language)
+    product_ids = list(product_ids)
+    keys = {product_id: _key(product_id, language) for product_id in product_ids}
+    cached = cache.get_many(keys.values())
+    found = {product_id: cached[key] for product_id, key in keys.items() if key in cached}
+
+    missing = [product_id for product_id in product_ids if product_id not in found]
+    if missing:
+        built = _build(missing, language)
+        cache.set_many(
+            {keys[product_id]: projection for product_id, projection in built.items()},
+            getattr(settings, 'PRODUCT_L10N_CACHE_TIMEOUT', CACHE_TIMEOUT),
+        )
+        found.update(built)
+    return {product_id: found[product_id] for product_id in product_ids if product_id in found}
+
+
+def get_product(product_id, language=None):
+    return get_products([product_id], language).get(product_id)
+
+
+def invalidate(product_id):
+    """Drop every language's projection of a product once the transaction commits."""
+    keys = [_key(product_id, content_language(code)) for code, _ in settings.LANGUAGES]
+    transaction.on_commit(lambda: cache.delete_many(keys))
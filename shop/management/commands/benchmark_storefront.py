@@ -0,0 +1,132 @@
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle, islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from shop.models import Category, Product
+
+READY_PATH = '/health/ready/'
+
+
+def storefront_paths():
+    """The pages a shopper walks through, using a few real products and categories."""
+    paths = ['/', '/shop/', '/search/?q=care', '/about/']
+    paths += [f'/product/{slug}/' for slug in Product.objects.filter(is_active=True).values_list('slug', flat=True)[:5]]
+    paths += [f'/category/{slug}/' for slug in Category.objects.filter(is_active=True).values_list('slug', flat=True)[:2]]
+    return paths
+
+
+def _fetch(url, timeout):
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            ok = response.status < 400
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def run_load(base_url, paths, total=200, concurrency=10, timeout=30):
+    """Request ``paths`` round-robin ``total`` times from ``concurrency`` threads."""
+    urls = [base_url.rstrip('/') + path for path in islice(cycle(paths), total)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda url: _fetch(url, timeout), urls))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': total,
+        'errors': sum(1 for _, ok in results if not ok),
+        'seconds': elapsed,
+        'rps': total / elapsed if elapsed else 0.0,
+        'p50': quantiles[49],
+        'p95': quantiles[94],
+        'p99': quantiles[98],
+    }
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(base_url, server, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            return False
+        if _fetch(base_url + READY_PATH, timeout=2)[1]:
+            return True
+        time.sleep(0.25)
+    return False
+
+
+class Command(BaseCommand):
+    help = 'Load-test the storefront, against a running server or gunicorn started once per worker profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Base URL of an already running server')
+        parser.add_argument(
+            '--profiles', default='sync,gthread',
+            help='Comma-separated GUNICORN_PROFILE values to start and compare when --url is not given',
+        )
+        parser.add_argument('--requests', type=int, default=500, help='Requests per run')
+        parser.add_argument('--concurrency', type=int, default=20, help='Concurrent clients')
+        parser.add_argument('--workers', type=int, default=2, help='Gunicorn workers per profile')
+
+    def handle(self, *args, **options):
+        paths = storefront_paths()
+        if options['url']:
+            self._report(options['url'], self._run(options['url'], paths, options))
+            return
+
+        results = []
+        for profile in [name.strip() for name in options['profiles'].split(',') if name.strip()]:
+            port = _free_port()
+            base_url = f'http://127.0.0.1:{port}'
+            env = dict(
+                os.environ,
+                GUNICORN_PROFILE=profile,
+                GUNICORN_BIND=f'127.0.0.1:{port}',
+                GUNICORN_WORKERS=str(options['workers']),
+            )
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--pid', f'/tmp/benchmark-{port}.pid'],
+                cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            try:
+                if not _wait_ready(base_url, server):
+                    raise CommandError(f'gunicorn did not become ready with GUNICORN_PROFILE={profile}')
+                # One pass to load templates and fill caches in every worker.
+                run_load(base_url, paths, total=len(paths) * options['workers'], concurrency=options['workers'])
+                results.append((profile, self._run(base_url, paths, options)))
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+        for profile, stats in results:
+            self._report(profile, stats)
+
+    def _run(self, base_url, paths, options):
+        return run_load(base_url, paths, total=options['requests'], concurrency=options['concurrency'])
+
+    def _report(self, label, stats):
+        line = (
+            f"{label:>10}: {stats['rps']:7.1f} req/s  p50 {stats['p50'] * 1000:6.0f}ms  "
+            f"p95 {stats['p95'] * 1000:6.0f}ms  p99 {stats['p99'] * 1000:6.0f}ms  "
+            f"{stats['errors']}/{stats['requests']} errors"
+        )
+        self.stdout.write(self.style.ERROR(line) if stats['errors'] else self.style.SUCCESS(line))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from shop.inventory import discrepancies, repair
+
+
+class Command(BaseCommand):
+    help = 'Check cached product and variant stock totals against the inventory ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Overwrite mismatched totals with the ledger sums')
+
+    def handle(self, *args, **options):
+        found = discrepancies()
+        if not found:
+            self.stdout.write(self.style.SUCCESS('Stock totals match the ledger.'))
+            return
+
+        for product_id, variant_id, cached, ledger in found:
+            holder = f'product {product_id}' + (f' variant {variant_id}' if variant_id else '')
+            self.stdout.write(
+                f'{holder}: cached {cached[0]} on hand / {cached[1]} reserved, '
+                f'ledger {ledger[0]} / {ledger[1]}'
+            )
+            if options['fix']:
+                repair(product_id, variant_id, ledger)
+
+        if options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'Repaired {len(found)} stock total(s).'))
+        else:
+            raise CommandError(f'{len(found)} stock total(s) differ from the ledger; rerun with --fix to repair.')
@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from shop.inventory import expire_reservations
+
+
+class Command(BaseCommand):
+    help = 'Give back the stock held by unpaid orders older than the reservation period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--minutes', type=int, default=settings.STOCK_RESERVATION_MINUTES,
+            help='Release reservations of pending orders placed this many minutes ago or earlier',
+        )
+
+    def handle(self, *args, **options):
+        released = expire_reservations(timezone.now() - timedelta(minutes=options['minutes']))
+        self.stdout.write(self.style.SUCCESS(f'Released the reservations of {released} unpaid order(s).'))
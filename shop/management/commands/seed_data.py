@@ -1,6 +1,7 @@
 
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
+from shop import inventory
 from shop.models import Category, Product, ProductImage, ProductVariant
 from testimonials.models import Testimonial
 from newsletter.models import Newsletter
@@ -220,6 +221,7 @@ class Command(BaseCommand):
         products = []
         for prod_data in products_data:
             category = categories[prod_data.pop('category')]
+            stock_quantity = prod_data.pop('stock_quantity')
             product, created = Product.objects.get_or_create(
                 name=prod_data['name'],
                 defaults={
@@ -230,6 +232,7 @@ class Command(BaseCommand):
             products.append(product)
             if created:
                 self.stdout.write(f'Created product: {product.name}')
+                inventory.count(product, stock_quantity, kind='receipt', note='Seed data')
 
                 # Create variants for some products
                 if 'gel' in product.product_type:
@@ -260,8 +263,8 @@ class Command(BaseCommand):
 
                 for variant_data in variants_data:
                     variant_data['product'] = product
-                    variant_data['stock_quantity'] = 50
-                    ProductVariant.objects.create(**variant_data)
+                    variant = ProductVariant.objects.create(**variant_data)
+                    inventory.count(product, 50, variant=variant, kind='receipt', note='Seed data')
 
         # Create sample testimonials
         testimonials_data = [
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def populate_cover_image(apps, schema_editor):
+    Product = apps.get_model('shop', 'Product')
+    ProductImage = apps.get_model('shop', 'ProductImage')
+    first_image = (
+        ProductImage.objects.filter(product=OuterRef('pk'))
+        .order_by('-is_primary', 'sort_order', 'id')
+        .values('id')[:1]
+    )
+    Product.objects.update(cover_image=Subquery(first_image))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='cover_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='shop.productimage'),
+        ),
+        migrations.RunPython(populate_cover_image, migrations.RunPython.noop),
+    ]
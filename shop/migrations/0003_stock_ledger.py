@@ -0,0 +1,73 @@
+# Generated by Django 5.2.4 on 2026-10-19 19:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def open_ledger(apps, schema_editor):
+    """Record the hand-maintained quantities as opening balances."""
+    Product = apps.get_model('shop', 'Product')
+    ProductVariant = apps.get_model('shop', 'ProductVariant')
+    StockMovement = apps.get_model('shop', 'StockMovement')
+    movements = [
+        StockMovement(product_id=pk, kind='adjustment', quantity=stock, note='Opening balance')
+        for pk, stock in Product.objects.exclude(stock_quantity=0).values_list('pk', 'stock_quantity')
+    ]
+    movements += [
+        StockMovement(product_id=product_id, variant_id=pk, kind='adjustment', quantity=stock, note='Opening balance')
+        for pk, product_id, stock in ProductVariant.objects.exclude(stock_quantity=0).values_list(
+            'pk', 'product_id', 'stock_quantity',
+        )
+    ]
+    StockMovement.objects.bulk_create(movements, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0002_product_cover_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='reserved_quantity',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='productvariant',
+            name='reserved_quantity',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='stock_quantity',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='productvariant',
+            name='stock_quantity',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('receipt', 'Receipt'), ('reservation', 'Reservation'), ('release', 'Reservation released'), ('sale', 'Sale'), ('return', 'Return'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('quantity', models.IntegerField(default=0)),
+                ('reserved', models.IntegerField(default=0)),
+                ('reference', models.CharField(blank=True, db_index=True, max_length=100)),
+                ('note', models.CharField(blank=True, max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='shop.product')),
+                ('variant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='shop.productvariant')),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
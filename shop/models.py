@@ -1,8 +1,13 @@
 
 from django.db import models
+from django.db.models import Avg, Count, F, Prefetch, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Left, NullIf
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils.text import slugify
+from django.utils.translation import get_language
 from PIL import Image
 
 class Category(models.Model):
@@ -29,6 +34,105 @@ class Category(models.Model):
     def get_absolute_url(self):
         return reverse('shop:category_detail', args=[self.slug])
 
+# English column -> Swahili translation column
+TRANSLATED_FIELDS = {'name': 'name_sw', 'description': 'description_sw'}
+
+
+def content_language(language=None):
+    """``'sw'`` or ``'en'`` for ``language`` (default: the active language)."""
+    return 'sw' if (language or get_language() or '').lower().startswith('sw') else 'en'
+
+
+def translated(field, language=None):
+    """SQL expression for ``field`` in ``language``; blank translations fall back to English."""
+    if content_language(language) == 'sw':
+        output_field = Product._meta.get_field(field)
+        return Coalesce(
+            NullIf(TRANSLATED_FIELDS[field], Value('', output_field=output_field)), F(field),
+            output_field=output_field,
+        )
+    return F(field)
+
+
+# Columns rendered by product cards (shop grids, admin list); the long text
+# fields are left in the database.
+CARD_FIELDS = (
+    'id', 'name', 'slug', 'sku', 'category', 'cover_image', 'product_type', 'price', 'compare_at_price',
+    'stock_quantity', 'reserved_quantity', 'track_inventory', 'allow_backorders', 'is_active', 'is_featured',
+    'created_at',
+)
+CARD_DESCRIPTION_LENGTH = 200
+EXPORT_FIELDS = (
+    'id', 'name', 'sku', 'category__name', 'price', 'stock_quantity', 'is_active', 'created_at',
+)
+
+
+# Cover/gallery order: the primary image first, then by sort order.
+IMAGE_ORDER = ('-is_primary', 'sort_order', 'id')
+
+
+def gallery_prefetch():
+    """Prefetch ``images`` for gallery pages, cover image first."""
+    return Prefetch('images', queryset=ProductImage.objects.order_by(*IMAGE_ORDER))
+
+
+def refresh_cover_image(product_id):
+    """Point ``Product.cover_image`` at the product's primary (else first) image."""
+    cover = ProductImage.objects.filter(product_id=product_id).order_by(*IMAGE_ORDER).values('id')[:1]
+    Product.objects.filter(pk=product_id).update(cover_image=Subquery(cover))
+
+
+class ProductQuerySet(models.QuerySet):
+    def localized(self, language=None, description_length=None):
+        """Add ``display_name``/``display_description`` in the given or active language.
+
+        The language is picked in SQL, so the ``*_sw`` columns are never loaded.
+        ``description_length`` truncates the description in the query as well.
+        """
+        description = translated('description', language)
+        if description_length:
+            description = Left(description, description_length)
+        return self.annotate(
+            display_name=translated('name', language),
+            display_description=description,
+        ).defer(*TRANSLATED_FIELDS.values())
+
+    def with_ratings(self):
+        """Annotate approved review count and average rating (see ``Product.average_rating``)."""
+        approved = Q(reviews__is_approved=True)
+        return self.annotate(
+            approved_review_count=Count('reviews', filter=approved),
+            approved_rating=Avg('reviews__rating', filter=approved),
+        )
+
+    def for_card(self, language=None):
+        """Product grids: card columns only, category, cover image and ratings.
+
+        The rating aggregates add a GROUP BY, which drops ``Meta.ordering``,
+        so the newest-first order is set explicitly (with ``id`` to break
+        ties) to keep pagination stable.
+        """
+        return (
+            self.localized(language, description_length=CARD_DESCRIPTION_LENGTH)
+            .only(*CARD_FIELDS)
+            .select_related('category', 'cover_image')
+            .with_ratings()
+            .order_by('-created_at', 'id')
+        )
+
+    def for_detail(self, language=None):
+        """The product page: every column but the translations, with gallery and variants."""
+        return (
+            self.localized(language)
+            .select_related('category', 'cover_image')
+            .prefetch_related(gallery_prefetch(), 'variants')
+        )
+
+    def for_export(self, language=None):
+        """CSV/HTML exports: the exported columns only."""
+        return self.localized(language).only(*EXPORT_FIELDS).select_related('category')
+
+
 class Product(models.Model):
     PRODUCT_TYPES = [
         ('gel', 'Sea Moss Gel'),
@@ -50,9 +154,10 @@ class Product(models.Model):
     compare_at_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     cost_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     
-    # Inventory
+    # Inventory; the quantities are running totals of StockMovement, see shop.inventory
     sku = models.CharField(max_length=50, unique=True, blank=True)
-    stock_quantity = models.PositiveIntegerField(default=0)
+    stock_quantity = models.IntegerField(default=0, editable=False)
+    reserved_quantity = models.IntegerField(default=0, editable=False)
     track_inventory = models.BooleanField(default=True)
     allow_backorders = models.BooleanField(default=False)
     
@@ -68,11 +173,18 @@ class Product(models.Model):
     meta_description = models.CharField(max_length=160, blank=True)
     is_active = models.BooleanField(default=True)
     is_featured = models.BooleanField(default=False)
+
+    # Primary (else first) image; maintained by the ProductImage signals below
+    cover_image = models.ForeignKey(
+        'ProductImage', on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='+',
+    )
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
 
@@ -89,11 +201,15 @@ class Product(models.Model):
     def get_absolute_url(self):
         return reverse('shop:product_detail', args=[self.slug])
 
+    @property
+    def available_quantity(self):
+        return self.stock_quantity - self.reserved_quantity
+
     @property
     def is_in_stock(self):
         if not self.track_inventory:
             return True
-        return self.stock_quantity > 0 or self.allow_backorders
+        return self.available_quantity > 0 or self.allow_backorders
 
     @property
     def is_on_sale(self):
@@ -107,6 +223,8 @@ class Product(models.Model):
 
     @property
     def average_rating(self):
+        if hasattr(self, 'approved_rating'):
+            return round(self.approved_rating, 1) if self.approved_rating else 0
         reviews = self.reviews.filter(is_approved=True)
         if reviews:
             return round(sum([review.rating for review in reviews]) / len(reviews), 1)
@@ -114,6 +232,8 @@ class Product(models.Model):
 
     @property
     def review_count(self):
+        if hasattr(self, 'approved_review_count'):
+            return self.approved_review_count
         return self.reviews.filter(is_approved=True).count()
 
 class ProductImage(models.Model):
@@ -127,7 +247,7 @@ class ProductImage(models.Model):
         ordering = ['sort_order', 'id']
 
     def __str__(self):
-        return f"{self.product.name} - Image {self.id}"
+        return f"Image {self.id} of product {self.product_id}"
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
@@ -144,7 +264,8 @@ class ProductVariant(models.Model):
     name = models.CharField(max_length=100)  # e.g., "250g", "500g", "1kg"
     sku = models.CharField(max_length=50, unique=True, blank=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
-    stock_quantity = models.PositiveIntegerField(default=0)
+    stock_quantity = models.IntegerField(default=0, editable=False)
+    reserved_quantity = models.IntegerField(default=0, editable=False)
     weight = models.DecimalField(max_digits=8, decimal_places=2, blank=True, null=True)
     is_active = models.BooleanField(default=True)
 
@@ -156,6 +277,45 @@ class ProductVariant(models.Model):
             self.sku = f"{self.product.sku}-{slugify(self.name)}"
         super().save(*args, **kwargs)
 
+    @property
+    def available_quantity(self):
+        return self.stock_quantity - self.reserved_quantity
+
+class StockMovement(models.Model):
+    """One entry of the append-only inventory ledger.
+
+    A movement applies to the variant when one is set, otherwise to the
+    product itself. ``quantity`` changes the stock on hand and ``reserved``
+    the quantity held for unpaid orders; ``shop.inventory`` adds both to the
+    holder's cached totals in the same transaction.
+    """
+    KIND_CHOICES = [
+        ('receipt', 'Receipt'),
+        ('reservation', 'Reservation'),
+        ('release', 'Reservation released'),
+        ('sale', 'Sale'),
+        ('return', 'Return'),
+        ('adjustment', 'Adjustment'),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_movements')
+    variant = models.ForeignKey(
+        ProductVariant, on_delete=models.CASCADE, null=True, blank=True, related_name='stock_movements',
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    quantity = models.IntegerField(default=0)
+    reserved = models.IntegerField(default=0)
+    reference = models.CharField(max_length=100, blank=True, db_index=True)
+    note = models.CharField(max_length=200, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+
+    def __str__(self):
+        return f"{self.get_kind_display()} of product {self.product_id}: {self.quantity:+d} / {self.reserved:+d} reserved"
+
 class ProductReview(models.Model):
     RATING_CHOICES = [
         (1, '1 Star'),
@@ -179,3 +339,36 @@ class ProductReview(models.Model):
 
     def __str__(self):
         return f"{self.product.name} - {self.rating} stars by {self.user.username}"
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_featured_products(sender, instance, **kwargs):
+    from .featured import invalidate
+    from . import localization
+    from . import inventory
+    invalidate('products', 'categories')
+    localization.invalidate(instance.pk)
+    inventory.invalidate()
+
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+def invalidate_low_stock(sender, **kwargs):
+    from . import inventory
+    inventory.invalidate()
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def update_cover_image(sender, instance, **kwargs):
+    from .featured import invalidate
+    refresh_cover_image(instance.product_id)
+    invalidate('products')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_featured_categories(sender, **kwargs):
+    from .featured import invalidate
+    invalidate('categories')
@@ -0,0 +1,21 @@
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+
+def _tag(path):
+    if path.endswith('.js'):
+        return format_html('<script src="{}"></script>', static(path))
+    return format_html('<link rel="stylesheet" href="{}">', static(path))
+
+
+@register.simple_tag
+def bundle(name):
+    """Link a ``STATIC_BUNDLES`` bundle once it has been built, otherwise its sources."""
+    if name in getattr(staticfiles_storage, 'hashed_files', {}):
+        return _tag(name)
+    return format_html_join('\n', '{}', ((_tag(source),) for source in settings.STATIC_BUNDLES[name]))
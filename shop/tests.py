@@ -1,3 +1,322 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import LiveServerTestCase, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from testimonials.models import Testimonial
+
+from . import featured, inventory, localization
+from .management.commands.benchmark_storefront import run_load, storefront_paths
+from .models import Category, Product, ProductImage, ProductReview, ProductVariant, refresh_cover_image
+
+
+class FeaturedFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Gels', slug='gels')
+        for i in range(3):
+            Product.objects.create(
+                name=f'Gel {i}', slug=f'gel-{i}', sku=f'GEL-{i}', category=self.category,
+                description='Sea moss', price=10000, compare_at_price=12500 if i == 0 else None,
+                is_featured=i < 2,
+            )
+        Testimonial.objects.create(
+            name='Asha', email='asha@example.com', title='Great', content='Loved it',
+            status='approved', is_featured=True,
+        )
+
+    def test_each_feed_is_one_query_then_cached(self):
+        for kind in featured.BUILDERS:
+            with self.assertNumQueries(1):
+                featured.get_feed(kind)
+
+        with self.assertNumQueries(0):
+            products = featured.featured_products()
+            categories = featured.top_categories()
+            testimonials = featured.featured_testimonials()
+
+        self.assertEqual([p['name'] for p in products], ['Gel 1', 'Gel 0'])
+        self.assertEqual(products[1]['sale_percentage'], 20)
+        self.assertEqual(categories[0]['product_count'], 3)
+        self.assertEqual(testimonials[0]['image_url'], '')
+
+    def test_saves_invalidate_after_commit(self):
+        featured.featured_testimonials()
+        featured.top_categories()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Testimonial.objects.create(
+                name='Juma', email='juma@example.com', title='Nice', content='Good',
+                status='approved', is_featured=True,
+            )
+            Product.objects.filter(name='Gel 2').get().delete()
+
+        self.assertEqual(len(featured.featured_testimonials()), 2)
+        self.assertEqual(featured.top_categories()[0]['product_count'], 2)
+
+    def test_pages_render_feed(self):
+        response = self.client.get(reverse('testimonials:testimonials_list'))
+        self.assertContains(response, 'Loved it')
+
+        response = self.client.get(reverse('shop:home'))
+        self.assertContains(response, 'What Our Customers Say')
+        self.assertContains(response, 'Shop by Category')
+        self.assertContains(response, 'Featured Products')
+        self.assertContains(response, reverse('shop:product_detail', args=['gel-1']))
+        self.assertEqual(len(response.context['all_products']), 3)
+        self.assertFalse(response.context['has_more_products'])
+
+    def test_featured_names_follow_the_language(self):
+        Product.objects.filter(slug='gel-1').update(name_sw='Jeli 1')
+        self.assertEqual([p['display_name'] for p in featured.featured_products('sw')], ['Jeli 1', 'Gel 0'])
+        self.assertEqual([p['display_name'] for p in featured.featured_products('en')], ['Gel 1', 'Gel 0'])
+
+    def test_stock_movements_refresh_featured_stock(self):
+        gel = Product.objects.get(slug='gel-1')
+        with self.captureOnCommitCallbacks(execute=True):
+            inventory.count(gel, 1, kind='receipt')
+        self.assertTrue(featured.featured_products()[0]['is_in_stock'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            inventory.record('sale', gel, quantity=-1)
+        self.assertFalse(featured.featured_products()[0]['is_in_stock'])
+
+
+class LocalizedProductTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Sea Moss', slug='sea-moss')
+        self.gel = Product.objects.create(
+            name='Gold Gel', name_sw='Jeli ya Dhahabu', slug='gold-gel', category=category,
+            price='25000', description='Smooth gel.', description_sw='Jeli laini.',
+        )
+        self.powder = Product.objects.create(
+            name='Powder', slug='powder', category=category, product_type='powder', price='15000', description='Fine powder.',
+        )
+
+    def test_queryset_picks_language_in_sql(self):
+        products = {p.slug: p for p in Product.objects.localized('sw')}
+
+        self.assertEqual(products['gold-gel'].display_name, 'Jeli ya Dhahabu')
+        self.assertEqual(products['gold-gel'].display_description, 'Jeli laini.')
+        # Blank translations fall back to English.
+        self.assertEqual(products['powder'].display_name, 'Powder')
+        self.assertEqual(products['powder'].get_deferred_fields(), {'name_sw', 'description_sw'})
+        self.assertEqual(Product.objects.localized('en').get(slug='gold-gel').display_name, 'Gold Gel')
+
+    def test_projections_are_cached_per_language(self):
+        self.assertEqual(localization.get_product(self.gel.id, 'sw')['name'], 'Jeli ya Dhahabu')
+        self.assertEqual(localization.get_product(self.powder.id, 'sw')['name'], 'Powder')
+        with self.assertNumQueries(0):
+            projections = localization.get_products([self.powder.id, self.gel.id], 'sw')
+        self.assertEqual(list(projections), [self.powder.id, self.gel.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.gel.name_sw = 'Jeli Mpya'
+            self.gel.save()
+
+        self.assertEqual(localization.get_product(self.gel.id, 'sw')['name'], 'Jeli Mpya')
+        self.assertEqual(localization.get_product(self.gel.id, 'en')['name'], 'Gold Gel')
+
+    def test_swahili_pages_render_translations(self):
+        response = self.client.get(reverse('shop:product_detail', args=['gold-gel']), HTTP_ACCEPT_LANGUAGE='sw')
+
+        self.assertContains(response, 'Jeli ya Dhahabu')
+        self.assertContains(response, 'Jeli laini.')
+
+
+class ProductProjectionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('reader', 'reader@example.com', 'pass')
+        category = Category.objects.create(name='Sea Moss', slug='sea-moss')
+        for i, product_type in enumerate(['gel', 'powder', 'capsules', 'raw']):
+            product = Product.objects.create(
+                name=f'Product {i}', slug=f'product-{i}', category=category, product_type=product_type,
+                price='10000', stock_quantity=5, description='Long text. ' * 200, ingredients='Sea moss',
+            )
+            ProductImage.objects.bulk_create([
+                ProductImage(product=product, image=f'products/{i}-a.jpg', sort_order=0),
+                ProductImage(product=product, image=f'products/{i}-b.jpg', sort_order=1, is_primary=i % 2 == 0),
+            ])
+            refresh_cover_image(product.id)
+            ProductReview.objects.create(
+                product=product, user=self.user, rating=4, title='Good', review='Nice', is_approved=True,
+            )
+
+    def test_cards_load_in_constant_queries(self):
+        with self.assertNumQueries(1):  # products joined to category and cover image, with ratings
+            products = list(Product.objects.for_card().order_by('id'))
+
+        with self.assertNumQueries(0):
+            cards = [
+                (p.display_name, p.category.name, p.cover_image.image.name, p.average_rating, p.review_count)
+                for p in products
+            ]
+        self.assertEqual(cards[0], ('Product 0', 'Sea Moss', 'products/0-b.jpg', 4, 1))
+        self.assertEqual(cards[1][2], 'products/1-a.jpg')
+        self.assertLessEqual(len(products[0].display_description), 200)
+        self.assertTrue({'description', 'ingredients', 'benefits', 'usage_instructions'} <= products[0].get_deferred_fields())
+
+    def test_detail_gallery_is_prefetched_primary_first(self):
+        with self.assertNumQueries(3):  # product + gallery + variants
+            product = Product.objects.for_detail().get(slug='product-0')
+        with self.assertNumQueries(0):
+            gallery = [image.image.name for image in product.images.all()]
+            self.assertEqual(product.cover_image.image.name, 'products/0-b.jpg')
+        self.assertEqual(gallery, ['products/0-b.jpg', 'products/0-a.jpg'])
+
+    def test_grid_pages_render(self):
+        for url in (reverse('shop:product_list'), reverse('shop:category_detail', args=['sea-moss'])):
+            response = self.client.get(url)
+            self.assertContains(response, '/media/products/0-b.jpg')
+
+    def test_grid_pages_paginate_every_product_once(self):
+        category = Category.objects.get(slug='sea-moss')
+        Product.objects.bulk_create([
+            Product(
+                name=f'Extra {i}', slug=f'extra-{i}', sku=f'EXTRA-{i}', category=category, product_type='gel',
+                price='5000',
+            )
+            for i in range(20)
+        ])
+        self.assertTrue(Product.objects.for_card().ordered)
+
+        pages = (
+            (reverse('shop:category_detail', args=['sea-moss']), {}),
+            (reverse('shop:search'), {'q': 'e'}),
+        )
+        for url, params in pages:
+            slugs = []
+            for page in (1, 2):
+                response = self.client.get(url, {**params, 'page': page})
+                slugs += [product.slug for product in response.context['products']]
+            self.assertEqual(len(slugs), 24)
+            self.assertEqual(len(set(slugs)), 24)
+
+    def test_export_columns(self):
+        product = Product.objects.for_export('en').get(slug='product-0')
+        self.assertIn('description', product.get_deferred_fields())
+        with self.assertNumQueries(0):
+            self.assertEqual((product.display_name, product.category.name), ('Product 0', 'Sea Moss'))
+
+
+class CoverImageTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        category = Category.objects.create(name='Sea Moss', slug='sea-moss')
+        self.product = Product.objects.create(
+            name='Gold Gel', slug='gold-gel', category=category, price='25000', description='Smooth gel.',
+        )
+
+    def add_image(self, name, **kwargs):
+        buffer = io.BytesIO()
+        Image.new('RGB', (10, 10)).save(buffer, 'JPEG')
+        upload = SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+        return ProductImage.objects.create(product=self.product, image=upload, **kwargs)
+
+    def cover(self):
+        return Product.objects.get(pk=self.product.pk).cover_image_id
+
+    def test_cover_follows_image_changes(self):
+        self.assertIsNone(self.cover())
+        first = self.add_image('first.jpg', sort_order=1)
+        self.assertEqual(self.cover(), first.id)
+
+        second = self.add_image('second.jpg', sort_order=0)
+        self.assertEqual(self.cover(), second.id)
+
+        first.is_primary = True
+        first.save()
+        self.assertEqual(self.cover(), first.id)
+
+        first.delete()
+        self.assertEqual(self.cover(), second.id)
+
+        second.delete()
+        self.assertIsNone(self.cover())
+
+
+@override_settings(LOW_STOCK_THRESHOLD=5)
+class InventoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Sea Moss', slug='sea-moss')
+        self.product = Product.objects.create(
+            name='Gold Gel', slug='gold-gel', category=category, price='10', description='Gel.',
+        )
+        self.variant = ProductVariant.objects.create(product=self.product, name='500ml', price='12')
+
+    def test_record_applies_movement_to_stale_instances(self):
+        stale = Product.objects.get(pk=self.product.pk)
+        inventory.record('receipt', self.product, quantity=10)
+        inventory.record('reservation', stale, reserved=4, check_available=True)
+        with self.assertRaises(inventory.InsufficientStock):
+            inventory.record('reservation', stale, reserved=7, check_available=True)
+
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock_quantity, self.product.reserved_quantity), (10, 4))
+        self.assertEqual(self.product.available_quantity, 6)
+        self.assertEqual(self.product.stock_movements.count(), 2)
+
+    def test_count_records_the_difference(self):
+        inventory.count(self.product, 8, kind='receipt')
+        self.assertIsNone(inventory.count(self.product, 8))
+        movement = inventory.count(self.product, 6)
+        self.assertEqual((movement.kind, movement.quantity), ('adjustment', -2))
+
+    def test_low_stock_lists_products_and_variants_from_cache(self):
+        inventory.count(self.product, 20)
+        inventory.count(self.product, 2, variant=self.variant)
+        with self.assertNumQueries(1):
+            items = inventory.low_stock()
+        with self.assertNumQueries(0):
+            inventory.low_stock()
+        self.assertEqual(
+            [(item['name'], item['variant_name'], item['available']) for item in items],
+            [('Gold Gel', '500ml', 2)],
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            inventory.record('reservation', self.product, reserved=16)
+        self.assertEqual([item['available'] for item in inventory.low_stock()], [2, 4])
+
+    def test_reconcile_command(self):
+        inventory.count(self.product, 3)
+        call_command('reconcile_stock', stdout=io.StringIO())
+
+        Product.objects.filter(pk=self.product.pk).update(stock_quantity=9)
+        with self.assertRaises(CommandError):
+            call_command('reconcile_stock', stdout=io.StringIO())
+        call_command('reconcile_stock', '--fix', stdout=io.StringIO())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 3)
+
+
+class StorefrontLoadTests(LiveServerTestCase):
+    def test_run_load_reports_throughput_and_errors(self):
+        category = Category.objects.create(name='Gels', slug='gels')
+        Product.objects.create(
+            name='Gel', slug='gel', sku='GEL-1', category=category, description='Sea moss', price=10000,
+        )
+        paths = storefront_paths()
+        self.assertIn('/product/gel/', paths)
+        self.assertIn('/category/gels/', paths)
+
+        stats = run_load(self.live_server_url, ['/', '/product/gel/'], total=6, concurrency=2)
+        self.assertEqual((stats['requests'], stats['errors']), (6, 0))
+        self.assertGreater(stats['rps'], 0)
+        self.assertLessEqual(stats['p50'], stats['p99'])
+
+        self.assertEqual(run_load(self.live_server_url, ['/product/missing/'], total=2)['errors'], 2)
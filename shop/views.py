@@ -2,30 +2,33 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.db.models import Q, Avg
+from django.db.models import F, Q
 from django.core.mail import mail_admins
+from carecove.ratelimit import rate_limit
+from . import featured
 from .models import Product, Category, ProductReview
 from .forms import ContactForm, ProductReviewForm
 
 def home(request):
     """Homepage with all products prominently displayed."""
-    # Get all active products, featuring important ones first
-    all_products = Product.objects.filter(is_active=True).order_by('-is_featured', '-created_at')[:12]
-    featured_products = Product.objects.filter(is_active=True, is_featured=True)[:4]
-    categories = Category.objects.filter(is_active=True)[:4]
-    latest_products = Product.objects.filter(is_active=True).order_by('-created_at')[:4]
+    # Featured products come from the cached feed; one query fetches the
+    # newest products for the grid and the new arrivals (one extra row tells
+    # whether there are more than the grid shows).
+    products = list(Product.objects.for_card().filter(is_active=True)[:13])
     
     context = {
-        'all_products': all_products,
-        'featured_products': featured_products,
-        'categories': categories,
-        'latest_products': latest_products,
+        'all_products': products[:12],
+        'has_more_products': len(products) > 12,
+        'featured_products': featured.featured_products(),
+        'categories': featured.top_categories(),
+        'featured_testimonials': featured.featured_testimonials(),
+        'latest_products': products[:4],
     }
     return render(request, 'shop/home.html', context)
 
 def product_list(request):
     """Product listing with filtering and search."""
-    products = Product.objects.filter(is_active=True)
+    products = Product.objects.for_card().filter(is_active=True)
     categories = Category.objects.filter(is_active=True)
     
     # Filtering
@@ -53,6 +56,7 @@ def product_list(request):
     if search_query:
         products = products.filter(
             Q(name__icontains=search_query) |
+            Q(name_sw__icontains=search_query) |
             Q(description__icontains=search_query) |
             Q(category__name__icontains=search_query)
         )
@@ -65,9 +69,9 @@ def product_list(request):
     elif sort_by == 'newest':
         products = products.order_by('-created_at')
     elif sort_by == 'rating':
-        products = products.annotate(avg_rating=Avg('reviews__rating')).order_by('-avg_rating')
+        products = products.order_by(F('approved_rating').desc(nulls_last=True))
     else:
-        products = products.order_by('name')
+        products = products.order_by('display_name')
     
     # Pagination
     paginator = Paginator(products, 12)
@@ -76,6 +80,7 @@ def product_list(request):
     
     context = {
         'products': products,
+        'page_obj': products,
         'categories': categories,
         'search_query': search_query,
         'category_slug': category_slug,
@@ -88,13 +93,13 @@ def product_list(request):
 
 def product_detail(request, slug):
     """Product detail page with reviews."""
-    product = get_object_or_404(Product, slug=slug)
+    product = get_object_or_404(Product.objects.for_detail(), slug=slug)
     
     # Get approved reviews
     reviews = product.reviews.filter(is_approved=True).order_by('-created_at')
     
     # Get related products from same category
-    related_products = Product.objects.filter(
+    related_products = Product.objects.for_card().filter(
         category=product.category,
         is_active=True
     ).exclude(id=product.id)[:4]
@@ -118,7 +123,7 @@ def product_detail(request, slug):
 def category_detail(request, slug):
     """Category detail page."""
     category = get_object_or_404(Category, slug=slug)
-    products = Product.objects.filter(category=category, is_active=True)
+    products = Product.objects.for_card().filter(category=category, is_active=True)
     
     # Pagination
     paginator = Paginator(products, 12)
@@ -128,17 +133,19 @@ def category_detail(request, slug):
     context = {
         'category': category,
         'products': products,
+        'page_obj': products,
     }
     return render(request, 'shop/category_detail.html', context)
 
 def search(request):
     """Search products."""
     search_query = request.GET.get('q', '')
-    products = Product.objects.filter(is_active=True)
+    products = Product.objects.for_card().filter(is_active=True)
     
     if search_query:
         products = products.filter(
             Q(name__icontains=search_query) |
+            Q(name_sw__icontains=search_query) |
             Q(description__icontains=search_query) |
             Q(category__name__icontains=search_query) |
             Q(ingredients__icontains=search_query) |
@@ -160,6 +167,7 @@ def about(request):
     """About page."""
     return render(request, 'shop/about.html')
 
+@rate_limit('contact')
 def contact(request):
     """Contact page with form."""
     if request.method == 'POST':
@@ -184,6 +192,7 @@ def contact(request):
     return render(request, 'shop/contact.html', {'form': form})
 
 @login_required
+@rate_limit('review')
 def submit_review(request, slug):
     """Submit a product review with admin notification."""
     product = get_object_or_404(Product, slug=slug)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testimonials', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(fields=['created_at', 'id'], name='testimonial_created_keyset_idx'),
+        ),
+    ]
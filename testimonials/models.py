@@ -1,5 +1,7 @@
 
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 
 class Testimonial(models.Model):
@@ -24,6 +26,9 @@ class Testimonial(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='testimonial_created_keyset_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.title}"
@@ -31,3 +36,10 @@ class Testimonial(models.Model):
     @property
     def stars_display(self):
         return '★' * self.rating + '☆' * (5 - self.rating)
+
+
+@receiver(post_save, sender=Testimonial)
+@receiver(post_delete, sender=Testimonial)
+def invalidate_featured_testimonials(sender, **kwargs):
+    from shop.featured import invalidate
+    invalidate('testimonials')
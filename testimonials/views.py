@@ -2,13 +2,14 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.core.paginator import Paginator
+from shop import featured
 from .models import Testimonial
 from .forms import TestimonialForm
 
 def testimonials_list(request):
     """Display approved testimonials."""
     testimonials = Testimonial.objects.filter(status='approved').order_by('-created_at')
-    featured_testimonials = testimonials.filter(is_featured=True)[:3]
+    featured_testimonials = featured.featured_testimonials()
     
     # Pagination
     paginator = Paginator(testimonials, 12)
@@ -1,4 +1,7 @@
 from carecove.wsgi import application
+from carecove.warmup import warm_up
+
+warm_up()
 
 # Vercel expects 'app' variable
-app = application
\ No newline at end of file
+app = application